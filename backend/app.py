@@ -1,21 +1,35 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Flask, Response, g, request, jsonify, send_from_directory, send_file
 from flask_cors import CORS
 from flask_caching import Cache
 from dotenv import load_dotenv
 from functools import wraps
+import json
 import os
+import requests
+import secrets
+import time
+from datetime import date
 
 # Load environment variables
 load_dotenv()
 
 # Import services
 from services.book_service import get_book_service
-from services.metadata_service import get_metadata_service
+from services.metadata_service import get_metadata_service, MAX_BATCH_ITEMS
 from services.ranking_service import get_ranking_service
 from services.tag_service import get_tag_service
 from services.goal_service import get_goal_service
 from services.continuation_service import get_continuation_service
 from services.auth_service import get_auth_service
+from services.metrics_service import get_metrics_service
+from services.profiler_service import get_profiler_service
+from services.analytics_service import get_analytics_service
+from services.http_client import get_http_client
+from services.cover_store import get_cover_store
+from services.image_proxy import get_image_proxy
+from services.shelf_layout import layout_shelf, MAX_LAYOUT_BOOKS
+from services import cover_service
+from database import query_stats
 
 # Determine if we're serving the frontend
 # Look for the built frontend in ../bookshelf-ts-site/build
@@ -36,6 +50,9 @@ cache_config = {
 app.config.from_mapping(cache_config)
 cache = Cache(app)
 
+# Behind nginx/Apache, let the web server send cached images and covers (X-Sendfile)
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE') == '1'
+
 # Services
 book_service = get_book_service()
 metadata_service = get_metadata_service()
@@ -44,6 +61,11 @@ tag_service = get_tag_service()
 goal_service = get_goal_service()
 continuation_service = get_continuation_service()
 auth_service = get_auth_service()
+metrics_service = get_metrics_service()
+profiler_service = get_profiler_service()
+analytics_service = get_analytics_service()
+cover_store = get_cover_store()
+image_proxy = get_image_proxy()
 
 # =============================================================================
 # AUTHENTICATION MIDDLEWARE
@@ -71,6 +93,86 @@ def require_auth(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def require_debug_access(f):
+    """Decorator for debug endpoints - open locally, token-protected in production"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        debug_token = os.getenv('DEBUG_TOKEN')
+        if debug_token:
+            provided = request.headers.get('X-Debug-Token', '')
+            if not secrets.compare_digest(provided, debug_token):
+                return jsonify({'error': 'API endpoint not found'}), 404
+        elif os.getenv('DATABASE_URL'):
+            # Production without a DEBUG_TOKEN: keep debug endpoints hidden
+            return jsonify({'error': 'API endpoint not found'}), 404
+        return f(*args, **kwargs)
+    return decorated_function
+
+# =============================================================================
+# REQUEST INSTRUMENTATION
+# =============================================================================
+
+def request_rule():
+    """Route pattern for the current request, e.g. '/api/books/<int:book_id>'"""
+    return request.url_rule.rule if request.url_rule else request.path
+
+def request_label():
+    """Method plus route pattern, e.g. 'GET /api/books/<int:book_id>'"""
+    return f"{request.method} {request_rule()}"
+
+@app.before_request
+def start_query_stats():
+    """Start counting database queries for this request"""
+    query_stats.start_request(request_label())
+
+@app.before_request
+def start_request_metrics():
+    """Time sampled requests and start any armed profiler capture"""
+    g.request_started = time.perf_counter() if metrics_service.should_sample() else None
+    g.profile_capture = profiler_service.begin(request.method, request_rule(), request.path)
+
+@app.after_request
+def add_query_stats_header(response):
+    """Expose per-request database time in the Server-Timing header"""
+    stats = query_stats.finish_request()
+    if stats is not None:
+        response.headers.add('Server-Timing', stats.server_timing())
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    """Record status counts and, for sampled requests, latency per route"""
+    g.response_status = response.status_code
+    if metrics_service.enabled:
+        rule = request_rule() if request.url_rule else 'unmatched'
+        metrics_service.record_status(request.method, rule, response.status_code)
+        started = g.get('request_started')
+        if started is not None:
+            metrics_service.observe_latency(request.method, rule, time.perf_counter() - started)
+    return response
+
+@app.after_request
+def invalidate_library_stats(response):
+    """Any successful write may change a library - bump its analytics version"""
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        if request.path.startswith('/api/books/search'):
+            pass  # Metadata lookups read nothing from the library
+        elif request.path.startswith('/api/tags'):
+            # Tags are shared, so a rename or merge shows up in every library
+            analytics_service.invalidate()
+        else:
+            user = getattr(request, 'current_user', None)
+            if user:
+                analytics_service.invalidate(user['id'])
+    return response
+
+@app.teardown_request
+def finish_profile_capture(exc):
+    """Stop the profiler even when the view raised"""
+    capture = g.pop('profile_capture', None)
+    if capture is not None:
+        profiler_service.end(capture, g.get('response_status', 500 if exc else None))
+
 # =============================================================================
 # AUTHENTICATION ENDPOINTS
 # =============================================================================
@@ -206,6 +308,16 @@ def check_username():
 # PUBLIC USER ENDPOINTS (No auth required)
 # =============================================================================
 
+def parse_date_range():
+    """Optional ?from=&to= ISO dates as (start, end); None if either is malformed"""
+    try:
+        return tuple(
+            date.fromisoformat(request.args[name]) if request.args.get(name) else None
+            for name in ('from', 'to')
+        )
+    except ValueError:
+        return None
+
 @app.route('/api/public/users/<username>/profile', methods=['GET'])
 def get_public_profile(username):
     """Get public user profile by username"""
@@ -262,6 +374,7 @@ def get_public_shelf(username):
             'num_pages': book.get('num_pages'),
             'genre': book.get('genre'),
             'cover_image_url': book.get('cover_image_url'),
+            'cover_hash': book.get('cover_hash'),
             'series': book.get('series'),
             'series_position': book.get('series_position'),
             'reading_state': book.get('reading_state'),
@@ -286,7 +399,12 @@ def get_public_stats(username):
     
     # All profiles are public now, no need to check is_public
     
-    stats = book_service.get_public_stats(user['id'])
+    date_range = parse_date_range()
+    if date_range is None:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+    
+    stats = dict(analytics_service.get_stats(user['id'], *date_range))
+    stats['total_public_books'] = stats.pop('total_books')
     return jsonify(stats)
 
 @app.route('/api/public/users/<username>/goal', methods=['GET'])
@@ -441,40 +559,11 @@ def get_my_stats():
     """Get current user's statistics (private, includes all data)"""
     user = request.current_user
     
-    # Get all stats (not just public books)
-    state_query = """
-        SELECT rs.state, COUNT(*) as count
-        FROM books b
-        JOIN reading_states rs ON b.id = rs.book_id
-        WHERE b.user_id = ?
-        GROUP BY rs.state
-    """
-    state_counts = book_service.db.execute_query(state_query, (user['id'],))
-    
-    rating_query = """
-        SELECT AVG(r.initial_stars) as avg_rating, COUNT(*) as rated_count
-        FROM books b
-        JOIN rankings r ON b.id = r.book_id
-        WHERE b.user_id = ? AND r.initial_stars IS NOT NULL
-    """
-    rating_result = book_service.db.execute_query(rating_query, (user['id'],))
-    avg_rating = rating_result[0]['avg_rating'] if rating_result and rating_result[0]['avg_rating'] else None
-    rated_count = rating_result[0]['rated_count'] if rating_result else 0
-    
-    state_dict = {}
-    for row in state_counts:
-        state_dict[row['state']] = row['count']
+    date_range = parse_date_range()
+    if date_range is None:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
     
-    return jsonify({
-        'counts_by_state': {
-            'want_to_read': state_dict.get('want_to_read', 0),
-            'currently_reading': state_dict.get('currently_reading', 0),
-            'read': state_dict.get('read', 0)
-        },
-        'total_books': sum(state_dict.values()),
-        'average_rating': float(avg_rating) if avg_rating else None,
-        'rated_count': rated_count
-    })
+    return jsonify(analytics_service.get_stats(user['id'], *date_range))
 
 # =============================================================================
 # BOOK ENDPOINTS
@@ -492,6 +581,26 @@ def search_books_metadata():
     results = metadata_service.search_books(query, author)
     return jsonify(results)
 
+@app.route('/api/books/search/batch', methods=['POST'])
+@require_auth
+def search_books_metadata_batch():
+    """Look up many {title, author, isbn} items at once, streamed back as NDJSON.
+    
+    Each line is {"index", "matches"} (or {"index", "error"}) for one input
+    item, in completion order.
+    """
+    items = (request.json or {}).get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items must be a non-empty list'}), 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({'error': f'At most {MAX_BATCH_ITEMS} items per batch'}), 400
+    
+    def generate():
+        for result in metadata_service.search_batch(items):
+            yield json.dumps(result) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/api/books', methods=['POST'])
 @require_auth
 def create_book():
@@ -502,6 +611,8 @@ def create_book():
     
     book = book_service.create_book(data, initial_state, user['id'])
     cache.clear()  # Clear cache when books change
+    if book:
+        cover_service.queue_cover_fetch(book)
     return jsonify(book), 201
 
 @app.route('/api/books/<int:book_id>', methods=['GET'])
@@ -528,6 +639,9 @@ def update_book(book_id):
     data = request.json
     book = book_service.update_book(book_id, data, user['id'])
     cache.clear()  # Clear cache when books change
+    continuation_service.invalidate_graph(user['id'])  # Titles/authors are graph node labels
+    if book and any(field in data for field in ('isbn', 'isbn13', 'cover_image_url')):
+        cover_service.queue_cover_fetch(book)
     return jsonify(book)
 
 @app.route('/api/books/<int:book_id>', methods=['DELETE'])
@@ -537,6 +651,7 @@ def delete_book(book_id):
     user = request.current_user
     book_service.delete_book(book_id, user['id'])
     cache.clear()  # Clear cache when books change
+    continuation_service.invalidate_graph(user['id'])
     return jsonify({'success': True})
 
 def make_cache_key(*args, **kwargs):
@@ -623,6 +738,81 @@ def get_public_books():
     books = book_service.get_public_books(owner_user_id)
     return jsonify({'books': books})
 
+@app.route('/api/shelf/layout', methods=['POST'])
+def get_shelf_layout():
+    """Where each book goes on a shelf, without drawing it.
+    
+    Body: {books: [{id?, dimensions? | w?, h?, title?, author?}], background?: {...}}
+    (see shelf_layout.parse_background). Returns placements in book order,
+    the number of backgrounds used and the number of rows on the last one.
+    """
+    data = request.json or {}
+    books = data.get('books')
+    if not isinstance(books, list):
+        return jsonify({'error': 'books must be a list'}), 400
+    if len(books) > MAX_LAYOUT_BOOKS:
+        return jsonify({'error': f'At most {MAX_LAYOUT_BOOKS} books per layout'}), 400
+    
+    try:
+        placements = layout_shelf(books, data.get('background'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    last = placements[-1] if placements else {'shelf_index': 0, 'row': 0}
+    return jsonify({'placements': placements, 'shelves': last['shelf_index'] + 1, 'rows': last['row'] + 1})
+
+# =============================================================================
+# COVER ENDPOINTS (No auth required)
+# =============================================================================
+
+@app.route('/api/covers/proxy', methods=['GET'])
+def proxy_cover():
+    """Serve an external cover URL from the local image cache, fetching it on first use"""
+    url = request.args.get('url', '')
+    if not image_proxy.allowed(url):
+        # Not redirected either: that would make this an open redirect on our domain
+        return jsonify({'error': 'url must be an http(s) URL on a proxied cover host'}), 400
+    
+    for attempt in range(2):
+        try:
+            entry = image_proxy.get(url)
+        except requests.RequestException as e:
+            print(f"Image proxy fetch of {url} failed: {e}")
+            return jsonify({'error': 'Upstream image unavailable'}), 502
+        if entry is None:
+            return jsonify({'error': 'Image not found'}), 404
+        
+        # conditional=True answers If-None-Match with 304 and Range with 206.
+        # send_file opens the file right away; if a concurrent fetch's eviction removed
+        # it since get(), get() notices the missing file and fetches it again
+        try:
+            response = send_file(entry['path'], mimetype=entry['content_type'], etag=entry['etag'], conditional=True)
+            break
+        except FileNotFoundError:
+            if attempt:
+                raise
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+@app.route('/api/covers/<cover_hash>', methods=['GET'])
+def get_cover(cover_hash):
+    """Serve a stored cover, or with ?w= a thumbnail at least that wide (WebP when accepted).
+    
+    The URL names the content, so responses never change for a given Accept header.
+    """
+    width = request.args.get('w', type=int)
+    if width is not None and width <= 0:
+        return jsonify({'error': 'w must be a positive integer'}), 400
+    webp = 'image/webp' in request.headers.get('Accept', '')  # Only browsers that name it, not */*
+    found = cover_store.find(cover_hash, width, webp)
+    if not found:
+        return jsonify({'error': 'Cover not found'}), 404
+    
+    path, mimetype = found
+    response = send_file(path, mimetype=mimetype, etag=os.path.basename(path), conditional=True)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['Vary'] = 'Accept'
+    return response
+
 # =============================================================================
 # RANKING ENDPOINTS
 # =============================================================================
@@ -885,10 +1075,47 @@ def get_all_continuations():
 @app.route('/api/continuations/graph', methods=['GET'])
 @require_auth
 def get_continuation_graph():
-    """Get continuation graph data"""
-    graph = continuation_service.get_continuation_graph()
+    """Get laid-out continuation graph data, optionally paged by component or cut to a viewport"""
+    user = request.current_user
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(1, limit)
+    
+    bbox = None
+    if request.args.get('bbox'):
+        try:
+            bbox = [float(value) for value in request.args['bbox'].split(',')]
+        except ValueError:
+            bbox = []
+        if len(bbox) != 4:
+            return jsonify({'error': 'bbox must be min_x,min_y,max_x,max_y'}), 400
+    
+    graph = continuation_service.get_continuation_graph(user['id'], offset, limit, bbox)
     return jsonify(graph)
 
+@app.route('/api/continuations/longest-chain', methods=['GET'])
+@require_auth
+def get_longest_chain():
+    """Get the longest run of continuations in the user's library"""
+    user = request.current_user
+    chain = continuation_service.get_longest_chain(user['id'])
+    return jsonify({'books': chain, 'length': len(chain)})
+
+@app.route('/api/continuations/path', methods=['GET'])
+@require_auth
+def get_continuation_path():
+    """Check whether one book leads to another through continuations"""
+    user = request.current_user
+    from_book_id = request.args.get('from', type=int)
+    to_book_id = request.args.get('to', type=int)
+    
+    if not from_book_id or not to_book_id:
+        return jsonify({'error': 'from and to book ids required'}), 400
+    
+    path = continuation_service.get_path(from_book_id, to_book_id, user['id'])
+    return jsonify({'reachable': path is not None, 'path': path or []})
+
 @app.route('/api/continuations', methods=['POST'])
 @require_auth
 def add_continuation():
@@ -914,10 +1141,46 @@ def remove_continuation(from_book_id, to_book_id):
 @require_auth
 def get_book_chain(book_id):
     """Get the complete chain of books connected to this book"""
+    user = request.current_user
     direction = request.args.get('direction', 'both')
-    chain = continuation_service.get_chain(book_id, direction)
+    max_depth = request.args.get('max_depth', type=int)
+    
+    try:
+        chain = continuation_service.get_chain(book_id, direction, user['id'], max_depth)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if chain is None:
+        return jsonify({'error': 'Book not found'}), 404
     return jsonify(chain)
 
+@app.route('/api/books/<int:book_id>/neighborhood', methods=['GET'])
+@require_auth
+def get_book_neighborhood(book_id):
+    """Get the books within a few continuation links of this book"""
+    user = request.current_user
+    radius = request.args.get('radius', 1, type=int)
+    direction = request.args.get('direction', 'both')
+    
+    try:
+        neighborhood = continuation_service.get_neighborhood(book_id, user['id'], radius, direction)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if neighborhood is None:
+        neighborhood = {'nodes': [], 'edges': []}
+    return jsonify(neighborhood)
+
+@app.route('/api/books/<int:book_id>/component', methods=['GET'])
+@require_auth
+def get_book_component(book_id):
+    """Get every book linked to this book, ignoring link direction"""
+    user = request.current_user
+    component = continuation_service.get_component(book_id, user['id'])
+    if component is None:
+        component = {'nodes': [], 'edges': []}
+    return jsonify(component)
+
 # =============================================================================
 # HEALTH CHECK
 # =============================================================================
@@ -927,6 +1190,59 @@ def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'ok'})
 
+# =============================================================================
+# DEBUG ENDPOINTS
+# =============================================================================
+
+@app.route('/api/debug/queries', methods=['GET'])
+@require_debug_access
+def get_query_stats():
+    """Recent per-request query counts, DB time, slow queries and likely N+1 patterns"""
+    return jsonify(query_stats.get_recent_stats())
+
+@app.route('/api/debug/http', methods=['GET'])
+@require_debug_access
+def get_http_stats():
+    """Outbound HTTP per host: request/failure/retry counts, circuit state and latency"""
+    return jsonify(get_http_client().stats())
+
+@app.route('/api/debug/metadata', methods=['GET'])
+@require_debug_access
+def get_metadata_stats():
+    """Open Library lookups answered by the offline index, prefix refinement and cache"""
+    return jsonify(metadata_service.stats())
+
+@app.route('/api/debug/image-proxy', methods=['GET'])
+@require_debug_access
+def get_image_proxy_stats():
+    """Image proxy hits, misses, revalidations, evictions and disk usage"""
+    return jsonify(image_proxy.stats())
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text metrics: per-route status counts and latency histograms"""
+    if not metrics_service.enabled:
+        return jsonify({'error': 'Metrics disabled (set METRICS_SAMPLE_RATE)'}), 404
+    return Response(metrics_service.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/debug/profile', methods=['GET'])
+@require_debug_access
+def profile_route():
+    """Arm the profiler with ?route=...&requests=N&mode=cprofile|sample, or list captures"""
+    route = request.args.get('route')
+    if not route:
+        return jsonify(profiler_service.get_status())
+    
+    try:
+        status = profiler_service.arm(
+            route,
+            int(request.args.get('requests', 1)),
+            request.args.get('mode', 'cprofile')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(status)
+
 # =============================================================================
 # FRONTEND SERVING (React App)
 # =============================================================================
@@ -0,0 +1,152 @@
+"""
+Shared fixtures for the service-level benchmark suite.
+
+Each scale in BENCH_SCALES (books per user) gets a synthetic SQLite dataset,
+generated once by scripts/generate_dataset.py and cached in BENCH_DATA_DIR.
+Every session benchmarks a fresh copy, so write benchmarks never leak into
+the next run and results stay comparable between commits.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Benchmarks always run against SQLite files, never a configured Postgres
+os.environ.pop('DATABASE_URL', None)
+
+import database.db as database_module
+from database.db import Database
+from scripts.generate_dataset import generate_dataset
+from services.analytics_service import AnalyticsService
+from services.book_service import BookService
+from services.continuation_service import ContinuationService
+from services.goal_service import GoalService
+from services.metadata_service import MetadataService
+from services.ranking_service import RankingService
+from services.tag_service import TagService
+
+BENCH_SCALES = [int(s) for s in os.getenv('BENCH_SCALES', '1000,10000,100000').split(',') if s.strip()]
+BENCH_SEED = int(os.getenv('BENCH_SEED', 42))
+BENCH_DATA_DIR = Path(os.getenv('BENCH_DATA_DIR', os.path.join(tempfile.gettempdir(), 'bookshelf-bench')))
+
+# Expensive write paths (one UPDATE per ranked book, etc.) get fewer rounds
+HEAVY_ROUNDS = int(os.getenv('BENCH_HEAVY_ROUNDS', 3))
+
+
+class Dataset:
+    """A generated library plus handy ids to benchmark against"""
+
+    def __init__(self, db, scale, user_id):
+        self.db = db
+        self.scale = scale
+        self.user_id = user_id
+
+        def scalar(query, params=()):
+            rows = db.execute_query(query, params)
+            return list(rows[0].values())[0] if rows else None
+
+        self.ranked_book_id = scalar("""
+            SELECT b.id FROM books b JOIN rankings r ON b.id = r.book_id
+            WHERE b.user_id = ? ORDER BY r.rank_position LIMIT 1 OFFSET ?
+        """, (user_id, scale // 4))
+        self.ranked_stars = scalar("SELECT initial_stars FROM rankings WHERE book_id = ?", (self.ranked_book_id,))
+        self.unranked_book_id = scalar("""
+            SELECT b.id FROM books b JOIN reading_states rs ON b.id = rs.book_id
+            WHERE b.user_id = ? AND rs.state = 'want_to_read' ORDER BY b.id LIMIT 1
+        """, (user_id,))
+        # Start of the longest chain: a book with outgoing but no incoming links
+        self.chain_book_id = scalar("""
+            SELECT tc.from_book_id FROM thought_continuations tc
+            JOIN books b ON tc.from_book_id = b.id
+            WHERE b.user_id = ?
+            AND tc.from_book_id NOT IN (SELECT to_book_id FROM thought_continuations)
+            ORDER BY tc.from_book_id LIMIT 1
+        """, (user_id,))
+        self.continuation = db.execute_query("""
+            SELECT tc.from_book_id, tc.to_book_id FROM thought_continuations tc
+            JOIN books b ON tc.from_book_id = b.id WHERE b.user_id = ? LIMIT 1
+        """, (user_id,))[0]
+        self.tag = db.execute_query("""
+            SELECT t.id, t.name FROM tags t JOIN book_tags bt ON t.id = bt.tag_id
+            GROUP BY t.id, t.name ORDER BY COUNT(*) DESC LIMIT 1
+        """)[0]
+        self.goal_year = scalar(
+            "SELECT year FROM reading_goals WHERE user_id = ? ORDER BY year DESC LIMIT 1", (user_id,)
+        )
+        self.search_term = scalar("SELECT title FROM books WHERE user_id = ? LIMIT 1", (user_id,)).split()[0]
+
+
+def _cached_dataset_path(scale):
+    BENCH_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    path = BENCH_DATA_DIR / f'dataset-{scale}-seed{BENCH_SEED}.db'
+    if not path.exists():
+        partial = path.with_suffix('.partial')
+        if partial.exists():
+            partial.unlink()
+        generate_dataset(Database(str(partial)), users=2, books_per_user=scale, seed=BENCH_SEED)
+        partial.rename(path)
+    return path
+
+
+@pytest.fixture(scope='session', params=BENCH_SCALES, ids=lambda scale: f'{scale}books')
+def dataset(request, tmp_path_factory):
+    """Fresh working copy of the cached dataset for one scale"""
+    scale = request.param
+    working_copy = tmp_path_factory.mktemp(f'bench-{scale}') / 'bookshelf.db'
+    shutil.copyfile(_cached_dataset_path(scale), working_copy)
+
+    db = Database(str(working_copy))
+    # Services grab the singleton in __init__, so point it at this dataset first
+    database_module._db_instance = db
+    user_id = db.execute_query("SELECT id FROM users ORDER BY id LIMIT 1")[0]['id']
+    return Dataset(db, scale, user_id)
+
+
+@pytest.fixture
+def analytics_service(dataset):
+    return AnalyticsService()
+
+
+@pytest.fixture
+def book_service(dataset):
+    return BookService()
+
+
+@pytest.fixture
+def ranking_service(dataset):
+    return RankingService()
+
+
+@pytest.fixture
+def tag_service(dataset):
+    return TagService()
+
+
+@pytest.fixture
+def goal_service(dataset):
+    return GoalService()
+
+
+@pytest.fixture
+def continuation_service(dataset):
+    return ContinuationService()
+
+
+@pytest.fixture
+def metadata_service(tmp_path, monkeypatch):
+    """MetadataService with its response cache in a throwaway file and no offline index"""
+    monkeypatch.setenv('METADATA_CACHE_PATH', str(tmp_path / 'metadata_cache.db'))
+    monkeypatch.setenv('METADATA_INDEX_PATH', str(tmp_path / 'openlibrary_index.db'))
+    return MetadataService()
+
+
+@pytest.fixture
+def heavy_rounds():
+    return HEAVY_ROUNDS
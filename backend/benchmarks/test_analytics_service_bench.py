@@ -0,0 +1,26 @@
+"""Benchmarks for AnalyticsService: cold loads, cached reads and date-range filters"""
+
+from datetime import date
+
+from services.analytics_service import compute_stats
+
+
+def test_get_stats_cold(benchmark, analytics_service, dataset, heavy_rounds):
+    stats = benchmark.pedantic(
+        analytics_service.get_stats,
+        args=(dataset.user_id,),
+        setup=lambda: analytics_service.invalidate(dataset.user_id),
+        rounds=heavy_rounds
+    )
+    assert stats['counts_by_state']['read'] > 0
+
+
+def test_get_stats_cached(benchmark, analytics_service, dataset):
+    stats = benchmark(analytics_service.get_stats, dataset.user_id)
+    assert stats['yearly_totals']
+
+
+def test_compute_stats_date_range(benchmark, analytics_service, dataset):
+    columns = analytics_service._load_columns(dataset.user_id)
+    stats = benchmark(compute_stats, columns, date(dataset.goal_year, 1, 1), date(dataset.goal_year, 12, 31))
+    assert stats['pages_by_month']
@@ -0,0 +1,103 @@
+"""Benchmarks for every public BookService method"""
+
+import pytest
+
+NEW_BOOK = {
+    'title': 'Benchmark Book',
+    'author': 'Bench Author',
+    'isbn13': '9780000000000',
+    'num_pages': 320,
+    'is_public': True,
+}
+
+
+def _create(book_service, dataset):
+    return book_service.create_book(dict(NEW_BOOK), 'read', dataset.user_id)
+
+
+def test_create_book(benchmark, book_service, dataset):
+    book = benchmark(_create, book_service, dataset)
+    assert book['title'] == NEW_BOOK['title']
+
+
+def test_get_book(benchmark, book_service, dataset):
+    book = benchmark(book_service.get_book, dataset.ranked_book_id, dataset.user_id)
+    assert book['id'] == dataset.ranked_book_id
+
+
+def test_update_book(benchmark, book_service, dataset):
+    book = benchmark(book_service.update_book, dataset.ranked_book_id, {'notes': 'benchmarked'}, dataset.user_id)
+    assert book['notes'] == 'benchmarked'
+
+
+def test_delete_book(benchmark, book_service, dataset):
+    def setup():
+        return (_create(book_service, dataset)['id'], dataset.user_id), {}
+
+    benchmark.pedantic(book_service.delete_book, setup=setup, rounds=20, iterations=1)
+
+
+def test_failed_create_rolls_back_counters(benchmark, book_service, dataset):
+    # The state insert fails its CHECK after the book and its counter delta are written;
+    # all of it must roll back together
+    stats = book_service.get_library_stats(dataset.user_id)
+
+    def create_invalid():
+        with pytest.raises(Exception):
+            book_service.create_book(dict(NEW_BOOK), 'not_a_state', dataset.user_id)
+
+    benchmark.pedantic(create_invalid, rounds=5)
+    assert book_service.get_library_stats(dataset.user_id) == stats
+    assert book_service.reconcile_library_stats() == []
+
+
+def test_search_books_unfiltered(benchmark, book_service, dataset):
+    books = benchmark(book_service.search_books, None, None, None, None, 50, 0, dataset.user_id)
+    assert len(books) == 50
+
+
+def test_search_books_text(benchmark, book_service, dataset):
+    benchmark(book_service.search_books, dataset.search_term, None, None, None, 50, 0, dataset.user_id)
+
+
+def test_search_books_tag(benchmark, book_service, dataset):
+    benchmark(book_service.search_books, None, None, dataset.tag['name'], None, 50, 0, dataset.user_id)
+
+
+def test_search_books_deep_offset(benchmark, book_service, dataset):
+    benchmark(book_service.search_books, None, None, None, None, 50, dataset.scale // 2, dataset.user_id)
+
+
+def test_get_books_by_state(benchmark, book_service, dataset):
+    books = benchmark(book_service.get_books_by_state, 'read', 50, 0, dataset.user_id)
+    assert books
+
+
+def test_set_reading_state(benchmark, book_service, dataset):
+    benchmark(book_service.set_reading_state, dataset.unranked_book_id, 'currently_reading', '2024-01-01')
+
+
+def test_get_total_count(benchmark, book_service, dataset):
+    assert benchmark(book_service.get_total_count, None, dataset.user_id) >= dataset.scale
+
+
+def test_get_total_count_by_state(benchmark, book_service, dataset):
+    assert benchmark(book_service.get_total_count, 'read', dataset.user_id) > 0
+
+
+def test_refresh_library_stats(benchmark, book_service, dataset):
+    benchmark(book_service.refresh_library_stats, dataset.user_id)
+
+
+def test_reconcile_library_stats(benchmark, book_service, dataset, heavy_rounds):
+    assert benchmark.pedantic(book_service.reconcile_library_stats, rounds=heavy_rounds) == []
+
+
+def test_get_public_books(benchmark, book_service, dataset, heavy_rounds):
+    books = benchmark.pedantic(book_service.get_public_books, args=(dataset.user_id,), rounds=heavy_rounds)
+    assert len(books) >= dataset.scale
+
+
+def test_get_public_shelf(benchmark, book_service, dataset, heavy_rounds):
+    books = benchmark.pedantic(book_service.get_public_shelf, args=(dataset.user_id, 'read'), rounds=heavy_rounds)
+    assert books
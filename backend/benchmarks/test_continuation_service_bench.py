@@ -0,0 +1,102 @@
+"""Benchmarks for every public ContinuationService method"""
+
+
+def test_add_and_remove_continuation(benchmark, continuation_service, dataset):
+    def toggle():
+        continuation_service.add_continuation(dataset.ranked_book_id, dataset.unranked_book_id)
+        continuation_service.remove_continuation(dataset.ranked_book_id, dataset.unranked_book_id)
+
+    benchmark(toggle)
+
+
+def test_get_continuations_from(benchmark, continuation_service, dataset):
+    assert benchmark(continuation_service.get_continuations_from, dataset.continuation['from_book_id'])
+
+
+def test_get_continuations_to(benchmark, continuation_service, dataset):
+    assert benchmark(continuation_service.get_continuations_to, dataset.continuation['to_book_id'])
+
+
+def test_get_all_continuations(benchmark, continuation_service, heavy_rounds):
+    assert benchmark.pedantic(continuation_service.get_all_continuations, rounds=heavy_rounds)
+
+
+def test_get_continuation_graph(benchmark, continuation_service, heavy_rounds):
+    graph = benchmark.pedantic(continuation_service.get_continuation_graph, rounds=heavy_rounds)
+    assert graph['edges']
+
+
+def test_get_chain(benchmark, continuation_service, dataset, heavy_rounds):
+    chain = benchmark.pedantic(
+        continuation_service.get_chain,
+        args=(dataset.chain_book_id, 'forward', dataset.user_id),
+        rounds=heavy_rounds
+    )
+    assert len(chain['books']) > 1
+
+
+def test_get_chain_both(benchmark, continuation_service, dataset, heavy_rounds):
+    chain = benchmark.pedantic(
+        continuation_service.get_chain,
+        args=(dataset.chain_book_id, 'both', dataset.user_id),
+        rounds=heavy_rounds
+    )
+    assert chain['edges']
+
+
+def test_get_chain_shallow(benchmark, continuation_service, dataset):
+    # A depth-bounded walk: only books within two links are visited
+    chain = benchmark(continuation_service.get_chain, dataset.chain_book_id, 'both', dataset.user_id, 2)
+    assert all(book['depth'] <= 2 for book in chain['books'])
+
+
+def test_get_continuation_graph_cold(benchmark, continuation_service, dataset, heavy_rounds):
+    graph = benchmark.pedantic(
+        continuation_service.get_continuation_graph,
+        args=(dataset.user_id,),
+        setup=lambda: continuation_service.invalidate_graph(dataset.user_id),
+        rounds=heavy_rounds
+    )
+    assert graph['edges']
+
+
+def test_get_continuation_graph_page(benchmark, continuation_service, dataset):
+    graph = benchmark(continuation_service.get_continuation_graph, dataset.user_id, 0, 1)
+    assert graph['total_components'] >= 1
+
+
+def test_get_neighborhood(benchmark, continuation_service, dataset):
+    assert benchmark(continuation_service.get_neighborhood, dataset.chain_book_id, dataset.user_id, 2)
+
+
+def test_get_component(benchmark, continuation_service, dataset):
+    assert benchmark(continuation_service.get_component, dataset.chain_book_id, dataset.user_id)
+
+
+def test_get_longest_chain(benchmark, continuation_service, dataset):
+    def cold_longest_chain():
+        # Toggle a link so the cached result is dropped and recomputed
+        continuation_service.remove_continuation(dataset.continuation['from_book_id'], dataset.continuation['to_book_id'])
+        continuation_service.add_continuation(dataset.continuation['from_book_id'], dataset.continuation['to_book_id'])
+        return continuation_service.get_longest_chain(dataset.user_id)
+
+    continuation_service.get_graph(dataset.user_id)
+    assert benchmark(cold_longest_chain)
+
+
+def test_get_path(benchmark, continuation_service, dataset):
+    chain = continuation_service.get_longest_chain(dataset.user_id)
+    assert benchmark(continuation_service.get_path, chain[0]['id'], chain[-1]['id'], dataset.user_id)
+
+
+def test_get_graph_layout(benchmark, continuation_service, dataset, heavy_rounds):
+    graph = continuation_service.get_graph(dataset.user_id)
+    layout = benchmark.pedantic(graph.layout, setup=graph._derived.clear, rounds=heavy_rounds)
+    assert len(layout) == len(graph)
+
+
+def test_get_continuation_graph_viewport(benchmark, continuation_service, dataset):
+    bounds = continuation_service.get_continuation_graph(dataset.user_id)['bounds']
+    viewport = (bounds['min_x'], bounds['min_y'], bounds['min_x'] + 1200, bounds['min_y'] + 800)
+    graph = benchmark(continuation_service.get_continuation_graph, dataset.user_id, 0, None, viewport)
+    assert graph['nodes']
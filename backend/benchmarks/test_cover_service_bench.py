@@ -0,0 +1,76 @@
+"""Benchmarks for the local cover store and cached cover lookups (nothing is downloaded)"""
+
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from services import cover_service
+from services.cover_store import CoverStore
+
+
+def jpeg_bytes(color, size=(400, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def cover_store(tmp_path, monkeypatch):
+    store = CoverStore(str(tmp_path / 'covers'))
+    monkeypatch.setattr(cover_service, 'get_cover_store', lambda: store)
+    monkeypatch.setattr(cover_service, '_lookups', None)
+    return store
+
+
+def test_cover_store_put_existing(benchmark, cover_store):
+    image_bytes = jpeg_bytes('red')
+    digest = cover_store.put(image_bytes)
+    assert benchmark(cover_store.put, image_bytes) == digest
+
+
+def test_cover_store_put_new(benchmark, cover_store):
+    widths = iter(range(1_000_000))
+    # Fresh image each round: the cost of storing a cover and generating its thumbnails
+    benchmark.pedantic(lambda image_bytes: cover_store.put(image_bytes),
+                       setup=lambda: ((jpeg_bytes('red', (400 + next(widths), 600)),), {}), rounds=20)
+
+
+def test_cover_store_find_thumbnail(benchmark, cover_store):
+    digest = cover_store.put(jpeg_bytes('green'))
+    path, mimetype = benchmark(cover_store.find, digest, 150, True)
+    assert path.endswith('.w160.webp') and mimetype == 'image/webp'
+
+
+def test_find_cover_cached(benchmark, cover_store, monkeypatch):
+    image_bytes = jpeg_bytes('blue')
+    monkeypatch.setattr(cover_service, '_probe', lambda url: image_bytes if '-L' in url else None)
+    digest = cover_service.find_cover(isbn13='9780441013593')
+
+    monkeypatch.setattr(cover_service, '_probe', lambda url: pytest.fail('cached lookup went to Open Library'))
+    assert benchmark(cover_service.find_cover, isbn13='9780441013593') == digest
+
+
+def test_image_proxy_hit(benchmark, tmp_path):
+    from services.image_proxy import ImageProxy
+
+    class Upstream:
+        status_code = 200
+        headers = {'Content-Type': 'image/jpeg', 'ETag': '"v1"'}
+        content = jpeg_bytes('orange')
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size):
+            return (self.content[i:i + chunk_size] for i in range(0, len(self.content), chunk_size))
+
+        def close(self):
+            pass
+
+    proxy = ImageProxy(str(tmp_path / 'proxy'), allowed_hosts=['covers.openlibrary.org'])
+    proxy.http = type('Http', (), {'get': lambda self, url, **kwargs: Upstream()})()
+    url = 'https://covers.openlibrary.org/b/id/1-L.jpg'
+    proxy.get(url)
+    proxy.http = None  # Hits must not go upstream
+    assert benchmark(proxy.get, url)['size'] == len(Upstream.content)
@@ -0,0 +1,38 @@
+"""Benchmarks for every public GoalService method"""
+
+
+def test_set_goal(benchmark, goal_service, dataset):
+    goal = benchmark(goal_service.set_goal, dataset.goal_year, 52, 'year', dataset.user_id)
+    assert goal['target_count'] == 52
+
+
+def test_get_goal(benchmark, goal_service, dataset):
+    assert benchmark(goal_service.get_goal, dataset.goal_year, dataset.user_id)
+
+
+def test_get_goal_progress(benchmark, goal_service, dataset):
+    benchmark(goal_service.get_goal_progress, dataset.goal_year, 'year', dataset.user_id)
+
+
+def test_get_current_goal(benchmark, goal_service, dataset):
+    benchmark(goal_service.get_current_goal, dataset.user_id)
+
+
+def test_delete_goal(benchmark, goal_service, dataset):
+    def setup():
+        goal_service.set_goal(1900, 10, 'year', dataset.user_id)
+        return (1900, dataset.user_id), {}
+
+    benchmark.pedantic(goal_service.delete_goal, setup=setup, rounds=20, iterations=1)
+
+
+def test_get_all_goals(benchmark, goal_service, dataset):
+    assert benchmark(goal_service.get_all_goals, dataset.user_id)
+
+
+def test_calculate_pace_needed(benchmark, goal_service, dataset):
+    benchmark(goal_service.calculate_pace_needed, dataset.goal_year, 10000, 'year', dataset.user_id)
+
+
+def test_get_goal_books(benchmark, goal_service, dataset, heavy_rounds):
+    benchmark.pedantic(goal_service.get_goal_books, args=(dataset.goal_year - 1, dataset.user_id), rounds=heavy_rounds)
@@ -0,0 +1,77 @@
+"""Benchmarks for the shared HTTP client's per-request bookkeeping (no network)"""
+
+import time
+
+import pytest
+import requests
+
+from services import http_client
+from services.http_client import CircuitOpenError, HttpClient
+
+
+class FakeSession:
+    """Stands in for requests.Session: returns a response, or raises error"""
+
+    def __init__(self, status_code=200, error=None):
+        self.status_code = status_code
+        self.error = error
+
+    def request(self, method, url, **kwargs):
+        if self.error is not None:
+            raise self.error
+        response = requests.Response()
+        response.status_code = self.status_code
+        return response
+
+
+def open_circuit(client, host):
+    """Fail host FAILURE_THRESHOLD times, then let its cooldown pass"""
+    client.session = FakeSession(error=requests.ConnectionError('down'))
+    for _ in range(http_client.FAILURE_THRESHOLD):
+        with pytest.raises(requests.ConnectionError):
+            client.get(f'https://{host}/', retries=0)
+    client._host(host).opened_at = time.monotonic() - http_client.CIRCUIT_COOLDOWN
+
+
+def test_request_overhead(benchmark):
+    client = HttpClient()
+    client.session = FakeSession()
+    response = benchmark(client.get, 'https://covers.openlibrary.org/b/id/1-M.jpg')
+    assert response.status_code == 200
+    assert client.stats()['covers.openlibrary.org']['circuit'] == 'closed'
+
+
+def test_failed_probe_reopens_circuit(benchmark):
+    # A probe ending in an error that is not retried (here too many redirects) must
+    # still be recorded; before, it left the host rejecting every request for good
+    client = HttpClient()
+    host = 'openlibrary.org'
+
+    def probe():
+        open_circuit(client, host)
+        client.session = FakeSession(error=requests.TooManyRedirects('loop'))
+        with pytest.raises(requests.TooManyRedirects):
+            client.get(f'https://{host}/', retries=0)
+
+    benchmark.pedantic(probe, rounds=5)
+    state = client._host(host)
+    assert not state.probing
+    assert state.circuit == 'open'
+
+    # Once the cooldown passes again, the next probe goes out and closes the circuit
+    state.opened_at = time.monotonic() - http_client.CIRCUIT_COOLDOWN
+    client.session = FakeSession()
+    assert client.get(f'https://{host}/', retries=0).status_code == 200
+    assert state.circuit == 'closed'
+
+
+def test_open_circuit_fails_fast(benchmark):
+    client = HttpClient()
+    open_circuit(client, 'books.google.com')
+    client._host('books.google.com').opened_at = time.monotonic()
+
+    def rejected():
+        with pytest.raises(CircuitOpenError):
+            client.get('https://books.google.com/', retries=0)
+
+    benchmark(rejected)
@@ -0,0 +1,80 @@
+"""Benchmarks for ingesting an Open Library dump and querying the offline index"""
+
+import gzip
+import json
+
+import pytest
+
+from services.metadata_index import MetadataIndex, isbn10_to_isbn13
+
+SAMPLE_EDITIONS = 20000
+SAMPLE_WORDS = ['dune', 'river', 'night', 'garden', 'empire', 'stone', 'winter', 'glass', 'city', 'harbor']
+
+
+def isbn10(n):
+    body = f'{n:09d}'
+    check = sum((10 - i) * int(digit) for i, digit in enumerate(body)) % 11
+    return body + ('X' if (11 - check) % 11 == 10 else str((11 - check) % 11))
+
+
+def title(n):
+    return f'{SAMPLE_WORDS[n % 10].title()} {SAMPLE_WORDS[n // 10 % 10]} {n}'
+
+
+def write_sample_dump(path, editions=SAMPLE_EDITIONS):
+    """Official-format (TSV) dump with authors, works and one edition per work"""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for n in range(editions // 10):
+            record = {'key': f'/authors/OL{n}A', 'name': f'Author {n}'}
+            f.write(f"/type/author\t{record['key']}\t1\t2024-01-01T00:00:00\t{json.dumps(record)}\n")
+        for n in range(editions):
+            work = {'key': f'/works/OL{n}W', 'title': title(n), 'subjects': ['Fiction', SAMPLE_WORDS[n % 10]],
+                    'authors': [{'author': {'key': f'/authors/OL{n // 10}A'}}]}
+            f.write(f"/type/work\t{work['key']}\t1\t2024-01-01T00:00:00\t{json.dumps(work)}\n")
+            edition = {'key': f'/books/OL{n}M', 'title': title(n), 'works': [{'key': work['key']}],
+                       'isbn_10': [isbn10(n)], 'publish_date': '2001', 'number_of_pages': 300, 'covers': [n + 1]}
+            f.write(f"/type/edition\t{edition['key']}\t1\t2024-01-01T00:00:00\t{json.dumps(edition)}\n")
+
+
+@pytest.fixture(scope='module')
+def sample_dump(tmp_path_factory):
+    path = tmp_path_factory.mktemp('openlibrary') / 'ol_dump_sample.txt.gz'
+    write_sample_dump(str(path))
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def metadata_index(sample_dump, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('openlibrary') / 'index.db')
+    MetadataIndex.ingest(path, [sample_dump], progress=lambda message: None)
+    return MetadataIndex(path)
+
+
+def test_ingest_sample_dump(benchmark, sample_dump, tmp_path):
+    paths = iter(str(tmp_path / f'index_{i}.db') for i in range(100))
+    counts = benchmark.pedantic(
+        lambda: MetadataIndex.ingest(next(paths), [sample_dump], progress=lambda message: None),
+        rounds=3
+    )
+    assert counts['editions'] == SAMPLE_EDITIONS and counts['isbns'] == SAMPLE_EDITIONS * 2
+
+
+def test_index_find_by_isbn(benchmark, metadata_index):
+    book = benchmark(metadata_index.find_by_isbn, isbn10_to_isbn13(isbn10(12345)))
+    assert book['title'] == title(12345) and book['author'] == 'Author 1234'
+
+
+def test_index_search_exact_title(benchmark, metadata_index):
+    results = benchmark(metadata_index.search, title(777), 'Author 77')
+    assert results[0]['title'] == title(777)
+
+
+def test_index_search_fulltext(benchmark, metadata_index):
+    results = benchmark(metadata_index.search, 'dune river', None, 10)
+    assert len(results) == 10 and all({'dune', 'river'} <= set(result['title'].lower().split()) for result in results)
+
+
+def test_search_books_index_hit(benchmark, metadata_service, metadata_index, monkeypatch):
+    monkeypatch.setattr(metadata_service, 'index', metadata_index)
+    monkeypatch.setattr(metadata_service, '_search', lambda query, limit: pytest.fail('index miss went to Open Library'))
+    assert benchmark(metadata_service.search_books, title(4321))[0]['isbn'] == isbn10(4321)
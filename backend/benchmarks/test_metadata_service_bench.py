@@ -0,0 +1,55 @@
+"""Benchmarks for MetadataService cache hits (Open Library itself is never called)"""
+
+import pytest
+
+SEARCH_RESULTS = [
+    {'title': f'Dune {i}', 'author': 'Frank Herbert', 'isbn': None, 'isbn13': None, 'pub_date': '1965',
+     'num_pages': 412, 'genre': '', 'cover_image_url': None, 'ol_key': f'/works/OL{i}W'}
+    for i in range(10)
+]
+EDITION = {'title': 'Dune', 'works': [{'key': '/works/OL1W'}], 'isbn_13': ['9780441013593'], 'number_of_pages': 412}
+WORK = {'subjects': ['Science fiction', 'Deserts', 'Ecology']}
+
+
+@pytest.fixture
+def warm_metadata_service(metadata_service, monkeypatch):
+    """MetadataService whose cache already holds one search, edition and work"""
+    def fetch_json(path, params=None):
+        return EDITION if path.startswith('/isbn/') else WORK
+
+    monkeypatch.setattr(metadata_service, '_search', lambda query, limit: SEARCH_RESULTS)
+    monkeypatch.setattr(metadata_service, '_fetch_json', fetch_json)
+    metadata_service.search_books('Dune', 'Frank Herbert')
+    metadata_service.get_book_by_isbn('9780441013593')
+
+    def offline(*args, **kwargs):
+        raise AssertionError('cache miss went to Open Library')
+
+    monkeypatch.setattr(metadata_service, '_search', offline)
+    monkeypatch.setattr(metadata_service, '_fetch_json', offline)
+    return metadata_service
+
+
+def test_search_books_memory_hit(benchmark, warm_metadata_service):
+    assert len(benchmark(warm_metadata_service.search_books, 'dune', 'frank herbert')) == 10
+
+
+def test_search_books_disk_hit(benchmark, warm_metadata_service):
+    results = benchmark.pedantic(
+        warm_metadata_service.search_books,
+        args=('Dune', 'Frank Herbert'),
+        setup=warm_metadata_service.cache._memory.clear,
+        rounds=200
+    )
+    assert len(results) == 10
+
+
+def test_get_book_by_isbn_memory_hit(benchmark, warm_metadata_service):
+    book = benchmark(warm_metadata_service.get_book_by_isbn, '978-0441013593')
+    assert book['genre'] == 'Science fiction, Deserts, Ecology'
+
+
+def test_search_batch_cached(benchmark, warm_metadata_service):
+    items = [{'title': 'Dune', 'author': 'Frank Herbert'}, {'isbn': '9780441013593'}] * 50
+    results = benchmark(lambda: list(warm_metadata_service.search_batch(items, limit=10)))
+    assert len(results) == 100 and all(result['matches'] for result in results)
@@ -0,0 +1,52 @@
+"""Benchmarks for every public RankingService method"""
+
+
+def test_start_ranking_wizard(benchmark, ranking_service, dataset, heavy_rounds):
+    wizard = benchmark.pedantic(
+        ranking_service.start_ranking_wizard,
+        args=(dataset.unranked_book_id, dataset.ranked_stars, dataset.user_id),
+        rounds=heavy_rounds
+    )
+    assert wizard['comparisons']
+
+
+def test_record_comparison(benchmark, ranking_service, dataset):
+    benchmark(ranking_service.record_comparison, dataset.unranked_book_id, dataset.ranked_book_id, dataset.ranked_book_id)
+
+
+def test_get_comparison_history(benchmark, ranking_service, dataset):
+    benchmark(ranking_service.get_comparison_history, dataset.ranked_book_id)
+
+
+def test_finalize_ranking(benchmark, ranking_service, book_service, dataset, heavy_rounds):
+    def setup():
+        book = book_service.create_book({'title': 'Finalize Bench'}, 'want_to_read', dataset.user_id)
+        return (book['id'], 1, dataset.ranked_stars, [], dataset.user_id), {}
+
+    benchmark.pedantic(ranking_service.finalize_ranking, setup=setup, rounds=heavy_rounds, iterations=1)
+
+
+def test_rerank_all_books_by_stars(benchmark, ranking_service, dataset, heavy_rounds):
+    count = benchmark.pedantic(ranking_service.rerank_all_books_by_stars, args=(dataset.user_id,), rounds=heavy_rounds)
+    assert count > 0
+
+
+def test_get_ranked_books(benchmark, ranking_service, dataset, heavy_rounds):
+    books = benchmark.pedantic(ranking_service.get_ranked_books, args=(dataset.user_id,), rounds=heavy_rounds)
+    assert books
+
+
+def test_get_book_rank(benchmark, ranking_service, dataset):
+    assert benchmark(ranking_service.get_book_rank, dataset.ranked_book_id, dataset.user_id)
+
+
+def test_update_rank_position(benchmark, ranking_service, dataset):
+    def move():
+        ranking_service.update_rank_position(dataset.ranked_book_id, 1, dataset.user_id)
+        ranking_service.update_rank_position(dataset.ranked_book_id, dataset.scale // 4, dataset.user_id)
+
+    benchmark(move)
+
+
+def test_get_derived_rating(benchmark, ranking_service, dataset):
+    assert benchmark(ranking_service.get_derived_rating, dataset.ranked_book_id, dataset.user_id)
@@ -0,0 +1,62 @@
+"""Benchmarks for shelf layout (geometry only - nothing is drawn)"""
+
+import pytest
+
+from services.shelf_layout import layout_shelf, parse_background
+
+SAMPLE_BOOKS = 500
+
+# The example background image's geometry, as stored in shelf_bgs
+IMAGE_BACKGROUND = {'width_inches': 35.5, 'width_pixels': 1688, 'shelf_bottoms': [676, 1328, 2008, 2708, 3542], 'shelf_left': 75}
+
+
+def sample_books(count=SAMPLE_BOOKS):
+    # Every third book has no dimensions and gets a made-up size
+    return [
+        {'id': n, 'title': f'Book {n}', 'author': f'Author {n % 50}',
+         'dimensions': f'{5 + n % 3} x {0.5 + n % 7 / 4} x {8 + n % 2}' if n % 3 else None}
+        for n in range(count)
+    ]
+
+
+def test_layout_renderer_background(benchmark):
+    books = sample_books()
+    placements = benchmark(layout_shelf, books)
+    assert [placement['index'] for placement in placements] == list(range(len(books)))
+    assert all(placement['shelf_index'] == 0 for placement in placements)  # The site's shelf grows rows instead
+    assert placements[-1]['row'] > 0
+
+
+def test_layout_image_background(benchmark):
+    books = sample_books()
+    placements = benchmark(layout_shelf, books, IMAGE_BACKGROUND)
+    assert placements[-1]['shelf_index'] > 0
+    assert all(placement['row'] < 5 and placement['x'] + placement['w'] <= 1688 for placement in placements)
+
+
+def test_relayout_is_stable(benchmark):
+    # A sort change re-lays out the same books: made-up sizes must not change between calls
+    books = sample_books()
+    first = {placement['book_id']: placement['w'] for placement in layout_shelf(books)}
+    placements = benchmark(layout_shelf, list(reversed(books)))
+    assert {placement['book_id']: placement['w'] for placement in placements} == first
+
+
+@pytest.mark.parametrize('background, books', [
+    ({**IMAGE_BACKGROUND, 'width_inches': 0}, []),
+    ({**IMAGE_BACKGROUND, 'width_pixels': -1688}, []),
+    ({'inch_pixel_ratio': 'nan', 'shelf_left': 0, 'shelf_right': 100, 'shelf_bottoms': [50]}, []),
+    ({**IMAGE_BACKGROUND, 'shelf_left': 1e309}, []),
+    (None, [{'w': 1e309, 'h': 400}]),
+])
+def test_bad_input_is_a_value_error(benchmark, background, books):
+    # ValueError is the endpoint's 400; anything else would be a 500
+    def layout():
+        with pytest.raises(ValueError):
+            layout_shelf(books, background)
+
+    benchmark(layout)
+
+
+def test_parse_image_background(benchmark):
+    assert benchmark(parse_background, IMAGE_BACKGROUND).inchPixelRatio == 1688 / 35.5
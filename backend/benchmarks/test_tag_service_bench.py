@@ -0,0 +1,68 @@
+"""Benchmarks for every public TagService method"""
+
+import itertools
+
+_names = itertools.count()
+
+
+def test_create_tag(benchmark, tag_service):
+    benchmark(lambda: tag_service.create_tag(f'bench-tag-{next(_names)}', '#123456'))
+
+
+def test_get_tag(benchmark, tag_service, dataset):
+    assert benchmark(tag_service.get_tag, dataset.tag['id'])
+
+
+def test_get_tag_by_name(benchmark, tag_service, dataset):
+    assert benchmark(tag_service.get_tag_by_name, dataset.tag['name'])
+
+
+def test_get_all_tags(benchmark, tag_service, dataset):
+    assert benchmark(tag_service.get_all_tags, dataset.user_id)
+
+
+def test_get_all_tags_global(benchmark, tag_service):
+    assert benchmark(tag_service.get_all_tags)
+
+
+def test_update_tag(benchmark, tag_service, dataset):
+    benchmark(tag_service.update_tag, dataset.tag['id'], None, '#abcdef')
+
+
+def test_delete_tag(benchmark, tag_service):
+    def setup():
+        return (tag_service.create_tag(f'bench-delete-{next(_names)}')['id'],), {}
+
+    benchmark.pedantic(tag_service.delete_tag, setup=setup, rounds=20, iterations=1)
+
+
+def test_merge_tags(benchmark, tag_service, book_service, dataset):
+    target = tag_service.create_tag(f'bench-merge-target-{next(_names)}')
+
+    def setup():
+        # A fresh book per round - merging into a tag the book already has hits the PK
+        book = book_service.create_book({'title': 'Merge Bench'}, 'want_to_read', dataset.user_id)
+        source = tag_service.create_tag(f'bench-merge-source-{next(_names)}')
+        tag_service.add_tag_to_book(book['id'], source['id'])
+        return (source['id'], target['id']), {}
+
+    benchmark.pedantic(tag_service.merge_tags, setup=setup, rounds=20, iterations=1)
+
+
+def test_add_and_remove_tag(benchmark, tag_service, dataset):
+    tag = tag_service.create_tag(f'bench-toggle-{next(_names)}')
+
+    def toggle():
+        tag_service.add_tag_to_book(dataset.ranked_book_id, tag['id'])
+        tag_service.remove_tag_from_book(dataset.ranked_book_id, tag['id'])
+
+    benchmark(toggle)
+
+
+def test_get_book_tags(benchmark, tag_service, dataset):
+    benchmark(tag_service.get_book_tags, dataset.ranked_book_id)
+
+
+def test_get_tag_stats(benchmark, tag_service, dataset, heavy_rounds):
+    stats = benchmark.pedantic(tag_service.get_tag_stats, args=(dataset.user_id,), rounds=heavy_rounds)
+    assert stats
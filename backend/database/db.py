@@ -1,8 +1,12 @@
 import os
 import re
+import threading
+import time
 from contextlib import contextmanager
 from urllib.parse import urlparse
 
+from database.query_stats import record_query
+
 # Try to import both database drivers
 try:
     from psycopg import connect
@@ -22,6 +26,8 @@ class Database:
     def __init__(self, db_path='data/bookshelf.db'):
         self.db_path = db_path
         self.database_url = os.getenv('DATABASE_URL')
+        # The open transaction() connection, per thread
+        self._local = threading.local()
         
         # Determine which database to use
         if self.database_url:
@@ -54,12 +60,32 @@ class Database:
                 schema = f.read()
             
             conn = sqlite3.connect(self.db_path)
+            self._migrate_sqlite(conn)
             conn.executescript(schema)
             conn.commit()
             conn.close()
         else:
             print(f"Warning: Schema file not found at {schema_path}")
     
+    def _migrate_sqlite(self, conn):
+        """Add columns that CREATE TABLE IF NOT EXISTS cannot add to existing databases"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(books)")}
+        if not columns:
+            return  # Fresh database - schema.sql creates everything
+        
+        if 'finished_on' not in columns:
+            conn.execute("""
+                ALTER TABLE books ADD COLUMN finished_on DATE
+                GENERATED ALWAYS AS (DATE(SUBSTR(date_finished, 1, 10))) VIRTUAL
+            """)
+        if 'finished_year' not in columns:
+            conn.execute("""
+                ALTER TABLE books ADD COLUMN finished_year INTEGER
+                GENERATED ALWAYS AS (CAST(strftime('%Y', finished_on) AS INTEGER)) VIRTUAL
+            """)
+        if 'cover_hash' not in columns:
+            conn.execute("ALTER TABLE books ADD COLUMN cover_hash TEXT")
+    
     def _validate_postgres_schema(self):
         """Validate that PostgreSQL schema exists - fail fast if missing"""
         if self.db_type != 'postgres':
@@ -210,7 +236,16 @@ class Database:
     
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
+        """Context manager for database connections.
+        
+        Inside transaction() this is the transaction's connection, committed
+        when the transaction ends rather than here.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        
         if self.db_type == 'postgres':
             conn = connect(self.database_url)
         else:
@@ -226,30 +261,52 @@ class Database:
         finally:
             conn.close()
     
+    @contextmanager
+    def transaction(self):
+        """Run every query on this thread inside the block on one connection, committed together.
+        
+        Nested blocks join the outer transaction. Anything raised rolls all of it back.
+        """
+        if getattr(self._local, 'conn', None) is not None:
+            yield
+            return
+        
+        with self.get_connection() as conn:
+            self._local.conn = conn
+            try:
+                yield
+            finally:
+                self._local.conn = None
+    
     def execute_query(self, query, params=None):
         """Execute a SELECT query and return results"""
         converted_query, converted_params = self._convert_query(query, params)
         
-        with self.get_connection() as conn:
-            if self.db_type == 'postgres':
-                # Use dict_row factory for PostgreSQL
-                cursor = conn.cursor(row_factory=dict_row)
-            else:
-                cursor = conn.cursor()
-            
-            if converted_params:
-                cursor.execute(converted_query, converted_params)
-            else:
-                cursor.execute(converted_query)
-            rows = cursor.fetchall()
-            
-            # Convert rows to list of dicts
-            if self.db_type == 'postgres':
-                # dict_row already returns dict-like objects
-                return list(rows)
-            else:
-                # sqlite3.Row needs conversion
-                return [dict(row) for row in rows]
+        started = time.perf_counter()
+        try:
+            with self.get_connection() as conn:
+                if self.db_type == 'postgres':
+                    # Use dict_row factory for PostgreSQL
+                    cursor = conn.cursor(row_factory=dict_row)
+                else:
+                    cursor = conn.cursor()
+                
+                if converted_params:
+                    cursor.execute(converted_query, converted_params)
+                else:
+                    cursor.execute(converted_query)
+                rows = cursor.fetchall()
+                
+                # Convert rows to list of dicts
+                if self.db_type == 'postgres':
+                    # dict_row already returns dict-like objects
+                    return list(rows)
+                else:
+                    # sqlite3.Row needs conversion
+                    return [dict(row) for row in rows]
+        finally:
+            # Includes connection setup - that is real time spent on the database per query
+            record_query(converted_query, converted_params, (time.perf_counter() - started) * 1000)
     
     def execute_update(self, query, params=None):
         """Execute an INSERT/UPDATE/DELETE query and return lastrowid"""
@@ -274,28 +331,32 @@ class Database:
                         # Add RETURNING id clause
                         converted_query = converted_query.rstrip().rstrip(';') + ' RETURNING id'
         
-        with self.get_connection() as conn:
-            if self.db_type == 'postgres':
-                # Use dict_row factory for PostgreSQL
-                cursor = conn.cursor(row_factory=dict_row)
-            else:
-                cursor = conn.cursor()
-            
-            if converted_params:
-                cursor.execute(converted_query, converted_params)
-            else:
-                cursor.execute(converted_query)
-            
-            # Handle returning lastrowid
-            if self.db_type == 'postgres':
-                if 'RETURNING' in converted_query.upper():
-                    result = cursor.fetchone()
-                    return result['id'] if result else None
+        started = time.perf_counter()
+        try:
+            with self.get_connection() as conn:
+                if self.db_type == 'postgres':
+                    # Use dict_row factory for PostgreSQL
+                    cursor = conn.cursor(row_factory=dict_row)
                 else:
-                    # For UPDATE/DELETE, return None (consistent with SQLite)
-                    return None
-            else:
-                return cursor.lastrowid
+                    cursor = conn.cursor()
+                
+                if converted_params:
+                    cursor.execute(converted_query, converted_params)
+                else:
+                    cursor.execute(converted_query)
+                
+                # Handle returning lastrowid
+                if self.db_type == 'postgres':
+                    if 'RETURNING' in converted_query.upper():
+                        result = cursor.fetchone()
+                        return result['id'] if result else None
+                    else:
+                        # For UPDATE/DELETE, return None (consistent with SQLite)
+                        return None
+                else:
+                    return cursor.lastrowid
+        finally:
+            record_query(converted_query, converted_params, (time.perf_counter() - started) * 1000)
 
 
 # Singleton instance
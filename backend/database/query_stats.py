@@ -0,0 +1,143 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+
+# Queries slower than this are logged with their translated SQL
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+
+# The same statement run this many times in one request with different params
+# is reported as a likely N+1 pattern
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))
+
+# How many finished requests / slow queries to keep for the debug endpoint
+RECENT_REQUESTS_LIMIT = 50
+SLOW_QUERIES_LIMIT = 100
+
+
+def normalize_sql(query):
+    """Collapse whitespace so the same statement always groups together"""
+    return re.sub(r'\s+', ' ', query).strip()
+
+
+class RequestQueryStats:
+    """Queries executed while handling a single request"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started_at = time.time()
+        self.query_count = 0
+        self.total_ms = 0.0
+        self.slow_queries = []
+        # normalized sql -> {'count', 'total_ms', 'params'}
+        self.statements = {}
+
+    def record(self, query, params, elapsed_ms):
+        """Record one executed statement"""
+        self.query_count += 1
+        self.total_ms += elapsed_ms
+
+        sql = normalize_sql(query)
+        entry = self.statements.get(sql)
+        if entry is None:
+            entry = {'count': 0, 'total_ms': 0.0, 'params': set()}
+            self.statements[sql] = entry
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['params'].add(repr(params))
+
+        if elapsed_ms >= SLOW_QUERY_MS:
+            self.slow_queries.append({'sql': sql, 'duration_ms': round(elapsed_ms, 2)})
+
+    def likely_n_plus_one(self):
+        """Statements repeated with differing params - usually a loop issuing one query per item"""
+        flagged = []
+        for sql, entry in self.statements.items():
+            if entry['count'] >= N_PLUS_ONE_THRESHOLD and len(entry['params']) > 1:
+                flagged.append({
+                    'sql': sql,
+                    'count': entry['count'],
+                    'distinct_params': len(entry['params']),
+                    'total_ms': round(entry['total_ms'], 2)
+                })
+        flagged.sort(key=lambda f: f['count'], reverse=True)
+        return flagged
+
+    def server_timing(self):
+        """Value for the Server-Timing response header"""
+        return f'db;dur={self.total_ms:.2f};desc="{self.query_count} queries"'
+
+    def to_dict(self):
+        return {
+            'request': self.label,
+            'started_at': self.started_at,
+            'query_count': self.query_count,
+            'db_ms': round(self.total_ms, 2),
+            'slow_queries': self.slow_queries,
+            'likely_n_plus_one': self.likely_n_plus_one()
+        }
+
+
+_local = threading.local()
+_lock = threading.Lock()
+_recent_requests = deque(maxlen=RECENT_REQUESTS_LIMIT)
+_slow_queries = deque(maxlen=SLOW_QUERIES_LIMIT)
+
+
+def start_request(label):
+    """Begin collecting query stats for the current thread's request"""
+    _local.stats = RequestQueryStats(label)
+    return _local.stats
+
+
+def current_request():
+    """Stats collector for the current request, or None outside a request"""
+    return getattr(_local, 'stats', None)
+
+
+def finish_request():
+    """Stop collecting and keep the request's summary for the debug endpoint"""
+    stats = current_request()
+    _local.stats = None
+    if stats is None:
+        return None
+
+    summary = stats.to_dict()
+    with _lock:
+        _recent_requests.append(summary)
+
+    for flagged in summary['likely_n_plus_one']:
+        print(f"[DB] Likely N+1 in {stats.label}: {flagged['count']}x {flagged['sql'][:200]}")
+
+    return stats
+
+
+def record_query(query, params, elapsed_ms):
+    """Called by Database after every statement"""
+    stats = current_request()
+    if stats is not None:
+        stats.record(query, params, elapsed_ms)
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        sql = normalize_sql(query)
+        label = stats.label if stats is not None else None
+        print(f"[DB] Slow query ({elapsed_ms:.1f}ms){' in ' + label if label else ''}: {sql}")
+        with _lock:
+            _slow_queries.append({
+                'request': label,
+                'sql': sql,
+                'duration_ms': round(elapsed_ms, 2),
+                'at': time.time()
+            })
+
+
+def get_recent_stats():
+    """Snapshot of recent request summaries and slow queries (newest first)"""
+    with _lock:
+        return {
+            'slow_query_ms': SLOW_QUERY_MS,
+            'n_plus_one_threshold': N_PLUS_ONE_THRESHOLD,
+            'requests': list(reversed(_recent_requests)),
+            'slow_queries': list(reversed(_slow_queries))
+        }
@@ -20,6 +20,7 @@ CREATE TABLE IF NOT EXISTS books (
     num_pages INTEGER,
     genre TEXT,
     cover_image_url TEXT,
+    cover_hash TEXT,  -- SHA-256 of the cover in the local cover store
     dimensions TEXT,
     dom_color TEXT,
     series TEXT,
@@ -32,6 +33,9 @@ CREATE TABLE IF NOT EXISTS books (
     date_finished TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Normalized from date_finished (ISO timestamps or plain dates) so goals can use an index
+    finished_on DATE GENERATED ALWAYS AS (DATE(SUBSTR(date_finished, 1, 10))) VIRTUAL,
+    finished_year INTEGER GENERATED ALWAYS AS (CAST(strftime('%Y', finished_on) AS INTEGER)) VIRTUAL,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
@@ -112,6 +116,28 @@ CREATE TABLE IF NOT EXISTS reading_goals (
     UNIQUE(user_id, year)
 );
 
+-- Books on the 'read' shelf per user and finished_year, kept up to date by BookService
+CREATE TABLE IF NOT EXISTS user_finished_counts (
+    user_id INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    finished_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, year),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Per-user library counters, kept up to date by BookService and RankingService
+-- so list totals and summaries never need a GROUP BY over the whole library
+CREATE TABLE IF NOT EXISTS user_library_stats (
+    user_id INTEGER PRIMARY KEY,
+    total_books INTEGER NOT NULL DEFAULT 0,
+    want_to_read_count INTEGER NOT NULL DEFAULT 0,
+    currently_reading_count INTEGER NOT NULL DEFAULT 0,
+    read_count INTEGER NOT NULL DEFAULT 0,
+    rated_count INTEGER NOT NULL DEFAULT 0,
+    stars_sum REAL NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
 -- Import history (for Goodreads imports)
 CREATE TABLE IF NOT EXISTS import_history (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -136,4 +162,35 @@ CREATE INDEX IF NOT EXISTS idx_book_tags_book_id ON book_tags(book_id);
 CREATE INDEX IF NOT EXISTS idx_book_tags_tag_id ON book_tags(tag_id);
 CREATE INDEX IF NOT EXISTS idx_comparisons_book_a ON comparisons(book_a_id);
 CREATE INDEX IF NOT EXISTS idx_comparisons_book_b ON comparisons(book_b_id);
+CREATE INDEX IF NOT EXISTS idx_thought_continuations_to ON thought_continuations(to_book_id);
+CREATE INDEX IF NOT EXISTS idx_books_user_finished ON books(user_id, finished_year, finished_on);
+
+-- Rebuild finished counts on startup so rows written outside BookService
+-- (imports, migrations, manual edits) are reconciled
+DELETE FROM user_finished_counts;
+INSERT INTO user_finished_counts (user_id, year, finished_count)
+SELECT b.user_id, b.finished_year, COUNT(*)
+FROM books b
+JOIN reading_states rs ON b.id = rs.book_id
+WHERE rs.state = 'read' AND b.finished_year IS NOT NULL
+GROUP BY b.user_id, b.finished_year;
 
+-- Seed counters for libraries that have none yet (new deployments, users
+-- created outside the app); existing rows are left alone so that
+-- scripts/reconcile_library_stats.py can report any drift
+INSERT OR IGNORE INTO user_library_stats (
+    user_id, total_books, want_to_read_count, currently_reading_count,
+    read_count, rated_count, stars_sum
+)
+SELECT b.user_id,
+       COUNT(*),
+       COUNT(CASE WHEN rs.state = 'want_to_read' THEN 1 END),
+       COUNT(CASE WHEN rs.state = 'currently_reading' THEN 1 END),
+       COUNT(CASE WHEN rs.state = 'read' THEN 1 END),
+       COUNT(r.initial_stars),
+       COALESCE(SUM(r.initial_stars), 0)
+FROM books b
+LEFT JOIN reading_states rs ON b.id = rs.book_id
+LEFT JOIN rankings r ON b.id = r.book_id
+WHERE b.user_id IS NOT NULL
+GROUP BY b.user_id;
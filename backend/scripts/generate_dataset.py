@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for benchmarks and load tests.
+
+Fills the configured database (SQLite by default, PostgreSQL if DATABASE_URL
+is set) with N users, each owning M books plus reading states, rankings,
+comparisons, tags, thought continuations and reading goals.
+
+Titles, authors, ISBNs, page counts, shelf and star distributions are sampled
+from books.json and the Goodreads CSV export, so the data looks like a real
+library. Output is fully determined by --seed.
+
+Usage:
+    python backend/scripts/generate_dataset.py --users 5 --books-per-user 10000
+    python backend/scripts/generate_dataset.py --db-path /tmp/bench.db --books-per-user 1000
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+BOOKS_JSON_PATH = REPO_ROOT / 'books.json'
+GOODREADS_CSV_DIR = REPO_ROOT / 'goodreads-csv'
+
+# Every synthetic user logs in with this password (used by the load tests)
+SYNTHETIC_PASSWORD = 'benchmark-password'
+
+TAG_NAMES = [
+    'fiction', 'non-fiction', 'classics', 'philosophy', 'history', 'science-fiction',
+    'fantasy', 'biography', 'memoir', 'economics', 'politics', 'psychology', 'poetry',
+    'essays', 'war', 'mythology', 'religion', 'science', 'mathematics', 'technology',
+    'business', 'self-help', 'horror', 'mystery', 'thriller', 'romance', 'drama',
+    'short-stories', 'travel', 'art', 'music', 'film', 'nature', 'climate', 'russian',
+    'french', 'german', 'japanese', 'latin-american', 'ancient', 'medieval', 'modernist',
+    'postmodern', 'satire', 'dystopia', 'graphic-novel', 'manga', 'young-adult',
+    'favorites', 'reread'
+]
+
+TAG_COLORS = ['#e57373', '#64b5f6', '#81c784', '#ffb74d', '#ba68c8', '#4db6ac', '#a1887f', '#90a4ae']
+
+# Fallbacks when the seed files are missing
+DEFAULT_STATE_WEIGHTS = {'read': 0.6, 'want_to_read': 0.35, 'currently_reading': 0.05}
+DEFAULT_STAR_WEIGHTS = {5: 0.25, 4: 0.4, 3: 0.25, 2: 0.07, 1: 0.03}
+
+
+def _clean_isbn(value):
+    """Goodreads exports ISBNs as ="0765312182" """
+    value = (value or '').strip().lstrip('=').strip('"')
+    return value or None
+
+
+def load_seed_pool():
+    """
+    Load real titles and distributions from books.json and the Goodreads CSVs.
+    Returns (templates, state_weights, star_weights).
+    """
+    templates = []
+    state_counts = {}
+    star_counts = {}
+
+    for csv_path in sorted(GOODREADS_CSV_DIR.glob('*.csv')) if GOODREADS_CSV_DIR.exists() else []:
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                title = (row.get('Title') or '').strip()
+                if not title:
+                    continue
+                pages = row.get('Number of Pages') or ''
+                year = row.get('Original Publication Year') or row.get('Year Published') or ''
+                templates.append({
+                    'title': title,
+                    'author': (row.get('Author') or '').strip() or None,
+                    'isbn': _clean_isbn(row.get('ISBN')),
+                    'isbn13': _clean_isbn(row.get('ISBN13')),
+                    'num_pages': int(pages) if pages.isdigit() else None,
+                    'pub_date': year if year.isdigit() else None,
+                })
+
+                shelf = row.get('Exclusive Shelf')
+                state = {'to-read': 'want_to_read', 'currently-reading': 'currently_reading', 'read': 'read'}.get(shelf)
+                if state:
+                    state_counts[state] = state_counts.get(state, 0) + 1
+
+                rating = row.get('My Rating') or '0'
+                if rating.isdigit() and int(rating) > 0:
+                    star_counts[int(rating)] = star_counts.get(int(rating), 0) + 1
+
+    if BOOKS_JSON_PATH.exists():
+        with open(BOOKS_JSON_PATH, encoding='utf-8') as f:
+            for book in json.load(f).get('books', []):
+                if book.get('title'):
+                    templates.append({
+                        'title': book['title'],
+                        'author': book.get('author'),
+                        'isbn': None,
+                        'isbn13': None,
+                        'num_pages': None,
+                        'pub_date': None,
+                    })
+
+    if not templates:
+        templates = [{'title': f'Book {i}', 'author': f'Author {i % 97}', 'isbn': None,
+                      'isbn13': None, 'num_pages': None, 'pub_date': None} for i in range(200)]
+
+    state_weights = state_counts or DEFAULT_STATE_WEIGHTS
+    if 'currently_reading' not in state_weights:
+        # Exports are snapshots; keep a small currently-reading shelf so that path gets exercised
+        state_weights['currently_reading'] = max(1, sum(state_weights.values()) // 50)
+    star_weights = star_counts or DEFAULT_STAR_WEIGHTS
+    return templates, state_weights, star_weights
+
+
+def _weighted_choice(rng, weights):
+    keys = list(weights.keys())
+    return rng.choices(keys, weights=[weights[k] for k in keys])[0]
+
+
+def _executemany(db, conn, query, rows):
+    """executemany with the same dialect translation the services get"""
+    if not rows:
+        return
+    converted_query, _ = db._convert_query(query, None)
+    cursor = conn.cursor()
+    cursor.executemany(converted_query, rows)
+
+
+def _ensure_tags(db, conn, rng):
+    rows = [(name, rng.choice(TAG_COLORS)) for name in TAG_NAMES]
+    _executemany(db, conn, "INSERT OR IGNORE INTO tags (name, color) VALUES (?, ?)", rows)
+    converted_query, _ = db._convert_query("SELECT id FROM tags ORDER BY id", None)
+    cursor = conn.cursor()
+    cursor.execute(converted_query)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _generate_user(db, conn, rng, user_index, books_per_user, templates, state_weights,
+                   star_weights, tag_ids, years, prefix, password_hash):
+    """Insert one user's complete library. Returns a dict of row counts."""
+    cursor = conn.cursor()
+    username = f"{prefix}{user_index}"
+    insert_user, _ = db._convert_query(
+        "INSERT INTO users (email, password_hash, username, is_public) VALUES (?, ?, ?, ?)", None
+    )
+    cursor.execute(insert_user, (f"{username}@example.com", password_hash, username, True))
+    select_user, _ = db._convert_query("SELECT id FROM users WHERE username = ?", None)
+    cursor.execute(select_user, (username,))
+    user_id = cursor.fetchone()[0]
+
+    # Books: popular titles repeat across users; repeats within a library get an edition suffix
+    seen_titles = {}
+    book_rows = []
+    book_meta = []
+    today = date.today()
+    first_year = today.year - years + 1
+    for _ in range(books_per_user):
+        template = templates[min(int(rng.paretovariate(1.2)) - 1, len(templates) - 1)] \
+            if rng.random() < 0.3 else rng.choice(templates)
+        title = template['title']
+        seen_titles[title] = seen_titles.get(title, 0) + 1
+        if seen_titles[title] > 1:
+            title = f"{title} (Edition {seen_titles[title]})"
+
+        state = _weighted_choice(rng, state_weights)
+        date_finished = None
+        if state == 'read' and rng.random() < 0.9:
+            # Recent years are read more heavily than older ones
+            year = first_year + min(int(rng.triangular(0, years, years)), years - 1)
+            day = date(year, 1, 1) + timedelta(days=rng.randrange(365))
+            date_finished = min(day, today).isoformat()
+
+        num_pages = template['num_pages'] or max(40, int(rng.lognormvariate(5.6, 0.45)))
+        book_rows.append((
+            user_id, title, template['author'], template['isbn'], template['isbn13'],
+            template['pub_date'], num_pages, None, None,
+            f"{rng.uniform(5, 7):.1f}x{rng.uniform(0.5, 2.5):.1f}x{rng.uniform(8, 9.5):.1f}",
+            f"#{rng.randrange(0x1000000):06x}", rng.random() < 0.7, date_finished
+        ))
+        book_meta.append((title, state))
+
+    _executemany(db, conn, """
+        INSERT INTO books (
+            user_id, title, author, isbn, isbn13, pub_date, num_pages, genre,
+            cover_image_url, dimensions, dom_color, is_public, date_finished
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, book_rows)
+
+    select_books, _ = db._convert_query("SELECT id FROM books WHERE user_id = ? ORDER BY id", None)
+    cursor.execute(select_books, (user_id,))
+    book_ids = [row[0] for row in cursor.fetchall()]
+
+    # Reading states
+    _executemany(db, conn, "INSERT INTO reading_states (book_id, state) VALUES (?, ?)",
+                 [(book_id, meta[1]) for book_id, meta in zip(book_ids, book_meta)])
+
+    # Rankings: every read book, ordered by stars then title like rerank_all_books_by_stars
+    read_books = []
+    for book_id, (title, state) in zip(book_ids, book_meta):
+        if state == 'read':
+            read_books.append((book_id, title, _weighted_choice(rng, star_weights)))
+    read_books.sort(key=lambda b: (-b[2], b[1]))
+    _executemany(db, conn, "INSERT INTO rankings (book_id, rank_position, initial_stars) VALUES (?, ?, ?)",
+                 [(book_id, position, stars) for position, (book_id, _, stars) in enumerate(read_books, start=1)])
+
+    # Comparisons: roughly the binary-search path the ranking wizard would have asked
+    comparison_rows = []
+    if len(read_books) > 1:
+        for book_id, _, _ in read_books:
+            for _ in range(rng.randint(0, 4)):
+                other = rng.choice(read_books)[0]
+                if other != book_id:
+                    comparison_rows.append((book_id, other, rng.choice((book_id, other))))
+    _executemany(db, conn, "INSERT INTO comparisons (book_a_id, book_b_id, winner_id) VALUES (?, ?, ?)",
+                 comparison_rows)
+
+    # Tags: 0-4 per book, skewed towards a few popular tags
+    tag_rows = []
+    for book_id in book_ids:
+        chosen = set()
+        for _ in range(rng.choices((0, 1, 2, 3, 4), weights=(20, 35, 25, 15, 5))[0]):
+            chosen.add(tag_ids[min(int(rng.expovariate(0.15)), len(tag_ids) - 1)])
+        tag_rows.extend((book_id, tag_id) for tag_id in chosen)
+    _executemany(db, conn, "INSERT INTO book_tags (book_id, tag_id) VALUES (?, ?) ON CONFLICT (book_id, tag_id) DO NOTHING",
+                 tag_rows)
+
+    # Continuations: a handful of reading chains of varying length plus some branching links
+    continuation_rows = set()
+    if len(book_ids) > 1:
+        chained = rng.sample(book_ids, max(2, len(book_ids) // 20))
+        position = 0
+        while position < len(chained) - 1:
+            length = min(rng.randint(2, 40), len(chained) - position)
+            chain = chained[position:position + length]
+            continuation_rows.update(zip(chain, chain[1:]))
+            position += length
+        for _ in range(len(chained) // 10):
+            a, b = rng.sample(chained, 2)
+            continuation_rows.add((a, b))
+    _executemany(db, conn, "INSERT OR IGNORE INTO thought_continuations (from_book_id, to_book_id) VALUES (?, ?)",
+                 sorted(continuation_rows))
+
+    # Goals: one yearly goal for most years in the range
+    goal_rows = [
+        (user_id, year, rng.randint(12, 80), 'year')
+        for year in range(first_year, today.year + 1) if rng.random() < 0.8
+    ]
+    _executemany(db, conn, "INSERT INTO reading_goals (user_id, year, target_count, period) VALUES (?, ?, ?, ?)",
+                 goal_rows)
+
+    return {
+        'user_id': user_id,
+        'books': len(book_ids),
+        'rankings': len(read_books),
+        'comparisons': len(comparison_rows),
+        'book_tags': len(tag_rows),
+        'continuations': len(continuation_rows),
+        'goals': len(goal_rows),
+    }
+
+
+def generate_dataset(db, users=1, books_per_user=1000, seed=42, years=10, prefix='synth'):
+    """
+    Generate a synthetic dataset into `db` (a database.db.Database).
+    Returns a list of per-user row counts; user ids are in each entry's 'user_id'.
+    """
+    import bcrypt
+
+    rng = random.Random(seed)
+    templates, state_weights, star_weights = load_seed_pool()
+    # Hash once with minimal rounds - bcrypt per user would dominate generation time
+    password_hash = bcrypt.hashpw(SYNTHETIC_PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+
+    summaries = []
+    with db.get_connection() as conn:
+        tag_ids = _ensure_tags(db, conn, rng)
+
+    for user_index in range(users):
+        # One transaction per user keeps memory bounded and progress visible
+        with db.get_connection() as conn:
+            summary = _generate_user(db, conn, rng, user_index, books_per_user, templates,
+                                     state_weights, star_weights, tag_ids, years, prefix, password_hash)
+        summaries.append(summary)
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill the database with a synthetic bookshelf dataset')
+    parser.add_argument('--users', type=int, default=1, help='number of users to create')
+    parser.add_argument('--books-per-user', type=int, default=1000, help='books in each library')
+    parser.add_argument('--seed', type=int, default=42, help='random seed (same seed, same data)')
+    parser.add_argument('--years', type=int, default=10, help='span of finished dates and goals')
+    parser.add_argument('--prefix', default='synth', help='username prefix (must not collide with existing users)')
+    parser.add_argument('--db-path', help='SQLite file to fill (ignored when DATABASE_URL is set)')
+    args = parser.parse_args()
+
+    from database.db import Database
+
+    print("=" * 60)
+    print("Synthetic Dataset Generator")
+    print("=" * 60)
+
+    db = Database(args.db_path) if args.db_path else Database()
+    summaries = generate_dataset(db, args.users, args.books_per_user, args.seed, args.years, args.prefix)
+
+    for summary in summaries:
+        print(f"✓ user {summary['user_id']}: {summary['books']} books, {summary['rankings']} ranked, "
+              f"{summary['comparisons']} comparisons, {summary['book_tags']} tag links, "
+              f"{summary['continuations']} continuations, {summary['goals']} goals")
+    print(f"\nGenerated {sum(s['books'] for s in summaries)} books for {len(summaries)} users")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
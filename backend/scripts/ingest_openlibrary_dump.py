@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Build the offline Open Library index that MetadataService checks before
+calling the Open Library API.
+
+Takes the monthly dumps from https://openlibrary.org/developers/dumps
+(ol_dump_editions_*.txt.gz, ol_dump_works_*.txt.gz, ol_dump_authors_*.txt.gz)
+or JSON-lines files of the same records, gzipped or not. Files are streamed,
+so memory use does not grow with the dump size.
+
+Usage:
+    python backend/scripts/ingest_openlibrary_dump.py \\
+        ol_dump_authors_latest.txt.gz ol_dump_works_latest.txt.gz ol_dump_editions_latest.txt.gz
+    python backend/scripts/ingest_openlibrary_dump.py --index /tmp/ol.db --require-isbn sample.jsonl
+
+Re-running with newer dumps updates the existing index in place.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.metadata_index import DEFAULT_INDEX_PATH, MetadataIndex
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest Open Library dumps into a local metadata index')
+    parser.add_argument('dumps', nargs='+', help='dump files (.txt.gz, .txt or .jsonl)')
+    parser.add_argument('--index', default=os.getenv('METADATA_INDEX_PATH', DEFAULT_INDEX_PATH),
+                        help='index file to create or update (default: METADATA_INDEX_PATH or backend/data/openlibrary_index.db)')
+    parser.add_argument('--require-isbn', action='store_true', help='skip editions without an ISBN (much smaller index)')
+    args = parser.parse_args()
+
+    for path in args.dumps:
+        if not os.path.exists(path):
+            print(f"❌ {path} not found")
+            return 1
+
+    started = time.time()
+    counts = MetadataIndex.ingest(args.index, args.dumps, require_isbn=args.require_isbn)
+    size_mb = os.path.getsize(args.index) / (1024 * 1024)
+
+    print(f"\n✓ Indexed {counts['editions']:,} editions ({counts['isbns']:,} ISBNs), "
+          f"{counts['works']:,} works and {counts['authors']:,} authors in {time.time() - started:.1f}s")
+    print(f"  Skipped {counts['skipped']:,} lines")
+    print(f"  {args.index}: {size_mb:.1f} MB")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
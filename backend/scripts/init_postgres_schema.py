@@ -53,7 +53,10 @@ def main():
         schema_exists = cursor.fetchone()[0]
         
         if schema_exists:
-            print("   ✓ Schema already exists - skipping initialization")
+            print("   ✓ Schema already exists - applying any new tables and indexes")
+            # Every statement is IF NOT EXISTS, so re-applying only adds what is missing
+            cursor.execute(schema_sql)
+            conn.commit()
         else:
             print("   → Schema not found - initializing...")
             print("3. Applying schema...")
@@ -69,7 +72,8 @@ def main():
         critical_tables = [
             'users', 'books', 'reading_states', 'rankings', 
             'comparisons', 'tags', 'book_tags', 
-            'thought_continuations', 'reading_goals', 'import_history'
+            'thought_continuations', 'reading_goals', 'user_finished_counts',
+            'user_library_stats', 'import_history'
         ]
         
         for table in critical_tables:
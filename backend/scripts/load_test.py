@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+HTTP load generator for the Flask API.
+
+Replays a weighted mix of realistic traffic against a running server:
+- public:  anonymous public-profile views (profile, shelf, stats, goal, tags)
+- browse:  authenticated shelf browsing (/api/me/shelf, /api/books, shelves)
+- search:  library search (/api/books?q=...)
+- wizard:  add a finished book, run the ranking wizard, finalize, delete it
+- write:   book edits and reading-state changes (each triggers cache.clear())
+
+Two modes:
+- closed: --concurrency virtual users, each sends its next request as soon as
+          the previous one finishes (plus optional --think-ms)
+- open:   requests arrive at a fixed --rate per second regardless of how the
+          server is doing; latency is measured from the scheduled arrival
+          time, so queueing shows up instead of being hidden. Pass several
+          rates (--rate 10,20,40) to step up the load and find saturation.
+
+Users are the synthetic accounts from generate_dataset.py (prefix 'synth').
+
+Usage:
+    python backend/scripts/generate_dataset.py --users 5 --books-per-user 1000
+    python backend/app.py &
+    python backend/scripts/load_test.py --mode closed --concurrency 8 --duration 30
+    python backend/scripts/load_test.py --mode open --rate 10,20,40,80 --duration 20 --slo-ms 250
+"""
+
+import argparse
+import json
+import math
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.generate_dataset import SYNTHETIC_PASSWORD
+
+DEFAULT_MIX = {'public': 40, 'browse': 30, 'search': 15, 'wizard': 5, 'write': 10}
+
+SEARCH_TERMS = ['the', 'war', 'history', 'man', 'life', 'love', 'world', 'night', 'book', 'a']
+
+STATES = ['want_to_read', 'currently_reading', 'read']
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class LoadStats:
+    """Thread-safe latency and error collection per endpoint label"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, label, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(label, []).append(seconds)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        with self._lock:
+            rows = []
+            all_latencies = []
+            total_errors = 0
+            for label in sorted(self.latencies):
+                values = sorted(self.latencies[label])
+                all_latencies.extend(values)
+                errors = self.errors.get(label, 0)
+                total_errors += errors
+                rows.append(self._row(label, values, errors, elapsed))
+            all_latencies.sort()
+            total = self._row('TOTAL', all_latencies, total_errors, elapsed)
+        return {'elapsed_seconds': round(elapsed, 2), 'endpoints': rows, 'total': total}
+
+    @staticmethod
+    def _row(label, values, errors, elapsed):
+        count = len(values)
+        return {
+            'endpoint': label,
+            'requests': count,
+            'errors': errors,
+            'error_rate': round(errors / count, 4) if count else 0.0,
+            'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(_percentile(values, 0.5) * 1000, 1) if count else None,
+            'p90_ms': round(_percentile(values, 0.9) * 1000, 1) if count else None,
+            'p95_ms': round(_percentile(values, 0.95) * 1000, 1) if count else None,
+            'p99_ms': round(_percentile(values, 0.99) * 1000, 1) if count else None,
+            'max_ms': round(values[-1] * 1000, 1) if count else None,
+        }
+
+
+class VirtualUser:
+    """One logged-in synthetic user with its own HTTP session (sessions are not thread-safe)"""
+
+    def __init__(self, base_url, username, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.anonymous = requests.Session()
+        self.book_ids = []
+        # Set per request in open mode so queueing delay is counted
+        self.scheduled_at = None
+
+    def login(self):
+        response = self.session.post(
+            f"{self.base_url}/api/auth/login",
+            json={'email': f"{self.username}@example.com", 'password': SYNTHETIC_PASSWORD},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        shelf = self.session.get(f"{self.base_url}/api/me/shelf", params={'limit': 200}, timeout=self.timeout)
+        shelf.raise_for_status()
+        self.book_ids = [book['id'] for book in shelf.json()['books']]
+
+    def request(self, stats, label, method, path, anonymous=False, **kwargs):
+        session = self.anonymous if anonymous else self.session
+        started = self.scheduled_at if self.scheduled_at is not None else time.perf_counter()
+        self.scheduled_at = None
+        try:
+            response = session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response = None
+            ok = False
+        stats.record(label, time.perf_counter() - started, ok)
+        return response
+
+
+def scenario_public(user, stats, rng, usernames):
+    username = rng.choice(usernames)
+    user.request(stats, 'GET /api/public/users/<u>/profile', 'GET', f"/api/public/users/{username}/profile", anonymous=True)
+    user.request(stats, 'GET /api/public/users/<u>/shelf', 'GET', f"/api/public/users/{username}/shelf", anonymous=True)
+    user.request(stats, 'GET /api/public/users/<u>/stats', 'GET', f"/api/public/users/{username}/stats", anonymous=True)
+    if rng.random() < 0.5:
+        user.request(stats, 'GET /api/public/users/<u>/goal', 'GET', f"/api/public/users/{username}/goal", anonymous=True)
+        user.request(stats, 'GET /api/public/users/<u>/tags', 'GET', f"/api/public/users/{username}/tags", anonymous=True)
+
+
+def scenario_browse(user, stats, rng, usernames):
+    state = rng.choice(STATES)
+    user.request(stats, 'GET /api/me/shelf', 'GET', '/api/me/shelf', params={'state': state, 'limit': 50})
+    offset = rng.choice((0, 0, 0, 50, 100))
+    user.request(stats, 'GET /api/books', 'GET', '/api/books', params={'limit': 50, 'offset': offset})
+    user.request(stats, 'GET /api/books/shelf/<state>', 'GET', f"/api/books/shelf/{state}")
+    if user.book_ids:
+        user.request(stats, 'GET /api/books/<id>', 'GET', f"/api/books/{rng.choice(user.book_ids)}")
+    if rng.random() < 0.3:
+        user.request(stats, 'GET /api/rankings', 'GET', '/api/rankings')
+    if rng.random() < 0.3:
+        user.request(stats, 'GET /api/goals', 'GET', '/api/goals')
+
+
+def scenario_search(user, stats, rng, usernames):
+    user.request(stats, 'GET /api/books?q=', 'GET', '/api/books', params={'q': rng.choice(SEARCH_TERMS), 'limit': 20})
+    if rng.random() < 0.3:
+        user.request(stats, 'GET /api/tags', 'GET', '/api/tags')
+
+
+def scenario_wizard(user, stats, rng, usernames):
+    stars = rng.choice((3, 4, 4, 5, 5))
+    response = user.request(stats, 'POST /api/books', 'POST', '/api/books', json={
+        'title': f"Load Test {rng.randrange(1_000_000)}",
+        'author': 'Load Tester',
+        'initial_state': 'want_to_read'
+    })
+    if response is None or response.status_code >= 400:
+        return
+    book_id = response.json()['id']
+    wizard = user.request(stats, 'POST /api/rankings/wizard/start', 'POST', '/api/rankings/wizard/start',
+                          json={'book_id': book_id, 'initial_stars': stars})
+    if wizard is not None and wizard.status_code < 400:
+        comparisons = wizard.json().get('comparisons', [])
+        answers = [
+            {'book_a_id': book_id, 'book_b_id': c['candidate_book_id'],
+             'winner_id': rng.choice((book_id, c['candidate_book_id']))}
+            for c in comparisons
+        ]
+        position = comparisons[-1]['candidate_position'] if comparisons else 1
+        user.request(stats, 'POST /api/rankings/wizard/finalize', 'POST', '/api/rankings/wizard/finalize', json={
+            'book_id': book_id, 'final_position': position, 'initial_stars': stars, 'comparisons': answers
+        })
+    user.request(stats, 'DELETE /api/books/<id>', 'DELETE', f"/api/books/{book_id}")
+
+
+def scenario_write(user, stats, rng, usernames):
+    if not user.book_ids:
+        return
+    book_id = rng.choice(user.book_ids)
+    if rng.random() < 0.5:
+        user.request(stats, 'PUT /api/books/<id>', 'PUT', f"/api/books/{book_id}",
+                     json={'notes': f"load test note {rng.randrange(1000)}"})
+    else:
+        user.request(stats, 'PUT /api/books/<id>/state', 'PUT', f"/api/books/{book_id}/state",
+                     json={'state': rng.choice(STATES), 'date_finished': time.strftime('%Y-%m-%d')})
+
+
+SCENARIOS = {
+    'public': scenario_public,
+    'browse': scenario_browse,
+    'search': scenario_search,
+    'wizard': scenario_wizard,
+    'write': scenario_write,
+}
+
+
+def parse_mix(value):
+    """'public=40,browse=30' -> {'public': 40, 'browse': 30}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def create_users(args):
+    usernames = [f"{args.user_prefix}{i}" for i in range(args.users)]
+    users = []
+    for i in range(max(args.concurrency, 1)):
+        user = VirtualUser(args.base_url, usernames[i % len(usernames)], args.timeout)
+        user.login()
+        users.append(user)
+    return users, usernames
+
+
+def run_closed(args, users, usernames, mix):
+    """Each virtual user loops: pick scenario, run it, think, repeat"""
+    stats = LoadStats()
+    deadline = time.perf_counter() + args.duration
+    names, weights = list(mix), list(mix.values())
+
+    def worker(index, user):
+        rng = random.Random(args.seed + index)
+        while time.perf_counter() < deadline:
+            SCENARIOS[rng.choices(names, weights)[0]](user, stats, rng, usernames)
+            if args.think_ms:
+                time.sleep(rng.expovariate(1000 / args.think_ms))
+
+    threads = [threading.Thread(target=worker, args=(i, user), daemon=True) for i, user in enumerate(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.stop()
+    return stats
+
+
+def run_open(args, users, usernames, mix, rate):
+    """Scenarios start at a fixed arrival rate; a slow server builds a queue instead of slowing the load"""
+    stats = LoadStats()
+    names, weights = list(mix), list(mix.values())
+    rng = random.Random(args.seed)
+    idle_users = queue.Queue()
+    for user in users:
+        idle_users.put(user)
+
+    def task(scheduled_at, scenario, seed):
+        user = idle_users.get()
+        try:
+            user.scheduled_at = scheduled_at
+            SCENARIOS[scenario](user, stats, random.Random(seed), usernames)
+        finally:
+            idle_users.put(user)
+
+    with ThreadPoolExecutor(max_workers=len(users)) as pool:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        next_arrival = started
+        while next_arrival < deadline:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(task, next_arrival, rng.choices(names, weights)[0], rng.randrange(1 << 30))
+            gap = rng.expovariate(rate) if args.poisson else 1 / rate
+            next_arrival += gap
+    stats.stop()
+    return stats
+
+
+def print_report(title, summary):
+    print(f"\n{title}  ({summary['elapsed_seconds']}s)")
+    header = f"{'endpoint':<42} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    print(header)
+    print('-' * len(header))
+    for row in summary['endpoints'] + [summary['total']]:
+        def ms(value):
+            return f"{value:.1f}" if value is not None else '-'
+        print(f"{row['endpoint'][:42]:<42} {row['requests']:>7} {row['error_rate'] * 100:>5.1f}% "
+              f"{row['throughput_rps']:>8.1f} {ms(row['p50_ms']):>8} {ms(row['p95_ms']):>8} "
+              f"{ms(row['p99_ms']):>8} {ms(row['max_ms']):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the bookshelf API')
+    parser.add_argument('--base-url', default='http://localhost:5001')
+    parser.add_argument('--mode', choices=('closed', 'open'), default='closed')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='virtual users (closed) or maximum in-flight scenarios (open)')
+    parser.add_argument('--rate', default='10',
+                        help='open mode: scenarios per second; comma-separate to step through rates')
+    parser.add_argument('--poisson', action='store_true', help='open mode: exponential inter-arrival times')
+    parser.add_argument('--duration', type=float, default=30, help='seconds per run (per rate step in open mode)')
+    parser.add_argument('--think-ms', type=float, default=0, help='closed mode: mean think time between scenarios')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='scenario weights, e.g. public=40,browse=30,search=15,wizard=5,write=10')
+    parser.add_argument('--users', type=int, default=5, help='synthetic accounts available (synth0..synthN-1)')
+    parser.add_argument('--user-prefix', default='synth')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--slo-ms', type=float, default=500, help='p95 above this marks a rate step as saturated')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='write the full report to this file')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Load test: {args.mode} mode against {args.base_url}")
+    print("=" * 60)
+
+    try:
+        users, usernames = create_users(args)
+    except requests.RequestException as e:
+        print(f"❌ Could not log in synthetic users: {e}")
+        print("   Run generate_dataset.py first and check --base-url")
+        return 1
+    print(f"✓ Logged in {len(users)} virtual users")
+
+    report = {'mode': args.mode, 'mix': args.mix, 'runs': []}
+    if args.mode == 'closed':
+        stats = run_closed(args, users, usernames, args.mix)
+        summary = stats.summary()
+        print_report(f"Closed loop, {len(users)} users", summary)
+        report['runs'].append({'concurrency': len(users), **summary})
+    else:
+        rates = [float(r) for r in args.rate.split(',')]
+        for rate in rates:
+            summary = run_open(args, users, usernames, args.mix, rate).summary()
+            print_report(f"Open loop, {rate:g} scenarios/s", summary)
+            total = summary['total']
+            achieved = total['requests'] / summary['elapsed_seconds'] if summary['elapsed_seconds'] else 0
+            report['runs'].append({'rate': rate, **summary})
+            if (total['p95_ms'] or 0) > args.slo_ms or total['error_rate'] > 0.01:
+                print(f"\n⚠ Saturated at {rate:g} scenarios/s "
+                      f"(p95 {total['p95_ms']}ms, errors {total['error_rate'] * 100:.1f}%, {achieved:.1f} req/s)")
+                break
+
+        print("\nRate steps:")
+        print(f"{'scenarios/s':>12} {'req/s':>8} {'p95 ms':>8} {'err%':>6}")
+        for run in report['runs']:
+            print(f"{run['rate']:>12g} {run['total']['throughput_rps']:>8.1f} "
+                  f"{run['total']['p95_ms'] or 0:>8.1f} {run['total']['error_rate'] * 100:>5.1f}%")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
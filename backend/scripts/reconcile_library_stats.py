@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Recompute every user's library counters (user_library_stats) from scratch
+and report drift against the stored rows.
+
+Drift means something wrote books, reading states or ratings without going
+through BookService/RankingService (imports, migrations, manual SQL).
+
+Usage:
+    python backend/scripts/reconcile_library_stats.py          # report only
+    python backend/scripts/reconcile_library_stats.py --fix    # report and repair
+
+Exits with status 1 when drift is found and not fixed, so it can run from cron.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.book_service import get_book_service
+
+def describe(stats):
+    if stats is None:
+        return 'missing'
+    counts = stats['counts_by_state']
+    return (
+        f"total={stats['total_books']} want={counts['want_to_read']} "
+        f"reading={counts['currently_reading']} read={counts['read']} "
+        f"rated={stats['rated_count']} stars_sum={stats['stars_sum']}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile per-user library counters')
+    parser.add_argument('--fix', action='store_true', help='rewrite rows that have drifted')
+    args = parser.parse_args()
+
+    print("Reconciling user_library_stats...")
+    drift = get_book_service().reconcile_library_stats(fix=args.fix)
+
+    if not drift:
+        print("✓ No drift - all counters match")
+        return 0
+
+    print(f"\n⚠️  {len(drift)} user(s) drifted:")
+    for entry in drift:
+        print(f"  User {entry['user_id']}:")
+        print(f"    stored: {describe(entry['stored'])}")
+        print(f"    actual: {describe(entry['actual'])}")
+
+    if args.fix:
+        print(f"\n✓ Rewrote {len(drift)} row(s)")
+        return 0
+    print("\nRun with --fix to repair")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import threading
+from datetime import date
+
+import numpy as np
+from database.db import get_db
+
+STATES = ('want_to_read', 'currently_reading', 'read')
+READ = STATES.index('read')
+
+# How many authors, genres and tags the distributions list
+TOP_N = 10
+
+# Filtered results kept per user; the unfiltered view is always kept
+MAX_CACHED_RANGES = 8
+
+
+class LibraryColumns:
+    """One user's library as parallel NumPy arrays (one slot per book).
+
+    Missing values are -1 for codes, NaN for numbers and NaT for dates, so
+    every aggregate is a mask plus a bincount/sum rather than a Python loop.
+    """
+
+    def __init__(self, books, book_tags):
+        self.size = len(books)
+        self.state = np.array(
+            [STATES.index(b['state']) if b['state'] in STATES else -1 for b in books], dtype=np.int8
+        )
+        self.stars = np.array(
+            [b['initial_stars'] if b['initial_stars'] is not None else np.nan for b in books], dtype=float
+        )
+        self.pages = np.array(
+            [b['num_pages'] if b['num_pages'] else np.nan for b in books], dtype=float
+        )
+        self.finished = np.array(
+            [str(b['finished_on'])[:10] if b['finished_on'] else 'NaT' for b in books], dtype='datetime64[D]'
+        )
+        self.author_names, self.author = self._codes([b['author'] for b in books])
+        self.genre_names, self.genre = self._codes([b['genre'] for b in books])
+
+        # Tags as (book slot, tag code) pairs
+        slot_of = {b['id']: i for i, b in enumerate(books)}
+        tag_ids = sorted({row['id'] for row in book_tags})
+        tag_code = {tag_id: i for i, tag_id in enumerate(tag_ids)}
+        self.tags = [None] * len(tag_ids)
+        for row in book_tags:
+            self.tags[tag_code[row['id']]] = {'id': row['id'], 'name': row['name'], 'color': row['color']}
+        self.tag_book = np.array([slot_of[row['book_id']] for row in book_tags], dtype=np.int64)
+        self.tag_code = np.array([tag_code[row['id']] for row in book_tags], dtype=np.int64)
+
+    @staticmethod
+    def _codes(values):
+        """Categorical encoding: (names, int codes with -1 for missing)"""
+        names = sorted({value for value in values if value})
+        code = {name: i for i, name in enumerate(names)}
+        return names, np.array([code[value] if value else -1 for value in values], dtype=np.int64)
+
+
+def _top(names, codes, limit=TOP_N, key='name'):
+    """Most common categories among codes, as [{key, 'count'}]"""
+    codes = codes[codes >= 0]
+    if not len(codes):
+        return []
+    counts = np.bincount(codes, minlength=len(names))
+    order = np.lexsort((np.arange(len(counts)), -counts))[:limit]
+    return [{key: names[i], 'count': int(counts[i])} for i in order if counts[i]]
+
+
+def _month_label(month_index):
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+
+
+def _streaks(months, current_month):
+    """Longest and current runs of consecutive months with a finished book"""
+    if not len(months):
+        return {'longest_months': 0, 'longest_start': None, 'longest_end': None, 'current_months': 0}
+
+    # A new run starts wherever the gap to the previous active month is > 1
+    breaks = np.flatnonzero(np.diff(months) != 1) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(months)])) - 1
+    lengths = ends - starts + 1
+    best = int(np.argmax(lengths))
+
+    # The current streak may end this month or last month (this month is still open)
+    current = int(lengths[-1]) if months[-1] >= current_month - 1 else 0
+    return {
+        'longest_months': int(lengths[best]),
+        'longest_start': _month_label(int(months[starts[best]])),
+        'longest_end': _month_label(int(months[ends[best]])),
+        'current_months': current
+    }
+
+
+def compute_stats(columns, start=None, end=None, today=None):
+    """Every aggregate for one user in a single pass over the columns.
+
+    With start/end (inclusive dates) only books finished in that range count.
+    """
+    today = today or date.today()
+    mask = np.ones(columns.size, dtype=bool)
+    if start is not None:
+        mask &= columns.finished >= np.datetime64(start, 'D')
+    if end is not None:
+        mask &= columns.finished <= np.datetime64(end, 'D')
+
+    state = columns.state[mask]
+    state_counts = np.bincount(state[state >= 0], minlength=len(STATES))
+
+    stars = columns.stars[mask]
+    rated = ~np.isnan(stars)
+    rated_count = int(rated.sum())
+
+    finished = columns.finished[mask]
+    has_finished = ~np.isnat(finished)
+    finished_days = finished[has_finished]
+    years = finished_days.astype('datetime64[Y]').astype(np.int64) + 1970
+    year_values, year_counts = np.unique(years, return_counts=True)
+
+    # Pages and books per month for books on the read shelf
+    read_finished = has_finished & (state == READ)
+    months = finished[read_finished].astype('datetime64[M]').astype(np.int64) + 1970 * 12
+    pages = columns.pages[mask][read_finished]
+    month_values, month_slot = np.unique(months, return_inverse=True)
+    month_books = np.bincount(month_slot, minlength=len(month_values))
+    month_pages = np.bincount(month_slot, weights=np.nan_to_num(pages), minlength=len(month_values))
+
+    tag_counts = np.bincount(columns.tag_code[mask[columns.tag_book]], minlength=len(columns.tags))
+    tag_order = np.lexsort((np.arange(len(tag_counts)), -tag_counts))[:TOP_N]
+
+    current_month = today.year * 12 + today.month - 1
+    return {
+        'counts_by_state': {name: int(state_counts[i]) for i, name in enumerate(STATES)},
+        'total_books': int(state_counts.sum()),
+        # An all-zero average means "unrated", as before
+        'average_rating': float(stars[rated].mean()) or None if rated_count else None,
+        'rated_count': rated_count,
+        'total_pages_read': int(np.nansum(pages)),
+        'top_tags': [
+            {**columns.tags[i], 'book_count': int(tag_counts[i])}
+            for i in tag_order if tag_counts[i]
+        ],
+        'yearly_totals': [
+            {'year': str(year), 'count': int(count)}
+            for year, count in sorted(zip(year_values.tolist(), year_counts.tolist()), reverse=True)
+        ],
+        'pages_by_month': [
+            {'month': _month_label(month), 'books': int(books), 'pages': int(total)}
+            for month, books, total in zip(month_values.tolist(), month_books.tolist(), month_pages.tolist())
+        ],
+        'authors': _top(columns.author_names, columns.author[mask], key='author'),
+        'genres': _top(columns.genre_names, columns.genre[mask], key='genre'),
+        'streaks': _streaks(month_values, current_month),
+        'range': {
+            'from': start.isoformat() if start else None,
+            'to': end.isoformat() if end else None
+        }
+    }
+
+
+class AnalyticsService:
+    """Reading statistics computed from cached columnar snapshots of each library.
+
+    A user's books are loaded into LibraryColumns once per library version
+    (two queries) and every statistic is derived from the arrays. Call
+    invalidate() after writes; the next stats request reloads.
+    """
+
+    def __init__(self):
+        self.db = get_db()
+        self._lock = threading.Lock()
+        # user_id -> library version, bumped by invalidate()
+        self._versions = {}
+        # user_id -> {'version', 'columns', 'results': {(start, end): stats}}
+        self._cache = {}
+
+    def invalidate(self, user_id=None):
+        """Mark a user's library (or every library, for user_id=None) as changed"""
+        with self._lock:
+            if user_id is None:
+                for cached_user in list(self._cache):
+                    self._versions[cached_user] = self._versions.get(cached_user, 0) + 1
+                self._cache.clear()
+            else:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+                self._cache.pop(user_id, None)
+
+    def get_stats(self, user_id, start=None, end=None):
+        """All reading statistics for a user, optionally limited to books finished in [start, end]"""
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+            entry = self._cache.get(user_id)
+            if entry is not None and entry['version'] == version:
+                cached = entry['results'].get((start, end))
+                if cached is not None:
+                    return cached
+
+        if entry is None or entry['version'] != version:
+            entry = {'version': version, 'columns': self._load_columns(user_id), 'results': {}}
+
+        stats = compute_stats(entry['columns'], start, end)
+        stats['version'] = version
+
+        with self._lock:
+            # Only publish if no write happened while we were loading
+            if self._versions.get(user_id, 0) == version:
+                results = entry['results']
+                if (start, end) != (None, None) and len(results) >= MAX_CACHED_RANGES:
+                    results.pop(next(key for key in results if key != (None, None)))
+                results[(start, end)] = stats
+                self._cache[user_id] = entry
+        return stats
+
+    def _load_columns(self, user_id):
+        books_query = """
+            SELECT b.id, b.author, b.genre, b.num_pages, b.finished_on,
+                   rs.state, r.initial_stars
+            FROM books b
+            LEFT JOIN reading_states rs ON b.id = rs.book_id
+            LEFT JOIN rankings r ON b.id = r.book_id
+            WHERE b.user_id = ?
+            ORDER BY b.id
+        """
+        tags_query = """
+            SELECT bt.book_id, t.id, t.name, t.color
+            FROM book_tags bt
+            JOIN tags t ON bt.tag_id = t.id
+            JOIN books b ON bt.book_id = b.id
+            WHERE b.user_id = ?
+        """
+        books = self.db.execute_query(books_query, (user_id,))
+        book_tags = self.db.execute_query(tags_query, (user_id,))
+        return LibraryColumns(books, book_tags)
+
+# Singleton
+_analytics_service = None
+
+def get_analytics_service():
+    global _analytics_service
+    if _analytics_service is None:
+        _analytics_service = AnalyticsService()
+    return _analytics_service
@@ -1,4 +1,5 @@
 from database.db import get_db
+from services.goal_service import get_goal_service
 from datetime import datetime
 import os
 import shutil
@@ -39,24 +40,31 @@ class BookService:
             book_data.get('date_finished')
         )
         
-        book_id = self.db.execute_update(query, params)
-        
-        # Set initial reading state
-        self.set_reading_state(book_id, initial_state)
-        
-        # Set initial ranking/stars if book is in 'read' state
-        # Books in 'read' state should always have a ranking entry, even with 0 or null stars
-        initial_stars = book_data.get('initial_stars')
-        if initial_state == 'read':
-            # Add to rankings table
-            ranking_query = """
-                INSERT INTO rankings (book_id, rank_position, initial_stars)
-                VALUES (?, ?, ?)
-            """
-            # Default position is 0 (unranked), will be updated later via rerank_all_books_by_stars
-            # If initial_stars is None, default to 0 (unrated)
-            stars_value = initial_stars if initial_stars is not None else 0
-            self.db.execute_update(ranking_query, (book_id, 0, stars_value))
+        # The book, its state, its ranking and the owner's counters commit together
+        with self.db.transaction():
+            book_id = self.db.execute_update(query, params)
+            self.apply_library_stats_delta(user_id, None, {'state': None, 'initial_stars': None})
+            
+            # Set initial reading state
+            self.set_reading_state(book_id, initial_state)
+            
+            # Set initial ranking/stars if book is in 'read' state
+            # Books in 'read' state should always have a ranking entry, even with 0 or null stars
+            initial_stars = book_data.get('initial_stars')
+            if initial_state == 'read':
+                # Add to rankings table
+                ranking_query = """
+                    INSERT INTO rankings (book_id, rank_position, initial_stars)
+                    VALUES (?, ?, ?)
+                """
+                # Default position is 0 (unranked), will be updated later via rerank_all_books_by_stars
+                # If initial_stars is None, default to 0 (unrated)
+                stars_value = initial_stars if initial_stars is not None else 0
+                self.db.execute_update(ranking_query, (book_id, 0, stars_value))
+                self.apply_library_stats_delta(
+                    user_id, {'state': initial_state, 'initial_stars': None},
+                    {'state': initial_state, 'initial_stars': stars_value}
+                )
         
         return self.get_book(book_id, user_id)
     
@@ -131,15 +139,23 @@ class BookService:
     
     def delete_book(self, book_id, user_id=None):
         """Delete a book"""
-        query = "DELETE FROM books WHERE id = ?"
-        params = [book_id]
-        
-        # If user_id is provided, add ownership check
-        if user_id is not None:
-            query += " AND user_id = ?"
-            params.append(user_id)
-        
-        self.db.execute_update(query, params)
+        with self.db.transaction():
+            before = self._get_book_snapshot(book_id)
+            
+            query = "DELETE FROM books WHERE id = ?"
+            params = [book_id]
+            
+            # If user_id is provided, add ownership check
+            if user_id is not None:
+                query += " AND user_id = ?"
+                params.append(user_id)
+            
+            self.db.execute_update(query, params)
+            
+            if before and (user_id is None or before['user_id'] == user_id):
+                if before['finished_year'] is not None:
+                    get_goal_service().refresh_finished_counts(before['user_id'], [before['finished_year']])
+                self.apply_library_stats_delta(before['user_id'], before, None)
         return True
     
     def search_books(self, query=None, author=None, tag=None, state=None, limit=50, offset=0, user_id=None):
@@ -270,37 +286,68 @@ class BookService:
     
     def set_reading_state(self, book_id, state, date_started=None, date_finished=None):
         """Set or update reading state"""
-        # Update or insert reading state
-        query = """
-            INSERT INTO reading_states (book_id, state)
-            VALUES (?, ?)
-            ON CONFLICT(book_id) DO UPDATE SET
-                state = excluded.state,
-                updated_at = CURRENT_TIMESTAMP
-        """
-        self.db.execute_update(query, (book_id, state))
-        
-        # Update book dates
-        update_fields = []
-        params = []
-        
-        if state == 'currently_reading' and date_started:
-            update_fields.append("date_started = ?")
-            params.append(date_started)
-        
-        if state == 'read' and date_finished:
-            update_fields.append("date_finished = ?")
-            params.append(date_finished)
-        
-        if update_fields:
-            params.append(book_id)
-            book_query = f"UPDATE books SET {', '.join(update_fields)} WHERE id = ?"
-            self.db.execute_update(book_query, params)
+        with self.db.transaction():
+            before = self._get_book_snapshot(book_id)
+            
+            # Update or insert reading state
+            query = """
+                INSERT INTO reading_states (book_id, state)
+                VALUES (?, ?)
+                ON CONFLICT(book_id) DO UPDATE SET
+                    state = excluded.state,
+                    updated_at = CURRENT_TIMESTAMP
+            """
+            self.db.execute_update(query, (book_id, state))
+            
+            # Update book dates
+            update_fields = []
+            params = []
+            
+            if state == 'currently_reading' and date_started:
+                update_fields.append("date_started = ?")
+                params.append(date_started)
+            
+            if state == 'read' and date_finished:
+                update_fields.append("date_finished = ?")
+                params.append(date_finished)
+            
+            if update_fields:
+                params.append(book_id)
+                book_query = f"UPDATE books SET {', '.join(update_fields)} WHERE id = ?"
+                self.db.execute_update(book_query, params)
+            
+            # Keep per-year finished counts in step for the old and new finish year
+            if before:
+                years = {before['finished_year']}
+                if update_fields:
+                    after = self._get_book_snapshot(book_id)
+                    years.add(after['finished_year'] if after else None)
+                get_goal_service().refresh_finished_counts(before['user_id'], years)
+                self.apply_library_stats_delta(before['user_id'], before, {**before, 'state': state})
         
         return True
     
+    def _get_book_snapshot(self, book_id):
+        """Owner, finished_year, state and stars of a book, or None if it does not exist"""
+        query = """
+            SELECT b.user_id, b.finished_year, rs.state, r.initial_stars
+            FROM books b
+            LEFT JOIN reading_states rs ON b.id = rs.book_id
+            LEFT JOIN rankings r ON b.id = r.book_id
+            WHERE b.id = ?
+        """
+        results = self.db.execute_query(query, (book_id,))
+        return results[0] if results else None
+    
     def get_total_count(self, state=None, user_id=None):
         """Get total count of books"""
+        if user_id is not None:
+            # Per-user totals are maintained in user_library_stats
+            stats = self.get_library_stats(user_id)
+            if state is None:
+                return stats['total_books']
+            return stats['counts_by_state'].get(state, 0)
+        
         if state:
             query = """
                 SELECT COUNT(*) as count
@@ -308,25 +355,147 @@ class BookService:
                 JOIN reading_states rs ON b.id = rs.book_id
                 WHERE rs.state = ?
             """
-            params = [state]
-            
-            if user_id is not None:
-                query += " AND b.user_id = ?"
-                params.append(user_id)
-            
-            result = self.db.execute_query(query, params)
+            result = self.db.execute_query(query, [state])
         else:
-            query = "SELECT COUNT(*) as count FROM books"
-            params = []
-            
-            if user_id is not None:
-                query += " WHERE user_id = ?"
-                params.append(user_id)
-            
-            result = self.db.execute_query(query, params)
+            result = self.db.execute_query("SELECT COUNT(*) as count FROM books")
         
         return result[0]['count'] if result else 0
     
+    def get_library_stats(self, user_id):
+        """Book counts and rating summary for a user's library, from user_library_stats"""
+        results = self.db.execute_query(
+            "SELECT * FROM user_library_stats WHERE user_id = ?", (user_id,)
+        )
+        if not results:
+            # No counters yet (e.g. a new user) - build them now
+            self.refresh_library_stats(user_id)
+            results = self.db.execute_query(
+                "SELECT * FROM user_library_stats WHERE user_id = ?", (user_id,)
+            )
+        return self._library_stats_dict(results[0])
+    
+    def apply_library_stats_delta(self, user_id, before, after):
+        """Move one book's contribution to user_library_stats from before to after.
+        
+        before/after are {'state', 'initial_stars'} snapshots of the book, or
+        None when it does not exist (create/delete). The change is a single
+        relative UPDATE, so concurrent writers never overwrite each other.
+        Call it inside the db.transaction() that changes the book, so the
+        counters commit (or roll back) with it.
+        Users without a counters row yet are skipped; get_library_stats builds
+        the row from scratch on first read.
+        """
+        delta = {
+            'total_books': 0,
+            'want_to_read_count': 0,
+            'currently_reading_count': 0,
+            'read_count': 0,
+            'rated_count': 0,
+            'stars_sum': 0
+        }
+        for snapshot, sign in ((before, -1), (after, 1)):
+            if snapshot is None:
+                continue
+            delta['total_books'] += sign
+            if snapshot['state'] in ('want_to_read', 'currently_reading', 'read'):
+                delta[f"{snapshot['state']}_count"] += sign
+            if snapshot['initial_stars'] is not None:
+                delta['rated_count'] += sign
+                delta['stars_sum'] += sign * snapshot['initial_stars']
+        
+        if not any(delta.values()):
+            return
+        
+        assignments = ', '.join(f"{column} = {column} + ?" for column in delta)
+        self.db.execute_update(
+            f"UPDATE user_library_stats SET {assignments} WHERE user_id = ?",
+            list(delta.values()) + [user_id]
+        )
+    
+    def refresh_library_stats(self, user_id):
+        """Recount a user's user_library_stats row from scratch"""
+        query = """
+            INSERT INTO user_library_stats (
+                user_id, total_books, want_to_read_count, currently_reading_count,
+                read_count, rated_count, stars_sum
+            )
+            SELECT ?,
+                   COUNT(b.id),
+                   COUNT(CASE WHEN rs.state = 'want_to_read' THEN 1 END),
+                   COUNT(CASE WHEN rs.state = 'currently_reading' THEN 1 END),
+                   COUNT(CASE WHEN rs.state = 'read' THEN 1 END),
+                   COUNT(r.initial_stars),
+                   COALESCE(SUM(r.initial_stars), 0)
+            FROM books b
+            LEFT JOIN reading_states rs ON b.id = rs.book_id
+            LEFT JOIN rankings r ON b.id = r.book_id
+            WHERE b.user_id = ?
+            ON CONFLICT(user_id) DO UPDATE SET
+                total_books = excluded.total_books,
+                want_to_read_count = excluded.want_to_read_count,
+                currently_reading_count = excluded.currently_reading_count,
+                read_count = excluded.read_count,
+                rated_count = excluded.rated_count,
+                stars_sum = excluded.stars_sum
+        """
+        self.db.execute_update(query, (user_id, user_id))
+    
+    def reconcile_library_stats(self, fix=False):
+        """Recompute every user's counters from scratch and report drift.
+        
+        Returns a list of {'user_id', 'stored', 'actual'} for users whose
+        stored counters differ from the recomputed ones. With fix=True the
+        drifted rows are rewritten.
+        """
+        query = """
+            SELECT u.id as user_id,
+                   COUNT(b.id) as total_books,
+                   COUNT(CASE WHEN rs.state = 'want_to_read' THEN 1 END) as want_to_read_count,
+                   COUNT(CASE WHEN rs.state = 'currently_reading' THEN 1 END) as currently_reading_count,
+                   COUNT(CASE WHEN rs.state = 'read' THEN 1 END) as read_count,
+                   COUNT(r.initial_stars) as rated_count,
+                   COALESCE(SUM(r.initial_stars), 0) as stars_sum
+            FROM users u
+            LEFT JOIN books b ON b.user_id = u.id
+            LEFT JOIN reading_states rs ON b.id = rs.book_id
+            LEFT JOIN rankings r ON b.id = r.book_id
+            GROUP BY u.id
+            ORDER BY u.id
+        """
+        actual = self.db.execute_query(query)
+        stored = {
+            row['user_id']: row
+            for row in self.db.execute_query("SELECT * FROM user_library_stats")
+        }
+        
+        drift = []
+        for row in actual:
+            current = stored.get(row['user_id'])
+            if current is None and not row['total_books']:
+                continue  # Empty libraries are built on first read
+            actual_stats = self._library_stats_dict(row)
+            stored_stats = self._library_stats_dict(current) if current else None
+            if stored_stats != actual_stats:
+                drift.append({'user_id': row['user_id'], 'stored': stored_stats, 'actual': actual_stats})
+                if fix:
+                    self.refresh_library_stats(row['user_id'])
+        return drift
+    
+    def _library_stats_dict(self, row):
+        rated_count = row['rated_count']
+        stars_sum = round(float(row['stars_sum'] or 0), 6)
+        return {
+            'total_books': row['total_books'],
+            'counts_by_state': {
+                'want_to_read': row['want_to_read_count'],
+                'currently_reading': row['currently_reading_count'],
+                'read': row['read_count']
+            },
+            'rated_count': rated_count,
+            'stars_sum': stars_sum,
+            'average_rating': round(stars_sum / rated_count, 3) if rated_count else None
+        }
+    
     def get_public_books(self, owner_user_id):
         """Get public books for the owner user"""
         query = """
@@ -373,7 +542,7 @@ class BookService:
         """Get public books for a user, optionally filtered by reading state"""
         query = """
             SELECT b.id, b.title, b.author, b.isbn, b.isbn13, b.pub_date, b.num_pages,
-                   b.genre, b.cover_image_url, b.series, b.series_position,
+                   b.genre, b.cover_image_url, b.cover_hash, b.series, b.series_position,
                    rs.state as reading_state, r.rank_position, r.initial_stars,
                    b.date_finished, b.dimensions, b.dom_color, b.notes
             FROM books b
@@ -418,93 +587,6 @@ class BookService:
                 book['tags'] = tags_by_book.get(book['id'], [])
         
         return books
-    
-    def get_public_stats(self, user_id):
-        """Get public statistics for a user"""
-        # Counts by reading state
-        state_query = """
-            SELECT rs.state, COUNT(*) as count
-            FROM books b
-            JOIN reading_states rs ON b.id = rs.book_id
-            WHERE b.user_id = ?
-            GROUP BY rs.state
-        """
-        state_counts = self.db.execute_query(state_query, (user_id,))
-        
-        # Average rating (from rankings)
-        rating_query = """
-            SELECT AVG(r.initial_stars) as avg_rating, COUNT(*) as rated_count
-            FROM books b
-            JOIN rankings r ON b.id = r.book_id
-            WHERE b.user_id = ? AND r.initial_stars IS NOT NULL
-        """
-        rating_result = self.db.execute_query(rating_query, (user_id,))
-        avg_rating = rating_result[0]['avg_rating'] if rating_result and rating_result[0]['avg_rating'] else None
-        rated_count = rating_result[0]['rated_count'] if rating_result else 0
-        
-        # Top tags
-        tags_query = """
-            SELECT t.id, t.name, t.color, COUNT(bt.book_id) as book_count
-            FROM tags t
-            JOIN book_tags bt ON t.id = bt.tag_id
-            JOIN books b ON bt.book_id = b.id
-            WHERE b.user_id = ?
-            GROUP BY t.id, t.name, t.color
-            ORDER BY book_count DESC
-            LIMIT 10
-        """
-        top_tags = self.db.execute_query(tags_query, (user_id,))
-        
-        # Yearly totals (books finished per year)
-        yearly_query = """
-            SELECT EXTRACT(YEAR FROM b.date_finished)::TEXT as year, COUNT(*) as count
-            FROM books b
-            WHERE b.user_id = ? AND b.date_finished IS NOT NULL
-            GROUP BY EXTRACT(YEAR FROM b.date_finished)
-            ORDER BY year DESC
-        """
-        # Handle SQLite vs PostgreSQL date extraction
-        if self.db.db_type == 'sqlite':
-            yearly_query = """
-                SELECT strftime('%Y', b.date_finished) as year, COUNT(*) as count
-                FROM books b
-                WHERE b.user_id = ? AND b.date_finished IS NOT NULL
-                GROUP BY strftime('%Y', b.date_finished)
-                ORDER BY year DESC
-            """
-        yearly_totals = self.db.execute_query(yearly_query, (user_id,))
-        
-        # Convert to dict format
-        state_dict = {}
-        for row in state_counts:
-            state_dict[row['state']] = row['count']
-        
-        return {
-            'counts_by_state': {
-                'want_to_read': state_dict.get('want_to_read', 0),
-                'currently_reading': state_dict.get('currently_reading', 0),
-                'read': state_dict.get('read', 0)
-            },
-            'total_public_books': sum(state_dict.values()),
-            'average_rating': float(avg_rating) if avg_rating else None,
-            'rated_count': rated_count,
-            'top_tags': [
-                {
-                    'id': tag['id'],
-                    'name': tag['name'],
-                    'color': tag['color'],
-                    'book_count': tag['book_count']
-                }
-                for tag in top_tags
-            ],
-            'yearly_totals': [
-                {
-                    'year': row['year'],
-                    'count': row['count']
-                }
-                for row in yearly_totals
-            ]
-        }
 
 # Singleton
 _book_service = None
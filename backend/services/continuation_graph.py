@@ -0,0 +1,321 @@
+import threading
+from collections import deque
+
+from services.graph_layout import layered_layout
+
+
+class ContinuationGraph:
+    """In-memory adjacency lists for one user's thought continuations.
+
+    Nodes are the books that take part in at least one continuation. Edges
+    are added and removed in place; derived results (components, longest
+    chain, layout) are cached until the next change. Components are merged
+    incrementally on add_edge and recomputed lazily after a removal.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # book_id -> {'id', 'title', 'author'}
+        self.nodes = {}
+        # book_id -> set of book ids
+        self.outgoing = {}
+        self.incoming = {}
+        # (from_book_id, to_book_id) -> created_at
+        self.edges = {}
+        # Bumped on every change; lets callers cache results derived from the graph
+        self.version = 0
+        # book_id -> component key, component key -> set of book ids (None when stale)
+        self._component_of = {}
+        self._components = {}
+        # Longest chain, acyclic order and layout; cleared on every change
+        self._derived = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, book_id):
+        return book_id in self.nodes
+
+    # -------------------------------------------------------------------------
+    # Mutation
+    # -------------------------------------------------------------------------
+
+    def add_edge(self, from_book, to_book, created_at=None):
+        """Add a continuation; from_book/to_book are {'id', 'title', 'author'} dicts"""
+        from_id = from_book['id']
+        to_id = to_book['id']
+        with self._lock:
+            if (from_id, to_id) in self.edges:
+                return False
+            for book in (from_book, to_book):
+                if book['id'] not in self.nodes:
+                    self.nodes[book['id']] = {'id': book['id'], 'title': book['title'], 'author': book['author']}
+                    self.outgoing[book['id']] = set()
+                    self.incoming[book['id']] = set()
+            self.outgoing[from_id].add(to_id)
+            self.incoming[to_id].add(from_id)
+            self.edges[(from_id, to_id)] = created_at
+            self._merge_components(from_id, to_id)
+            self._derived.clear()
+            self.version += 1
+            return True
+
+    def remove_edge(self, from_id, to_id):
+        """Remove a continuation, dropping books that are left without links"""
+        with self._lock:
+            if (from_id, to_id) not in self.edges:
+                return False
+            del self.edges[(from_id, to_id)]
+            self.outgoing[from_id].discard(to_id)
+            self.incoming[to_id].discard(from_id)
+            for book_id in (from_id, to_id):
+                if not self.outgoing[book_id] and not self.incoming[book_id]:
+                    del self.nodes[book_id]
+                    del self.outgoing[book_id]
+                    del self.incoming[book_id]
+            # Removing an edge can split a component - recompute on next read
+            self._components = None
+            self._derived.clear()
+            self.version += 1
+            return True
+
+    def _merge_components(self, from_id, to_id):
+        if self._components is None:
+            return
+        for book_id in (from_id, to_id):
+            if book_id not in self._component_of:
+                self._component_of[book_id] = book_id
+                self._components[book_id] = {book_id}
+        keep = self._component_of[from_id]
+        other = self._component_of[to_id]
+        if keep == other:
+            return
+        if len(self._components[keep]) < len(self._components[other]):
+            keep, other = other, keep
+        # Relabel the smaller component into the larger one
+        moved = self._components.pop(other)
+        for book_id in moved:
+            self._component_of[book_id] = keep
+        self._components[keep] |= moved
+
+    def _ensure_components(self):
+        if self._components is not None:
+            return
+        self._component_of = {}
+        self._components = {}
+        for start in self.nodes:
+            if start in self._component_of:
+                continue
+            members = set(self._walk(start, 'both'))
+            for book_id in members:
+                self._component_of[book_id] = start
+            self._components[start] = members
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def _neighbors(self, book_id, direction):
+        if direction == 'forward':
+            return self.outgoing[book_id]
+        if direction == 'backward':
+            return self.incoming[book_id]
+        return self.outgoing[book_id] | self.incoming[book_id]
+
+    def _walk(self, start, direction, max_depth=None):
+        """BFS from start; yields book ids in visit order"""
+        visited = {start: 0}
+        queue = deque([start])
+        while queue:
+            book_id = queue.popleft()
+            yield book_id
+            depth = visited[book_id]
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for next_id in self._neighbors(book_id, direction):
+                if next_id not in visited:
+                    visited[next_id] = depth + 1
+                    queue.append(next_id)
+
+    def neighborhood(self, book_id, radius=1, direction='both'):
+        """Books within `radius` links of book_id, with the edges between them"""
+        with self._lock:
+            if book_id not in self.nodes:
+                return None
+            members = set(self._walk(book_id, direction, radius))
+            return self._subgraph(members)
+
+    def component(self, book_id):
+        """The connected component (ignoring link direction) containing book_id"""
+        with self._lock:
+            if book_id not in self.nodes:
+                return None
+            self._ensure_components()
+            return self._subgraph(self._components[self._component_of[book_id]])
+
+    def components(self):
+        """Member sets of every component, largest first (ties by smallest book id)"""
+        with self._lock:
+            self._ensure_components()
+            return sorted(
+                (set(members) for members in self._components.values()),
+                key=lambda members: (-len(members), min(members))
+            )
+
+    def is_reachable(self, from_id, to_id):
+        """Whether to_id can be reached from from_id by following links forward"""
+        return self.shortest_path(from_id, to_id) is not None
+
+    def shortest_path(self, from_id, to_id):
+        """Fewest-links forward path from from_id to to_id as a list of ids, or None"""
+        with self._lock:
+            if from_id not in self.nodes or to_id not in self.nodes:
+                return None
+            parents = {from_id: None}
+            queue = deque([from_id])
+            while queue:
+                book_id = queue.popleft()
+                if book_id == to_id:
+                    path = []
+                    while book_id is not None:
+                        path.append(book_id)
+                        book_id = parents[book_id]
+                    return path[::-1]
+                for next_id in self.outgoing[book_id]:
+                    if next_id not in parents:
+                        parents[next_id] = book_id
+                        queue.append(next_id)
+            return None
+
+    def longest_chain(self):
+        """Longest run of forward links as a list of book ids.
+
+        Longest simple path is NP-hard once cycles exist, so cycles are broken
+        at the back edges of a depth-first search (visiting books in id order)
+        and the longest path of the remaining DAG is returned.
+        """
+        with self._lock:
+            if 'longest_chain' not in self._derived:
+                self._derived['longest_chain'] = self._compute_longest_chain()
+            return list(self._derived['longest_chain'])
+
+    def _acyclic_order(self):
+        """Reverse topological order and back edges of a DFS in book id order.
+
+        Dropping the back edges (edges into a book still on the DFS stack)
+        leaves a DAG, and every book comes after all of its DAG successors.
+        """
+        if 'dag' in self._derived:
+            return self._derived['dag']
+
+        state = {}
+        order = []
+        back_edges = set()
+        for root in sorted(self.nodes):
+            if root in state:
+                continue
+            state[root] = 'open'
+            stack = [(root, iter(sorted(self.outgoing[root])))]
+            while stack:
+                book_id, children = stack[-1]
+                for child in children:
+                    child_state = state.get(child)
+                    if child_state is None:
+                        state[child] = 'open'
+                        stack.append((child, iter(sorted(self.outgoing[child]))))
+                        break
+                    if child_state == 'open':
+                        back_edges.add((book_id, child))
+                else:
+                    state[book_id] = 'done'
+                    order.append(book_id)
+                    stack.pop()
+
+        self._derived['dag'] = (order, back_edges)
+        return order, back_edges
+
+    def _compute_longest_chain(self):
+        order, back_edges = self._acyclic_order()
+        length = {}
+        successor = {}
+        for book_id in order:
+            best = 0
+            best_next = None
+            for child in self.outgoing[book_id]:
+                if (book_id, child) in back_edges:
+                    continue
+                if length[child] + 1 > best or (length[child] + 1 == best and child < best_next):
+                    best = length[child] + 1
+                    best_next = child
+            length[book_id] = best
+            successor[book_id] = best_next
+
+        if not length:
+            return []
+        start = min(length, key=lambda book_id: (-length[book_id], book_id))
+        chain = []
+        while start is not None:
+            chain.append(start)
+            start = successor[start]
+        return chain
+
+    def layout(self):
+        """Cached GraphLayout with x/y coordinates for every book"""
+        with self._lock:
+            if 'layout' not in self._derived:
+                order, back_edges = self._acyclic_order()
+                dag_edges = [edge for edge in self.edges if edge not in back_edges]
+                self._derived['layout'] = layered_layout(order[::-1], dag_edges, self.components())
+            return self._derived['layout']
+
+    # -------------------------------------------------------------------------
+    # Serialization
+    # -------------------------------------------------------------------------
+
+    def _subgraph(self, members, layout=None):
+        edges = [
+            {'from': from_id, 'to': to_id, 'created_at': self.edges[(from_id, to_id)]}
+            for from_id in sorted(members)
+            for to_id in sorted(self.outgoing[from_id])
+            if to_id in members
+        ]
+        nodes = [self.nodes[book_id] for book_id in sorted(members)]
+        if layout is not None:
+            nodes = [{**node, **layout.position(node['id'])} for node in nodes]
+        return {
+            'nodes': nodes,
+            'edges': edges
+        }
+
+    def to_dict(self, offset=0, limit=None, bbox=None):
+        """Nodes (with layout coordinates) and edges for visualization.
+
+        Components are ordered largest first; offset/limit select a slice of
+        them so very large graphs can be fetched a component at a time.
+        bbox=(min_x, min_y, max_x, max_y) keeps only the nodes inside that
+        viewport, plus the edges touching them and their other endpoints.
+        """
+        with self._lock:
+            layout = self.layout()
+            components = self.components()
+            total_components = len(components)
+            page = components[offset:offset + limit if limit is not None else None]
+            members = set().union(*page) if page else set()
+
+            if bbox is not None:
+                visible = layout.within(*bbox) & members
+                # Keep edges leaving the viewport drawable
+                members = visible | {
+                    neighbor
+                    for book_id in visible
+                    for neighbor in self.outgoing[book_id] | self.incoming[book_id]
+                    if neighbor in members
+                }
+
+            graph = self._subgraph(members, layout)
+            graph['total_components'] = total_components
+            graph['offset'] = offset
+            graph['limit'] = limit
+            graph['component_sizes'] = [len(component) for component in page]
+            graph['bounds'] = layout.bounds()
+            return graph
@@ -1,10 +1,26 @@
+import threading
 from database.db import get_db
+from services.continuation_graph import ContinuationGraph
+
+# Upper bound on how many links get_chain follows from the starting book
+MAX_CHAIN_DEPTH = 500
+
+# Up to this max_depth get_chain's walk carries a depth and stops there. A book
+# reachable at several depths gets a row at each, so for deeper walks marking
+# each book visited once (and walking its whole component) is cheaper
+BOUNDED_WALK_MAX_DEPTH = 16
 
 class ContinuationService:
     """Service for managing thought continuations between books"""
     
     def __init__(self):
         self.db = get_db()
+        # user_id -> ContinuationGraph, loaded on first use and kept in step
+        # with add_continuation/remove_continuation (None = all users)
+        self._graphs = {}
+        self._graphs_lock = threading.Lock()
+        # Bumped under the lock on every change, so a graph loaded across one is not cached
+        self._graphs_changes = 0
     
     def add_continuation(self, from_book_id, to_book_id):
         """Add a thought continuation link"""
@@ -13,15 +29,22 @@ class ContinuationService:
             VALUES (?, ?)
         """
         self.db.execute_update(query, (from_book_id, to_book_id))
+        
+        self._add_to_graphs(from_book_id, to_book_id)
         return True
     
     def remove_continuation(self, from_book_id, to_book_id):
         """Remove a continuation link"""
         query = """
-            DELETE FROM thought_continuations 
+            DELETE FROM thought_continuations
             WHERE from_book_id = ? AND to_book_id = ?
         """
         self.db.execute_update(query, (from_book_id, to_book_id))
+        
+        with self._graphs_lock:
+            self._graphs_changes += 1
+            for graph in self._graphs.values():
+                graph.remove_edge(from_book_id, to_book_id)
         return True
     
     def get_continuations_from(self, book_id):
@@ -59,79 +82,256 @@ class ContinuationService:
         """
         return self.db.execute_query(query)
     
-    def get_continuation_graph(self):
-        """Get graph data for visualization"""
-        continuations = self.get_all_continuations()
+    def get_continuation_graph(self, user_id=None, offset=0, limit=None, bbox=None):
+        """
+        Get graph data for visualization with precomputed node coordinates.
+        
+        The layout is computed once per graph change and cached with the graph.
+        offset/limit page by connected component; bbox=(min_x, min_y, max_x, max_y)
+        returns only the part of the layout inside that viewport.
+        """
+        return self.get_graph(user_id).to_dict(offset, limit, bbox)
+    
+    # -------------------------------------------------------------------------
+    # In-memory graph
+    # -------------------------------------------------------------------------
+    
+    def get_graph(self, user_id=None):
+        """Get the cached ContinuationGraph for a user (None = every user), loading it once"""
+        with self._graphs_lock:
+            graph = self._graphs.get(user_id)
+            changes = self._graphs_changes
+        if graph is not None:
+            return graph
         
-        # Build nodes and edges
-        nodes = {}
+        graph = self._load_graph(user_id)
+        with self._graphs_lock:
+            if self._graphs_changes != changes:
+                # A link changed while loading, maybe after the query read it - serve
+                # this graph once but let the next request load a fresh one
+                return graph
+            # Another request may have loaded it meanwhile - keep the first one
+            return self._graphs.setdefault(user_id, graph)
+    
+    def invalidate_graph(self, user_id=None):
+        """Drop cached graphs after changes made outside this service (book edits, deletes, imports)"""
+        with self._graphs_lock:
+            self._graphs_changes += 1
+            self._graphs.pop(user_id, None)
+            self._graphs.pop(None, None)
+    
+    def _load_graph(self, user_id):
+        query = """
+            SELECT tc.from_book_id, tc.to_book_id, tc.created_at,
+                   bf.title as from_title, bf.author as from_author,
+                   bt.title as to_title, bt.author as to_author
+            FROM thought_continuations tc
+            JOIN books bf ON tc.from_book_id = bf.id
+            JOIN books bt ON tc.to_book_id = bt.id
+        """
+        params = []
+        if user_id is not None:
+            query += " WHERE bf.user_id = ? AND bt.user_id = ?"
+            params = [user_id, user_id]
+        
+        graph = ContinuationGraph()
+        for row in self.db.execute_query(query, params):
+            graph.add_edge(
+                {'id': row['from_book_id'], 'title': row['from_title'], 'author': row['from_author']},
+                {'id': row['to_book_id'], 'title': row['to_title'], 'author': row['to_author']},
+                row['created_at']
+            )
+        return graph
+    
+    def _add_to_graphs(self, from_book_id, to_book_id):
+        with self._graphs_lock:
+            self._graphs_changes += 1
+            if not self._graphs:
+                return  # Nothing cached; the next load reads the new link
+        query = """
+            SELECT tc.created_at,
+                   bf.title as from_title, bf.author as from_author, bf.user_id as from_user_id,
+                   bt.title as to_title, bt.author as to_author, bt.user_id as to_user_id
+            FROM thought_continuations tc
+            JOIN books bf ON tc.from_book_id = bf.id
+            JOIN books bt ON tc.to_book_id = bt.id
+            WHERE tc.from_book_id = ? AND tc.to_book_id = ?
+        """
+        rows = self.db.execute_query(query, (from_book_id, to_book_id))
+        if not rows:
+            return
+        row = rows[0]
+        
+        user_ids = [None]
+        if row['from_user_id'] == row['to_user_id']:
+            user_ids.append(row['from_user_id'])
+        with self._graphs_lock:
+            for key in user_ids:
+                graph = self._graphs.get(key)
+                if graph is not None:
+                    graph.add_edge(
+                        {'id': from_book_id, 'title': row['from_title'], 'author': row['from_author']},
+                        {'id': to_book_id, 'title': row['to_title'], 'author': row['to_author']},
+                        row['created_at']
+                    )
+    
+    def get_neighborhood(self, book_id, user_id=None, radius=1, direction='both'):
+        """Books within `radius` links of a book, or None if it has no links"""
+        if direction not in ('forward', 'backward', 'both'):
+            raise ValueError("direction must be 'forward', 'backward' or 'both'")
+        return self.get_graph(user_id).neighborhood(book_id, max(0, min(int(radius), MAX_CHAIN_DEPTH)), direction)
+    
+    def get_component(self, book_id, user_id=None):
+        """All books linked to a book, ignoring link direction, or None if it has no links"""
+        return self.get_graph(user_id).component(book_id)
+    
+    def get_longest_chain(self, user_id=None):
+        """The longest run of forward continuations as a list of book nodes"""
+        graph = self.get_graph(user_id)
+        chain = graph.longest_chain()
+        return [graph.nodes[book_id] for book_id in chain if book_id in graph]
+    
+    def get_path(self, from_book_id, to_book_id, user_id=None):
+        """Shortest forward path between two books as a list of book ids, or None if unreachable"""
+        return self.get_graph(user_id).shortest_path(from_book_id, to_book_id)
+    
+    def get_chain(self, book_id, direction='both', user_id=None, max_depth=None):
+        """
+        Get the complete chain of books connected to this book in one round-trip.
+        
+        A single WITH RECURSIVE query walks thought_continuations forward
+        (books continuing from this one), backward (books this one continues),
+        or both (the whole connected chain), and returns the edges between the
+        books it reached. The recursive step uses UNION rather than UNION ALL,
+        so the CTE acts as a visited set and cycles stop. Up to
+        BOUNDED_WALK_MAX_DEPTH the walk also carries its depth and stops at
+        max_depth, so a short chain out of a large component never scans the
+        rest of it; deeper walks expand each book once, however many paths
+        lead to it. Depth and direction come from a BFS over the returned
+        edges; books deeper than max_depth are dropped.
+        
+        Returns {'books': [...], 'edges': [...]} with books ordered by depth,
+        or None if the book does not exist (or is not the user's).
+        """
+        if direction not in ('forward', 'backward', 'both'):
+            raise ValueError("direction must be 'forward', 'backward' or 'both'")
+        
+        max_depth = MAX_CHAIN_DEPTH if max_depth is None else max(0, min(int(max_depth), MAX_CHAIN_DEPTH))
+        
+        if direction == 'forward':
+            join_condition = "tc.from_book_id = w.id"
+            next_id = "tc.to_book_id"
+        elif direction == 'backward':
+            join_condition = "tc.to_book_id = w.id"
+            next_id = "tc.from_book_id"
+        else:
+            join_condition = "(tc.from_book_id = w.id OR tc.to_book_id = w.id)"
+            next_id = "CASE WHEN tc.from_book_id = w.id THEN tc.to_book_id ELSE tc.from_book_id END"
+        
+        root_filter = ""
+        step_filter = ""
+        params = [book_id]
+        if user_id is not None:
+            root_filter = " AND b.user_id = ?"
+            step_filter = " AND nb.user_id = ?"
+            params.extend([user_id, user_id])
+        
+        if max_depth <= BOUNDED_WALK_MAX_DEPTH:
+            # UNION drops repeated (book, depth) rows, which ends cycles
+            params.append(max_depth)
+            walk = f"""
+                walk(id, depth) AS (
+                    SELECT b.id, 0
+                    FROM books b
+                    WHERE b.id = ?{root_filter}
+                    UNION
+                    SELECT {next_id}, w.depth + 1
+                    FROM walk w
+                    JOIN thought_continuations tc ON {join_condition}
+                    JOIN books nb ON nb.id = {next_id}{step_filter}
+                    WHERE w.depth < ?
+                ),
+                chain(id) AS (
+                    SELECT DISTINCT id FROM walk
+                )"""
+        else:
+            walk = f"""
+                chain(id) AS (
+                    SELECT b.id
+                    FROM books b
+                    WHERE b.id = ?{root_filter}
+                    UNION
+                    SELECT {next_id}
+                    FROM chain w
+                    JOIN thought_continuations tc ON {join_condition}
+                    JOIN books nb ON nb.id = {next_id}{step_filter}
+                )"""
+        # One row per (book, outgoing edge inside the chain); books without
+        # such an edge come back once with NULL edge columns
+        query = f"""
+            WITH RECURSIVE {walk}
+            SELECT b.*,
+                   tc.from_book_id AS edge_from, tc.to_book_id AS edge_to,
+                   tc.created_at AS edge_created_at
+            FROM chain w
+            JOIN books b ON b.id = w.id
+            LEFT JOIN thought_continuations tc
+                ON tc.from_book_id = w.id AND tc.to_book_id IN (SELECT id FROM chain)
+        """
+        rows = self.db.execute_query(query, params)
+        if not rows:
+            return None
+        
+        books = {}
         edges = []
+        outgoing = {}
+        incoming = {}
+        for row in rows:
+            edge_from = row.pop('edge_from')
+            edge_to = row.pop('edge_to')
+            edge_created_at = row.pop('edge_created_at')
+            books.setdefault(row['id'], row)
+            if edge_from is not None:
+                edges.append({
+                    'from': edge_from,
+                    'to': edge_to,
+                    'created_at': edge_created_at
+                })
+                outgoing.setdefault(edge_from, []).append(edge_to)
+                incoming.setdefault(edge_to, []).append(edge_from)
+        
+        # Level-by-level BFS from the starting book; forward steps win ties
+        visited = {book_id: (0, 'start')}
+        frontier = [book_id]
+        depth = 0
+        while frontier and depth < max_depth:
+            depth += 1
+            next_frontier = []
+            for current_id in frontier:
+                steps = []
+                if direction != 'backward':
+                    steps.extend((next_book, 'forward') for next_book in outgoing.get(current_id, ()))
+                if direction != 'forward':
+                    steps.extend((next_book, 'backward') for next_book in incoming.get(current_id, ()))
+                for next_book, step_direction in steps:
+                    if next_book not in visited:
+                        visited[next_book] = (depth, step_direction)
+                        next_frontier.append(next_book)
+            frontier = next_frontier
         
-        for cont in continuations:
-            # Add nodes
-            if cont['from_book_id'] not in nodes:
-                nodes[cont['from_book_id']] = {
-                    'id': cont['from_book_id'],
-                    'title': cont['from_title'],
-                    'author': cont['from_author']
-                }
-            if cont['to_book_id'] not in nodes:
-                nodes[cont['to_book_id']] = {
-                    'id': cont['to_book_id'],
-                    'title': cont['to_title'],
-                    'author': cont['to_author']
-                }
-            
-            # Add edge
-            edges.append({
-                'from': cont['from_book_id'],
-                'to': cont['to_book_id'],
-                'created_at': cont['created_at']
-            })
+        chain = [
+            {**books[chain_book_id], 'depth': book_depth, 'direction': book_direction}
+            for chain_book_id, (book_depth, book_direction)
+            in sorted(visited.items(), key=lambda item: (item[1][0], item[0]))
+        ]
         
         return {
-            'nodes': list(nodes.values()),
-            'edges': edges
+            'book_id': book_id,
+            'direction': direction,
+            'max_depth': max_depth,
+            'books': chain,
+            'edges': [e for e in edges if e['from'] in visited and e['to'] in visited]
         }
-    
-    def get_chain(self, book_id, direction='both'):
-        """Get the complete chain of books connected to this book"""
-        visited = set()
-        chain = []
-        
-        def traverse(current_id, is_forward):
-            if current_id in visited:
-                return
-            
-            visited.add(current_id)
-            
-            # Get book info
-            book_query = "SELECT * FROM books WHERE id = ?"
-            book_result = self.db.execute_query(book_query, (current_id,))
-            if book_result:
-                chain.append({
-                    **book_result[0],
-                    'direction': 'forward' if is_forward else 'backward'
-                })
-            
-            # Traverse connections
-            if is_forward or direction == 'both':
-                next_books = self.get_continuations_from(current_id)
-                for book in next_books:
-                    traverse(book['id'], True)
-            
-            if not is_forward or direction == 'both':
-                prev_books = self.get_continuations_to(current_id)
-                for book in prev_books:
-                    traverse(book['id'], False)
-        
-        # Start traversal
-        if direction in ['forward', 'both']:
-            traverse(book_id, True)
-        if direction in ['backward', 'both']:
-            traverse(book_id, False)
-        
-        return chain
 
 # Singleton
 _continuation_service = None
@@ -1,57 +1,154 @@
 import requests
 import os
-from PIL import Image
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from database.db import get_db
+from services.cover_store import get_cover_store
+from services.http_client import get_http_client
+from services.response_cache import ResponseCache
 
-def fetch_and_save_cover(book_id, title, isbn=None, isbn13=None, cover_url=None):
-    """
-    Fetch cover image from Open Library and save it locally
-    Returns the filename if successful, None otherwise
-    """
+OPEN_LIBRARY_COVERS = "https://covers.openlibrary.org/b/"
+
+# Open Library answers unknown covers with a tiny placeholder instead of a 404
+MIN_COVER_BYTES = 1000
+
+# How long a lookup's outcome is remembered; misses are retried sooner
+FOUND_TTL = 90 * 24 * 60 * 60
+NOT_FOUND_TTL = 24 * 60 * 60
+
+# Candidate URLs probed at once (per-host limits in the HTTP client still apply),
+# and books fetched at once by fetch_covers or in the background
+PROBE_WORKERS = 16
+FETCH_WORKERS = 4
+
+# Separate pools: book-level fetches block on their probes
+_probe_pool = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix='cover-probe')
+_background_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='cover-fetch')
+
+# Cover digest (or None) per (isbn13, isbn, cover_url); concurrent identical lookups share one fetch
+_lookups = None
+
+def _get_lookups():
+    global _lookups
+    if _lookups is None:
+        _lookups = ResponseCache(
+            os.path.join(get_cover_store().root, 'lookups.db'),
+            negative_ttl=NOT_FOUND_TTL,
+            stale_ttl=0
+        )
+    return _lookups
+
+def cover_candidates(isbn=None, isbn13=None, cover_url=None):
+    """URLs that may hold a book's cover, best first"""
+    candidates = []
+    for number in (isbn13, isbn):
+        if number:
+            candidates += [f"{OPEN_LIBRARY_COVERS}isbn/{number}-{size}.jpg" for size in ('L', 'M')]
+    if cover_url and 'covers.openlibrary.org' in cover_url:
+        candidates.append(cover_url)
+    return candidates
+
+def _probe(url):
+    """Image bytes at url, or None for a miss or a placeholder; raises on network failure"""
+    response = get_http_client().get(url, timeout=10)
+    if response.status_code == 200 and len(response.content) > MIN_COVER_BYTES:
+        return response.content
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return None
+
+def _fetch_best(candidates):
+    """Store the best available candidate and return its digest, or None if none has a cover.
     
-    def fetch_cover_bytes(isbn=None, cover_url=None):
-        """Helper to fetch cover image bytes"""
-        base_url = "https://covers.openlibrary.org/b/"
-        
-        # Try ISBN13 first
-        if isbn13:
-            for size in ['L', 'M']:
-                url = f"{base_url}isbn/{isbn13}-{size}.jpg"
-                try:
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200 and len(response.content) > 1000:
-                        return response.content
-                except:
-                    continue
-        
-        # Try ISBN
-        if isbn:
-            for size in ['L', 'M']:
-                url = f"{base_url}isbn/{isbn}-{size}.jpg"
-                try:
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200 and len(response.content) > 1000:
-                        return response.content
-                except:
-                    continue
-        
-        # Try cover_url from database
-        if cover_url and 'covers.openlibrary.org' in cover_url:
+    All candidates are requested at once. The result is the first
+    candidate (in preference order) that returned an image, taken as soon
+    as every candidate ahead of it has missed, so the common case costs one
+    round trip instead of up to five sequential timeouts. Raises if nothing
+    was found but some request failed, so the miss is not cached.
+    """
+    futures = {_probe_pool.submit(_probe, url): position for position, url in enumerate(candidates)}
+    outcomes = [None] * len(candidates)  # ('hit', bytes) / ('miss',) / ('error', e)
+    try:
+        for future in as_completed(futures):
+            position = futures[future]
             try:
-                response = requests.get(cover_url, timeout=10)
-                if response.status_code == 200 and len(response.content) > 1000:
-                    return response.content
-            except:
-                pass
-        
+                image_bytes = future.result()
+                outcomes[position] = ('hit', image_bytes) if image_bytes else ('miss',)
+            except requests.RequestException as e:
+                outcomes[position] = ('error', e)
+            
+            for index, outcome in enumerate(outcomes):
+                if outcome is None:
+                    break  # A better candidate is still pending
+                if outcome[0] == 'hit':
+                    try:
+                        return get_cover_store().put(outcome[1])
+                    except ValueError as e:
+                        print(f"Discarding cover from {candidates[index]}: {e}")
+                        outcomes[index] = ('miss',)
+    finally:
+        for future in futures:
+            future.cancel()
+    
+    errors = [outcome[1] for outcome in outcomes if outcome[0] == 'error']
+    if errors:
+        raise errors[0]
+    return None
+
+def find_cover(isbn=None, isbn13=None, cover_url=None):
+    """Digest of the book's cover in the local store, fetching it if needed; None if there is none"""
+    candidates = cover_candidates(isbn, isbn13, cover_url)
+    if not candidates:
         return None
     
-    # Fetch the cover
-    image_bytes = fetch_cover_bytes(isbn, cover_url)
-    if not image_bytes:
+    lookups = _get_lookups()
+    key = f"cover:{isbn13 or ''}:{isbn or ''}:{cover_url or ''}"
+    try:
+        digest = lookups.get(key, lambda: _fetch_best(candidates), FOUND_TTL)
+        if digest and not get_cover_store().find(digest):
+            # Store was cleared since the lookup - fetch again
+            digest = _fetch_best(candidates)
+            lookups.set(key, digest, FOUND_TTL)
+        return digest
+    except requests.RequestException as e:
+        print(f"Error fetching cover for {key}: {e}")
         return None
+
+def fetch_and_save_cover(book_id, title, isbn=None, isbn13=None, cover_url=None):
+    """
+    Fetch cover image from Open Library into the local cover store and
+    record it on the book (books.cover_hash)
+    Returns the cover digest if successful, None otherwise
+    """
+    digest = find_cover(isbn, isbn13, cover_url)
+    if digest:
+        get_db().execute_update("UPDATE books SET cover_hash = ? WHERE id = ?", (digest, book_id))
+    return digest
+
+def fetch_covers(books, workers=FETCH_WORKERS):
+    """Fetch covers for many books concurrently.
     
-    # Spine storage has been removed - cover images are stored via cover_image_url in database only
-    # This function now just validates that a cover can be fetched, but doesn't save it locally
-    return "cover_available"  # Return a placeholder to indicate cover was found
+    books are dicts with id, title, isbn, isbn13 and cover_image_url.
+    Yields (book, digest or None) as each finishes.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                fetch_and_save_cover, book['id'], book['title'],
+                book.get('isbn'), book.get('isbn13'), book.get('cover_image_url')
+            ): book
+            for book in books
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
 
+def queue_cover_fetch(book):
+    """Fetch a newly added book's cover in the background"""
+    def run():
+        try:
+            fetch_and_save_cover(
+                book['id'], book['title'], book.get('isbn'), book.get('isbn13'), book.get('cover_image_url')
+            )
+        except Exception as e:
+            print(f"Background cover fetch for book {book['id']} failed: {e}")
+    
+    _background_pool.submit(run)
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import re
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+
+# Stored formats: Pillow format name -> (extension, MIME type)
+IMAGE_TYPES = {
+    'JPEG': ('jpg', 'image/jpeg'),
+    'PNG': ('png', 'image/png'),
+    'GIF': ('gif', 'image/gif'),
+    'WEBP': ('webp', 'image/webp')
+}
+
+# Thumbnail widths generated for every cover; requests snap up to the nearest one
+THUMBNAIL_WIDTHS = (64, 160, 400)
+
+# Thumbnail encodings: WebP for browsers that accept it, progressive JPEG otherwise
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True})
+}
+
+_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+class CoverStore:
+    """Cover images on disk, named by the SHA-256 of their bytes.
+
+    Identical images (the same edition shelved by many users, or several
+    ISBNs resolving to one cover) are stored once. Files never change once
+    written, so anything keyed by digest can be cached forever. Each cover
+    gets THUMBNAIL_WIDTHS-wide WebP and JPEG thumbnails alongside it, so
+    lists never send the full-size image. Layout:
+    <root>/<first two hex digits>/<digest>.<ext>
+    <root>/<first two hex digits>/<digest>.w<width>.<webp|jpg>
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def put(self, image_bytes):
+        """Store image bytes and return their digest; ValueError if they are not an image we serve"""
+        try:
+            with Image.open(BytesIO(image_bytes)) as image:
+                image_format = image.format
+                image.verify()
+        except Exception as e:
+            raise ValueError(f"Not a readable image: {e}")
+        if image_format not in IMAGE_TYPES:
+            raise ValueError(f"Unsupported image format {image_format}")
+
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        path = self._path(digest, IMAGE_TYPES[image_format][0])
+        if os.path.exists(path):
+            return digest  # Already stored
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write(path, image_bytes)
+        try:
+            self._make_thumbnails(digest, path)
+        except OSError as e:
+            print(f"Warning: thumbnails for cover {digest} failed: {e}")  # find() retries
+        return digest
+
+    def find(self, digest, width=None, webp=False):
+        """(path, mimetype) of a stored cover, or None.
+
+        With a width, returns the smallest thumbnail at least that wide (or
+        the original if it is wider than every thumbnail), as WebP when webp
+        is true. Thumbnails missing from older covers are made on first use.
+        """
+        if not _DIGEST.match(digest or ''):
+            return None
+        original = None
+        for extension, mimetype in IMAGE_TYPES.values():
+            path = self._path(digest, extension)
+            if os.path.exists(path):
+                original = (path, mimetype)
+                break
+        if original is None or not width:
+            return original
+
+        size = next((candidate for candidate in THUMBNAIL_WIDTHS if candidate >= width), None)
+        if size is None:
+            return original
+        extension = 'webp' if webp else 'jpg'
+        path = self._path(digest, f"w{size}.{extension}")
+        if not os.path.exists(path):
+            try:
+                self._make_thumbnails(digest, original[0])
+            except OSError as e:
+                print(f"Warning: thumbnails for cover {digest} failed: {e}")
+                return original
+        return path, THUMBNAIL_FORMATS[extension][1]
+
+    def _make_thumbnails(self, digest, original_path):
+        with Image.open(original_path) as image:
+            # JPEG covers decode straight at reduced scale
+            image.draft('RGB', (THUMBNAIL_WIDTHS[-1], image.height * THUMBNAIL_WIDTHS[-1] // image.width))
+            image = image.convert('RGB')
+            # Largest first, each resized from the one before: much cheaper than from the original
+            for width in reversed(THUMBNAIL_WIDTHS):
+                if image.width > width:
+                    image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+                for extension, (image_format, _, options) in THUMBNAIL_FORMATS.items():
+                    buffer = BytesIO()
+                    image.save(buffer, image_format, **options)
+                    self._write(self._path(digest, f"w{width}.{extension}"), buffer.getvalue())
+
+    def _write(self, path, data):
+        # Write then rename, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _path(self, digest, extension):
+        return os.path.join(self.root, digest[:2], f"{digest}.{extension}")
+
+# Singleton
+_cover_store = None
+
+def get_cover_store():
+    global _cover_store
+    if _cover_store is None:
+        _cover_store = CoverStore(os.getenv('COVER_STORE_PATH', 'data/covers'))
+    return _cover_store
@@ -35,21 +35,13 @@ class GoalService:
             raise ValueError('user_id is required')
         
         print(f"🔍 GET_GOAL called: year={year}, user_id={user_id}")
-        query = "SELECT * FROM reading_goals WHERE year = ? AND user_id = ?"
-        results = self.db.execute_query(query, (year, user_id))
-        print(f"📊 Query results: {results}")
+        results = self._get_goals_with_progress(user_id, year)
         
         if not results:
             print(f"❌ No goal found for year {year}, user_id={user_id}")
             return None
         
         goal = results[0]
-        print(f"✅ Found goal: {dict(goal)}")
-        
-        # Calculate progress
-        progress = self.get_goal_progress(year, goal['period'], user_id)
-        goal.update(progress)
-        
         print(f"📦 Returning goal with progress: {dict(goal)}")
         return goal
     
@@ -58,28 +50,31 @@ class GoalService:
         if user_id is None:
             raise ValueError('user_id is required')
         
-        # Count books finished in the year for this user
-        # Only count books with a non-null date_finished that is not in the future
+        # Finished counts come from user_finished_counts; only books dated in
+        # the future (possible from the current year on) need subtracting
         now = datetime.now()
-        current_date = now.strftime('%Y-%m-%d')
-        
-        # For SQLite, use date comparison
-        # Handle both ISO timestamp format (2025-12-30T01:31:23.701Z) and date format (2025-12-30)
-        # Extract just the date portion (first 10 characters) for year comparison
         query = """
-            SELECT COUNT(*) as count
-            FROM books b
-            JOIN reading_states rs ON b.id = rs.book_id
-            WHERE rs.state = 'read'
-            AND b.user_id = ?
-            AND b.date_finished IS NOT NULL
-            AND strftime('%Y', SUBSTR(b.date_finished, 1, 10)) = ?
-            AND SUBSTR(b.date_finished, 1, 10) <= ?
+            SELECT COALESCE((
+                SELECT finished_count FROM user_finished_counts
+                WHERE user_id = ? AND year = ?
+            ), 0) - (
+                SELECT COUNT(*)
+                FROM books b
+                JOIN reading_states rs ON b.id = rs.book_id
+                WHERE b.user_id = ? AND b.finished_year = ? AND b.finished_on > ?
+                AND rs.state = 'read'
+            ) as count
         """
-        result = self.db.execute_query(query, (user_id, str(year), current_date))
+        result = self.db.execute_query(query, (user_id, year, user_id, year, now.strftime('%Y-%m-%d')))
         completed = result[0]['count'] if result else 0
         
-        # Calculate time-based progress
+        return {
+            'completed': completed,
+            'time_progress': self._time_progress(year, period, now)
+        }
+    
+    def _time_progress(self, year, period, now):
+        """Fraction of the goal's period that has elapsed"""
         current_year = now.year
         
         if period == 'year':
@@ -107,10 +102,55 @@ class GoalService:
         else:
             time_progress = 0.0
         
-        return {
-            'completed': completed,
-            'time_progress': round(time_progress, 3)
-        }
+        return round(time_progress, 3)
+    
+    def _get_goals_with_progress(self, user_id, year=None):
+        """Goals (all, or one year's) with their completed counts in a single query"""
+        now = datetime.now()
+        query = """
+            SELECT g.*,
+                   COALESCE(fc.finished_count, 0) - COALESCE(ff.future_count, 0) as completed
+            FROM reading_goals g
+            LEFT JOIN user_finished_counts fc ON fc.user_id = g.user_id AND fc.year = g.year
+            LEFT JOIN (
+                SELECT b.finished_year, COUNT(*) as future_count
+                FROM books b
+                JOIN reading_states rs ON b.id = rs.book_id
+                WHERE b.user_id = ? AND b.finished_year >= ? AND b.finished_on > ?
+                AND rs.state = 'read'
+                GROUP BY b.finished_year
+            ) ff ON ff.finished_year = g.year
+            WHERE g.user_id = ?
+        """
+        params = [user_id, now.year, now.strftime('%Y-%m-%d'), user_id]
+        if year is not None:
+            query += " AND g.year = ?"
+            params.append(year)
+        query += " ORDER BY g.year DESC"
+        
+        goals = self.db.execute_query(query, params)
+        for goal in goals:
+            goal['time_progress'] = self._time_progress(goal['year'], goal['period'], now)
+        return goals
+    
+    def refresh_finished_counts(self, user_id, years):
+        """Recount user_finished_counts rows for the given finished years.
+        
+        Called by BookService whenever a book's reading state, finish date or
+        existence changes. Each recount is an index range scan on
+        (user_id, finished_year), so it stays cheap however large the library.
+        """
+        query = """
+            INSERT INTO user_finished_counts (user_id, year, finished_count)
+            SELECT ?, ?, COUNT(*)
+            FROM books b
+            JOIN reading_states rs ON b.id = rs.book_id
+            WHERE b.user_id = ? AND b.finished_year = ? AND rs.state = 'read'
+            ON CONFLICT(user_id, year) DO UPDATE SET
+                finished_count = excluded.finished_count
+        """
+        for year in sorted({year for year in years if year is not None}):
+            self.db.execute_update(query, (user_id, year, user_id, year))
     
     def get_current_goal(self, user_id=None):
         """Get goal for current year"""
@@ -135,14 +175,7 @@ class GoalService:
         if user_id is None:
             raise ValueError('user_id is required')
         
-        query = "SELECT * FROM reading_goals WHERE user_id = ? ORDER BY year DESC"
-        goals = self.db.execute_query(query, (user_id,))
-        
-        for goal in goals:
-            progress = self.get_goal_progress(goal['year'], goal['period'], user_id)
-            goal.update(progress)
-        
-        return goals
+        return self._get_goals_with_progress(user_id)
     
     def calculate_pace_needed(self, year, target_count, period, user_id=None):
         """Calculate reading pace needed to meet goal"""
@@ -211,12 +244,11 @@ class GoalService:
             LEFT JOIN rankings r ON b.id = r.book_id
             WHERE rs.state = 'read'
             AND b.user_id = ?
-            AND b.date_finished IS NOT NULL
-            AND strftime('%Y', SUBSTR(b.date_finished, 1, 10)) = ?
-            AND SUBSTR(b.date_finished, 1, 10) <= ?
+            AND b.finished_year = ?
+            AND b.finished_on <= ?
             ORDER BY b.date_finished DESC
         """
-        books = self.db.execute_query(query, (user_id, str(year), current_date))
+        books = self.db.execute_query(query, (user_id, year, current_date))
         
         # Fetch tags for all books in one query (avoid N+1 problem)
         if books:
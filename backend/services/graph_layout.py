@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+
+# Distance between layers (x) and between books in one layer (y), in layout units
+LAYER_SPACING = 220.0
+NODE_SPACING = 90.0
+
+# Gap left between packed components, in layout units
+COMPONENT_GAP = 160.0
+
+# Alternating barycenter sweeps used to reduce edge crossings
+ORDERING_SWEEPS = 8
+
+
+class GraphLayout:
+    """Node coordinates from layered_layout, kept as NumPy arrays for viewport queries"""
+
+    def __init__(self, ids, xs, ys):
+        self.ids = ids
+        self.xs = xs
+        self.ys = ys
+        self._index = {book_id: i for i, book_id in enumerate(ids.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, book_id):
+        """{'x', 'y'} for a book, or {} if it is not laid out"""
+        i = self._index.get(book_id)
+        if i is None:
+            return {}
+        return {'x': float(self.xs[i]), 'y': float(self.ys[i])}
+
+    def within(self, min_x, min_y, max_x, max_y):
+        """Set of book ids whose position falls inside the bounding box"""
+        mask = (self.xs >= min_x) & (self.xs <= max_x) & (self.ys >= min_y) & (self.ys <= max_y)
+        return set(self.ids[mask].tolist())
+
+    def bounds(self):
+        if not len(self.ids):
+            return None
+        return {
+            'min_x': float(self.xs.min()),
+            'min_y': float(self.ys.min()),
+            'max_x': float(self.xs.max()),
+            'max_y': float(self.ys.max())
+        }
+
+
+def _rank_within(groups, *keys):
+    """Position of every node inside its group when sorted by keys (first key wins)"""
+    order = np.lexsort(tuple(reversed(keys)) + (groups,))
+    sorted_groups = groups[order]
+    starts = np.ones(len(order), dtype=bool)
+    starts[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    first = np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - first
+    return ranks
+
+
+def layered_layout(topological_order, edges, components):
+    """Layered (Sugiyama-style) layout of a DAG.
+
+    topological_order lists every book with edges only pointing forward in it;
+    edges are (from_id, to_id) pairs; components are the member sets to pack
+    side by side. Books go in the layer after their furthest predecessor
+    (x), are ordered within layers by alternating barycenter sweeps (y), and
+    components are shelf-packed into rows of roughly square total area.
+    """
+    n = len(topological_order)
+    if not n:
+        empty = np.zeros(0)
+        return GraphLayout(np.zeros(0, dtype=np.int64), empty, empty)
+
+    ids = np.array(topological_order, dtype=np.int64)
+    index = {book_id: i for i, book_id in enumerate(topological_order)}
+    src = np.array([index[from_id] for from_id, _ in edges], dtype=np.int64)
+    dst = np.array([index[to_id] for _, to_id in edges], dtype=np.int64)
+
+    # Longest-path layering; relaxing edges in order of their source's
+    # topological position finalizes each source before it is used
+    layer = [0] * n
+    edge_order = np.argsort(src, kind='stable')
+    for from_index, to_index in zip(src[edge_order].tolist(), dst[edge_order].tolist()):
+        if layer[from_index] + 1 > layer[to_index]:
+            layer[to_index] = layer[from_index] + 1
+    layer = np.array(layer, dtype=np.int64)
+
+    component = np.zeros(n, dtype=np.int64)
+    for component_index, members in enumerate(components):
+        component[[index[book_id] for book_id in members]] = component_index
+    groups = component * (int(layer.max()) + 1) + layer
+
+    # Barycenter ordering: down sweeps pull books towards their predecessors,
+    # up sweeps towards their successors; ties keep the previous order
+    position = _rank_within(groups, np.arange(n))
+    for sweep in range(ORDERING_SWEEPS):
+        neighbor, target = (src, dst) if sweep % 2 == 0 else (dst, src)
+        totals = np.bincount(target, weights=position[neighbor], minlength=n)
+        counts = np.bincount(target, minlength=n)
+        barycenter = np.where(counts > 0, totals / np.maximum(counts, 1), position)
+        position = _rank_within(groups, barycenter, position)
+
+    # Center each layer vertically inside its component's band
+    layer_sizes = np.bincount(groups)
+    component_count = int(component.max()) + 1
+    widths = np.zeros(component_count, dtype=np.int64)
+    heights = np.zeros(component_count, dtype=np.int64)
+    np.maximum.at(widths, component, layer + 1)
+    np.maximum.at(heights, component, position + 1)
+    offsets = (heights[component] - layer_sizes[groups]) / 2.0
+
+    # Shelf-pack components (already largest first) into rows
+    widths_px = (widths - 1) * LAYER_SPACING
+    heights_px = (heights - 1) * NODE_SPACING
+    row_limit = max(
+        float(widths_px.max()),
+        math.sqrt(float(np.sum((widths_px + COMPONENT_GAP) * (heights_px + COMPONENT_GAP))))
+    )
+    origin_x = np.zeros(component_count)
+    origin_y = np.zeros(component_count)
+    cursor_x = cursor_y = row_height = 0.0
+    for component_index in range(component_count):
+        if cursor_x > 0 and cursor_x + widths_px[component_index] > row_limit:
+            cursor_x = 0.0
+            cursor_y += row_height + COMPONENT_GAP
+            row_height = 0.0
+        origin_x[component_index] = cursor_x
+        origin_y[component_index] = cursor_y
+        cursor_x += widths_px[component_index] + COMPONENT_GAP
+        row_height = max(row_height, heights_px[component_index])
+
+    xs = origin_x[component] + layer * LAYER_SPACING
+    ys = origin_y[component] + (position + offsets) * NODE_SPACING
+    return GraphLayout(ids, xs, ys)
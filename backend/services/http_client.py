@@ -0,0 +1,239 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics_service import RouteLatency
+
+DEFAULT_TIMEOUT = 10
+
+# Concurrent requests allowed per host; also the keep-alive pool size per host
+MAX_CONNECTIONS_PER_HOST = 8
+
+# Hosts with pooled connections (Open Library, its cover server, Google Books, ...)
+POOL_HOSTS = 16
+
+# Retries after the first attempt for connection errors, timeouts, 429 and 5xx,
+# with full-jitter exponential backoff capped at MAX_BACKOFF seconds
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.25
+MAX_BACKOFF = 5.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Consecutive failures that open a host's circuit, and how long it stays open
+FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 30.0
+
+USER_AGENT = 'Bookshelf/1.0 (personal library app)'
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without contacting a host whose circuit breaker is open"""
+
+
+class HostBusyError(requests.ConnectionError):
+    """Raised when no concurrency slot for a host frees up within the timeout"""
+
+
+class RateLimiter:
+    """Token bucket shared by every thread: rate requests per second, bursts up to burst"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Wait for a token; False if it would take longer than timeout seconds"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            # Reserve the token now; callers queue up behind each other by going negative
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                return False
+            self.tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+class HostState:
+    """Concurrency slots, circuit breaker and latency metrics for one host"""
+
+    def __init__(self, max_connections):
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.latency = RouteLatency()
+        self.counts = {'requests': 0, 'failures': 0, 'retries': 0, 'rejected': 0}
+
+    def allow(self, now):
+        """Whether a request may go out: closed circuit, or the single half-open probe"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if now - self.opened_at >= CIRCUIT_COOLDOWN and not self.probing:
+                self.probing = True
+                return True
+            self.counts['rejected'] += 1
+            return False
+
+    def record(self, ok, seconds):
+        with self.lock:
+            self.counts['requests'] += 1
+            self.latency.observe(seconds)
+            self.probing = False
+            if ok:
+                self.consecutive_failures = 0
+                self.opened_at = None
+                return
+            self.counts['failures'] += 1
+            self.consecutive_failures += 1
+            if self.opened_at is not None or self.consecutive_failures >= FAILURE_THRESHOLD:
+                # A failed probe re-opens the circuit for another cooldown
+                self.opened_at = time.monotonic()
+
+    def release_probe(self, rejected=False):
+        """Give up a request slot before sending (lets another caller probe)"""
+        with self.lock:
+            self.probing = False
+            if rejected:
+                self.counts['rejected'] += 1
+
+    @property
+    def circuit(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if time.monotonic() - self.opened_at >= CIRCUIT_COOLDOWN else 'open'
+
+
+class HttpClient:
+    """Shared client for every outbound HTTP call.
+
+    One requests.Session keeps connections alive across calls. Each host gets
+    at most MAX_CONNECTIONS_PER_HOST concurrent requests, retries with
+    exponential backoff, and a circuit breaker that fails fast for
+    CIRCUIT_COOLDOWN seconds after FAILURE_THRESHOLD consecutive failures,
+    so one slow provider cannot tie up every worker. 404s and other 4xx
+    responses are returned as-is and count as successes.
+    """
+
+    def __init__(self, max_connections_per_host=MAX_CONNECTIONS_PER_HOST, max_retries=MAX_RETRIES):
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=max_connections_per_host)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+        # host -> RateLimiter, shared by every caller of that host
+        self._rate_limits = {}
+
+    def set_rate_limit(self, host, rate, burst=None):
+        """Cap requests to host (e.g. 'openlibrary.org') at rate per second across all threads"""
+        self._rate_limits[host] = RateLimiter(rate, burst)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def request(self, method, url, timeout=DEFAULT_TIMEOUT, retries=None, **kwargs):
+        """Send a request; returns the last response or raises the last error"""
+        netloc = urlparse(url).netloc
+        host = self._host(netloc)
+        rate_limit = self._rate_limits.get(netloc)
+        retries = self.max_retries if retries is None else retries
+
+        for attempt in range(retries + 1):
+            if attempt:
+                host.counts['retries'] += 1
+            if not host.allow(time.monotonic()):
+                raise CircuitOpenError(f"Circuit open for {netloc}")
+            # Waiting for a token or a slot counts against the caller's timeout
+            if rate_limit is not None and not rate_limit.acquire(timeout):
+                host.release_probe(rejected=True)
+                raise HostBusyError(f"Rate limit for {netloc} would delay this request past its timeout")
+            if not host.slots.acquire(timeout=timeout):
+                host.release_probe(rejected=True)
+                raise HostBusyError(f"Too many concurrent requests to {netloc}")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                host.record(False, time.perf_counter() - started)
+                if attempt == retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"HTTP {method} {url} failed ({e}), retrying in {delay:.2f}s")
+            except requests.RequestException:
+                # Too many redirects, a broken body, a bad URL: not worth retrying, but recorded
+                # so a half-open probe that ends this way does not leave the circuit stuck
+                host.record(False, time.perf_counter() - started)
+                raise
+            except BaseException:
+                host.release_probe()
+                raise
+            else:
+                retryable = response.status_code in RETRY_STATUSES
+                host.record(not retryable, time.perf_counter() - started)
+                if not retryable or attempt == retries:
+                    return response
+                delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                response.close()
+            finally:
+                host.slots.release()
+            time.sleep(delay)
+
+    def stats(self):
+        """Per-host request counts, circuit state and latency percentiles (ms)"""
+        with self._hosts_lock:
+            hosts = dict(self._hosts)
+        result = {}
+        for name, host in sorted(hosts.items()):
+            with host.lock:
+                percentiles = host.latency.percentiles()
+                result[name] = {
+                    **host.counts,
+                    'circuit': host.circuit,
+                    'consecutive_failures': host.consecutive_failures,
+                    'p50_ms': round(percentiles[0.5] * 1000, 2) if host.latency.count else None,
+                    'p95_ms': round(percentiles[0.95] * 1000, 2) if host.latency.count else None,
+                    'p99_ms': round(percentiles[0.99] * 1000, 2) if host.latency.count else None
+                }
+        return result
+
+    def _host(self, name):
+        with self._hosts_lock:
+            host = self._hosts.get(name)
+            if host is None:
+                host = HostState(self.max_connections_per_host)
+                self._hosts[name] = host
+            return host
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF)
+            except ValueError:
+                pass  # HTTP-date form - fall back to our own schedule
+        return random.uniform(0, min(MAX_BACKOFF, BACKOFF_BASE * 2 ** attempt))
+
+# Singleton
+_http_client = None
+
+def get_http_client():
+    global _http_client
+    if _http_client is None:
+        _http_client = HttpClient()
+    return _http_client
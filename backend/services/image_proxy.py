@@ -0,0 +1,320 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+
+from services.http_client import get_http_client
+from services.single_flight import SingleFlight
+
+# Hosts the proxy fetches from; other URLs are refused (no open proxy or redirect).
+# The site's apiService.coverUrl loads covers from other hosts directly
+DEFAULT_ALLOWED_HOSTS = (
+    'covers.openlibrary.org',
+    'books.google.com',
+    'i.gr-assets.com',
+    'images.gr-assets.com',
+    'm.media-amazon.com',
+    'images-na.ssl-images-amazon.com'
+)
+
+# Disk budget for cached images; least recently used are evicted down to EVICT_TO of it
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+EVICT_TO = 0.9
+
+# Upstream images larger than this are not cached or served; bodies are streamed
+# to disk and abandoned once they pass it
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Cached images are revalidated upstream (conditional GET) after this long
+REVALIDATE_AFTER = 7 * 24 * 60 * 60
+
+# URLs that 404ed (or were not images) are not retried for this long; at most
+# MAX_MISS_ENTRIES are remembered, oldest forgotten first
+MISS_TTL = 60 * 60
+MAX_MISS_ENTRIES = 10000
+
+# Last-access times are written at most this often per image, not on every hit
+ACCESS_RESOLUTION = 60
+
+# Index rows kept in memory so hits skip SQLite
+MAX_MEMORY_ENTRIES = 4096
+
+
+class ImageProxy:
+    """Disk cache in front of external cover image URLs.
+
+    get(url) returns the cached image's file, fetching it on first use.
+    Concurrent first requests for a URL share one upstream fetch. Entries
+    are revalidated with If-None-Match/If-Modified-Since after
+    REVALIDATE_AFTER, served stale if the upstream is down, and evicted
+    least-recently-used once the cache exceeds max_bytes. The index
+    (URL, content type, ETags, size, access time) lives in SQLite next to
+    the files, so the cache survives restarts.
+    """
+
+    def __init__(self, root, max_bytes=MAX_CACHE_BYTES, allowed_hosts=DEFAULT_ALLOWED_HOSTS):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.allowed_hosts = set(allowed_hosts)
+        self.http = get_http_client()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._misses = OrderedDict()  # url -> retry after, earliest first
+        self._entries = OrderedDict()  # key -> entry, oldest access first
+        self.counts = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stale': 0, 'not_found': 0, 'evicted': 0}
+        os.makedirs(self.root, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS images (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    content_type TEXT NOT NULL,
+                    etag TEXT NOT NULL,
+                    upstream_etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_images_accessed ON images(accessed_at)")
+            self.total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(os.path.join(self.root, 'index.db'), timeout=5)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def allowed(self, url):
+        parsed = urlparse(url or '')
+        return parsed.scheme in ('http', 'https') and parsed.hostname in self.allowed_hosts
+
+    def get(self, url):
+        """Cached entry (path, content_type, etag, size) for an allowed URL, or None if
+        it is not an image upstream. Raises requests.RequestException if the upstream
+        failed and nothing is cached."""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        entry = self._entry(key)
+        now = time.time()
+
+        if entry is not None:
+            if now - entry['accessed_at'] > ACCESS_RESOLUTION:
+                self._touch(key, now)
+                entry['accessed_at'] = now
+            if now - entry['fetched_at'] < REVALIDATE_AFTER:
+                self.counts['hits'] += 1
+                return entry
+            try:
+                return self._flight.do(key, lambda: self._fetch(url, key))
+            except requests.RequestException as e:
+                print(f"Revalidating {url} failed, serving cached copy: {e}")
+                self.counts['stale'] += 1
+                return entry
+
+        with self._lock:
+            retry_after = self._misses.get(url)
+            if retry_after is not None:
+                if retry_after > now:
+                    self.counts['not_found'] += 1
+                    return None
+                del self._misses[url]
+        self.counts['misses'] += 1
+        return self._flight.do(key, lambda: self._fetch(url, key))
+
+    def _fetch(self, url, key):
+        entry = self._entry(key)
+        if entry is not None and time.time() - entry['fetched_at'] < REVALIDATE_AFTER:
+            return entry  # Filled by a fetch that finished just before this one started
+
+        headers = {}
+        if entry is not None:
+            if entry['upstream_etag']:
+                headers['If-None-Match'] = entry['upstream_etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        response = self.http.get(url, headers=headers, timeout=10, stream=True)
+        try:
+            if response.status_code == 304 and entry is not None:
+                self.counts['revalidated'] += 1
+                entry = {**entry, 'fetched_at': time.time()}
+                with self._connect() as conn:
+                    conn.execute("UPDATE images SET fetched_at = ? WHERE key = ?", (entry['fetched_at'], key))
+                self._remember(key, entry)
+                return entry
+            if response.status_code in (404, 410):
+                return self._miss(url, key)
+            response.raise_for_status()
+
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+            try:
+                declared_size = int(response.headers.get('Content-Length', 0))
+            except ValueError:
+                declared_size = 0
+            if not content_type.startswith('image/') or declared_size > MAX_IMAGE_BYTES:
+                return self._miss(url, key)
+            return self._store(url, key, response, content_type)
+        finally:
+            response.close()  # Returns the connection to the pool, or drops a body left unread
+
+    def _store(self, url, key, response, content_type):
+        """Stream the body into the cache; a miss if it grows past MAX_IMAGE_BYTES"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+                    size += len(chunk)
+                    if size > MAX_IMAGE_BYTES:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+            too_large = size > MAX_IMAGE_BYTES
+            if not too_large:
+                os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        if too_large:
+            os.unlink(temp_path)
+            return self._miss(url, key)
+
+        now = time.time()
+        entry = {
+            'path': path,
+            'content_type': content_type,
+            'etag': digest.hexdigest()[:32],
+            'upstream_etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': size,
+            'fetched_at': now,
+            'accessed_at': now
+        }
+        with self._connect() as conn:
+            old = conn.execute("SELECT size FROM images WHERE key = ?", (key,)).fetchone()
+            conn.execute("""
+                INSERT OR REPLACE INTO images (
+                    key, url, content_type, etag, upstream_etag, last_modified, size, fetched_at, accessed_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key, url, content_type, entry['etag'], entry['upstream_etag'], entry['last_modified'],
+                  entry['size'], now, now))
+            with self._lock:
+                self.total_bytes += entry['size'] - (old['size'] if old else 0)
+                over_budget = self.total_bytes > self.max_bytes
+            if over_budget:
+                self._evict(conn)
+        self._remember(key, entry)
+        return entry
+
+    def _miss(self, url, key):
+        now = time.time()
+        with self._lock:
+            self._misses[url] = now + MISS_TTL
+            self._misses.move_to_end(url)
+            # Every entry has the same TTL, so the expired ones are at the front
+            while self._misses and (len(self._misses) > MAX_MISS_ENTRIES or next(iter(self._misses.values())) <= now):
+                self._misses.popitem(last=False)
+        self._delete(key)
+        return None
+
+    def _evict(self, conn):
+        """Remove least recently used images until the cache is back under EVICT_TO of its budget"""
+        target = self.max_bytes * EVICT_TO
+        rows = conn.execute("SELECT key, size FROM images ORDER BY accessed_at").fetchall()
+        for row in rows:
+            if self.total_bytes <= target:
+                break
+            conn.execute("DELETE FROM images WHERE key = ?", (row['key'],))
+            self._forget(row['key'])
+            self._unlink(row['key'])
+            with self._lock:
+                self.total_bytes -= row['size']
+            self.counts['evicted'] += 1
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            with self._connect() as conn:
+                row = conn.execute("SELECT * FROM images WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            entry = {**dict(row), 'path': self._path(key)}
+            self._remember(key, entry)
+        if not os.path.exists(entry['path']):
+            self._forget(key)
+            return None  # File removed under us - refetch
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > MAX_MEMORY_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def _forget(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _touch(self, key, now):
+        with self._connect() as conn:
+            conn.execute("UPDATE images SET accessed_at = ? WHERE key = ?", (now, key))
+
+    def _delete(self, key):
+        with self._connect() as conn:
+            old = conn.execute("SELECT size FROM images WHERE key = ?", (key,)).fetchone()
+            conn.execute("DELETE FROM images WHERE key = ?", (key,))
+        self._forget(key)
+        if old is not None:
+            with self._lock:
+                self.total_bytes -= old['size']
+        self._unlink(key)
+
+    def _unlink(self, key):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def stats(self):
+        return {
+            **self.counts,
+            'coalesced': self._flight.counts['shared'],
+            'total_bytes': self.total_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+# Singleton
+_image_proxy = None
+
+def get_image_proxy():
+    global _image_proxy
+    if _image_proxy is None:
+        hosts = os.getenv('IMAGE_PROXY_HOSTS')
+        _image_proxy = ImageProxy(
+            os.getenv('IMAGE_PROXY_PATH', 'data/image_proxy'),
+            max_bytes=int(float(os.getenv('IMAGE_PROXY_MAX_MB', MAX_CACHE_BYTES / (1024 * 1024))) * 1024 * 1024),
+            allowed_hosts=[host.strip() for host in hosts.split(',') if host.strip()] if hosts else DEFAULT_ALLOWED_HOSTS
+        )
+    return _image_proxy
@@ -0,0 +1,361 @@
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+
+# Where the index is built and looked for unless METADATA_INDEX_PATH is set. Resolved
+# against backend/, so the app (run from backend/) and the ingest script (run from
+# anywhere) find the same file
+DEFAULT_INDEX_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'openlibrary_index.db')
+)
+
+# Rows buffered per executemany/commit while ingesting
+INGEST_BATCH_SIZE = 10000
+
+# Subjects kept per work (only the first few are ever shown as the genre)
+MAX_SUBJECTS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS editions (
+    key TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    norm_title TEXT NOT NULL,
+    author_key TEXT,
+    author_name TEXT,
+    norm_author TEXT,
+    work_key TEXT,
+    isbn_10 TEXT,
+    isbn_13 TEXT,
+    publish_date TEXT,
+    number_of_pages INTEGER,
+    cover_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS isbns (
+    isbn TEXT PRIMARY KEY,
+    edition_key TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS works (
+    key TEXT PRIMARY KEY,
+    title TEXT,
+    author_key TEXT,
+    subjects TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS authors (
+    key TEXT PRIMARY KEY,
+    name TEXT
+) WITHOUT ROWID;
+"""
+
+_NON_WORD = re.compile(r'[^\w\s]')
+
+
+def normalize(text):
+    """Lowercase, strip punctuation and collapse whitespace, for exact title/author keys"""
+    if not text:
+        return ''
+    return ' '.join(_NON_WORD.sub(' ', str(text).lower()).split())
+
+
+def isbn10_to_isbn13(isbn10):
+    if not isbn10 or len(isbn10) != 10 or not isbn10[:9].isdigit():
+        return None
+    prefix = '978' + isbn10[:9]
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(prefix))
+    return prefix + str((10 - total % 10) % 10)
+
+
+def _clean_isbn(value):
+    return str(value).replace('-', '').replace(' ', '').upper()
+
+
+def _first_key(refs, nested=None):
+    """Key of the first {'key': ...} (or {nested: {'key': ...}}) reference"""
+    for ref in refs or []:
+        if nested and isinstance(ref, dict):
+            ref = ref.get(nested)
+        if isinstance(ref, dict) and ref.get('key'):
+            return ref['key']
+    return None
+
+
+def parse_dump_line(line):
+    """(type, record) for a dump line, or None.
+
+    Accepts the official tab-separated dumps (type, key, revision,
+    last_modified, JSON) and plain JSON lines with a 'type' reference.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith('/type/'):
+        parts = line.split('\t', 4)
+        if len(parts) != 5:
+            return None
+        record_type, payload = parts[0], parts[4]
+    elif line.startswith('{'):
+        payload = line
+        record_type = None
+    else:
+        return None
+
+    try:
+        record = json.loads(payload)
+    except ValueError:
+        return None
+    if record_type is None:
+        record_type = (record.get('type') or {}).get('key')
+    return record_type, record
+
+
+class MetadataIndex:
+    """Local SQLite index of Open Library editions, works and authors.
+
+    Built by ingest() from dump files (see scripts/ingest_openlibrary_dump.py)
+    and queried by MetadataService before going to the network. Lookups are
+    by ISBN-10/13, by normalized title (+ author), or full-text on titles and
+    author names. Returned dicts match MetadataService's own formats.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    @classmethod
+    def open_if_exists(cls, path):
+        """The index at path, or None if it has not been built"""
+        return cls(path) if path and os.path.exists(path) else None
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def find_by_isbn(self, isbn):
+        """Edition detail for an ISBN-10 or ISBN-13, or None"""
+        row = self._conn().execute("""
+            SELECT e.*, w.subjects
+            FROM isbns i
+            JOIN editions e ON e.key = i.edition_key
+            LEFT JOIN works w ON w.key = e.work_key
+            WHERE i.isbn = ?
+        """, (_clean_isbn(isbn),)).fetchone()
+        if row is None:
+            return None
+        subjects = json.loads(row['subjects']) if row['subjects'] else []
+        return {
+            'title': row['title'],
+            'author': row['author_name'] or '',
+            'isbn': row['isbn_10'],
+            'isbn13': row['isbn_13'],
+            'pub_date': row['publish_date'] or '',
+            'num_pages': row['number_of_pages'],
+            'genre': ', '.join(subjects[:3]),
+            'cover_image_url': None
+        }
+
+    def search(self, query, author=None, limit=10):
+        """Search results for a title (and optional author), best matches first.
+
+        Exact normalized title/author matches come first, then full-text
+        matches where every word of the query appears in the title or author
+        name, ranked by bm25. One edition per work is returned, preferring
+        editions with an ISBN and a cover.
+        """
+        conn = self._conn()
+        order = "(e.isbn_13 IS NULL AND e.isbn_10 IS NULL), (e.cover_id IS NULL), e.key"
+        if author:
+            rows = conn.execute(f"""
+                SELECT e.* FROM editions e
+                WHERE e.norm_title = ? AND e.norm_author = ?
+                ORDER BY {order} LIMIT ?
+            """, (normalize(query), normalize(author), limit * 5)).fetchall()
+        else:
+            rows = conn.execute(f"""
+                SELECT e.* FROM editions e
+                WHERE e.norm_title = ?
+                ORDER BY {order} LIMIT ?
+            """, (normalize(query), limit * 5)).fetchall()
+
+        words = normalize(f"{query} {author or ''}").split()
+        if words:
+            match = ' '.join(f'"{word}"' for word in words)
+            rows += conn.execute(f"""
+                SELECT e.* FROM editions_fts f
+                JOIN editions e ON e.rowid = f.rowid
+                WHERE editions_fts MATCH ?
+                ORDER BY f.rank, {order} LIMIT ?
+            """, (match, limit * 5)).fetchall()
+
+        results = []
+        seen_works = set()
+        for row in rows:
+            work = row['work_key'] or row['key']
+            if work in seen_works:
+                continue
+            seen_works.add(work)
+            results.append(self._format_search_row(row))
+            if len(results) == limit:
+                break
+        return results
+
+    def _format_search_row(self, row):
+        return {
+            'title': row['title'],
+            'author': row['author_name'] or '',
+            'isbn': row['isbn_10'],
+            'isbn13': row['isbn_13'] or isbn10_to_isbn13(row['isbn_10']),
+            'pub_date': row['publish_date'] or '',
+            'num_pages': row['number_of_pages'],
+            'genre': '',
+            'cover_image_url': f"https://covers.openlibrary.org/b/id/{row['cover_id']}-L.jpg" if row['cover_id'] else None,
+            'ol_key': row['work_key'] or ''
+        }
+
+    # -------------------------------------------------------------------------
+    # Ingestion
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def ingest(path, dump_paths, require_isbn=False, progress=print):
+        """Stream dump files (.gz or plain) into the index at path, then build lookups.
+
+        Memory stays bounded by INGEST_BATCH_SIZE rows whatever the dump size.
+        Editions, works and authors may come from separate files in any
+        order; author names are joined in once everything is loaded.
+        Re-running with newer dumps replaces existing records.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        counts = {'editions': 0, 'isbns': 0, 'works': 0, 'authors': 0, 'skipped': 0}
+
+        try:
+            for dump_path in dump_paths:
+                progress(f"Reading {dump_path}...")
+                opener = gzip.open if dump_path.endswith('.gz') else open
+                with opener(dump_path, 'rt', encoding='utf-8', errors='replace') as lines:
+                    MetadataIndex._ingest_lines(conn, lines, require_isbn, counts, progress)
+            progress("Building lookup indexes...")
+            MetadataIndex._build_lookups(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        return counts
+
+    @staticmethod
+    def _ingest_lines(conn, lines, require_isbn, counts, progress):
+        batches = {'editions': [], 'isbns': [], 'works': [], 'authors': []}
+
+        def flush():
+            conn.executemany("""
+                INSERT OR REPLACE INTO editions (
+                    key, title, norm_title, author_key, work_key, isbn_10, isbn_13,
+                    publish_date, number_of_pages, cover_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, batches['editions'])
+            conn.executemany("INSERT OR REPLACE INTO isbns (isbn, edition_key) VALUES (?, ?)", batches['isbns'])
+            conn.executemany(
+                "INSERT OR REPLACE INTO works (key, title, author_key, subjects) VALUES (?, ?, ?, ?)",
+                batches['works']
+            )
+            conn.executemany("INSERT OR REPLACE INTO authors (key, name) VALUES (?, ?)", batches['authors'])
+            conn.commit()
+            for name, batch in batches.items():
+                counts[name] += len(batch)
+                batch.clear()
+
+        pending = 0
+        for line in lines:
+            parsed = parse_dump_line(line)
+            if parsed is None:
+                counts['skipped'] += 1
+                continue
+            record_type, record = parsed
+            key = record.get('key')
+
+            if record_type == '/type/edition' and key and record.get('title'):
+                isbn_10 = [_clean_isbn(value) for value in record.get('isbn_10') or []]
+                isbn_13 = [_clean_isbn(value) for value in record.get('isbn_13') or []]
+                if require_isbn and not (isbn_10 or isbn_13):
+                    counts['skipped'] += 1
+                    continue
+                pages = record.get('number_of_pages')
+                covers = [cover for cover in record.get('covers') or [] if isinstance(cover, int) and cover > 0]
+                batches['editions'].append((
+                    key,
+                    record['title'],
+                    normalize(record['title']),
+                    _first_key(record.get('authors')),
+                    _first_key(record.get('works')),
+                    isbn_10[0] if isbn_10 else None,
+                    isbn_13[0] if isbn_13 else None,
+                    record.get('publish_date'),
+                    pages if isinstance(pages, int) else None,
+                    covers[0] if covers else None
+                ))
+                isbns = set(isbn_10) | set(isbn_13) | {isbn10_to_isbn13(isbn) for isbn in isbn_10}
+                batches['isbns'].extend((isbn, key) for isbn in isbns if isbn)
+            elif record_type == '/type/work' and key:
+                subjects = [subject for subject in record.get('subjects') or [] if isinstance(subject, str)]
+                batches['works'].append((
+                    key,
+                    record.get('title'),
+                    _first_key(record.get('authors'), nested='author'),
+                    json.dumps(subjects[:MAX_SUBJECTS]) if subjects else None
+                ))
+            elif record_type == '/type/author' and key and record.get('name'):
+                batches['authors'].append((key, record['name']))
+            else:
+                counts['skipped'] += 1
+                continue
+
+            pending += 1
+            if pending >= INGEST_BATCH_SIZE:
+                flush()
+                pending = 0
+                progress(f"  {counts['editions']:,} editions, {counts['works']:,} works, {counts['authors']:,} authors")
+        flush()
+
+    @staticmethod
+    def _build_lookups(conn):
+        """Join in author names, then (re)build the title/author and full-text indexes"""
+        conn.create_function('normalize', 1, normalize, deterministic=True)
+        # Editions often only list authors on their work
+        conn.execute("""
+            UPDATE editions SET author_key = (
+                SELECT w.author_key FROM works w WHERE w.key = editions.work_key
+            )
+            WHERE author_key IS NULL AND work_key IS NOT NULL
+        """)
+        conn.execute("""
+            UPDATE editions SET author_name = (
+                SELECT a.name FROM authors a WHERE a.key = editions.author_key
+            )
+            WHERE author_key IS NOT NULL
+        """)
+        conn.execute("UPDATE editions SET norm_author = normalize(author_name)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_editions_title_author ON editions(norm_title, norm_author)")
+
+        # External-content FTS: the index stores tokens only, text stays in editions
+        conn.execute("DROP TABLE IF EXISTS editions_fts")
+        conn.execute("""
+            CREATE VIRTUAL TABLE editions_fts USING fts5(
+                title, author_name, content='editions', content_rowid='rowid'
+            )
+        """)
+        conn.execute("INSERT INTO editions_fts (editions_fts) VALUES ('rebuild')")
+        conn.execute("ANALYZE")
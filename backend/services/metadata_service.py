@@ -1,49 +1,195 @@
-import requests
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from services.http_client import get_http_client
+from services.metadata_index import DEFAULT_INDEX_PATH, MetadataIndex, normalize
+from services.response_cache import MISSING, ResponseCache
+
+# How long Open Library responses are served from cache before refetching
+SEARCH_TTL = 24 * 60 * 60
+RECORD_TTL = 30 * 24 * 60 * 60  # Editions and works rarely change
+NOT_FOUND_TTL = 60 * 60
+
+# How long an expired response may still be served while it is refreshed
+STALE_TTL = 7 * 24 * 60 * 60
+
+# Requests per second to openlibrary.org, shared by every caller in the process
+OPEN_LIBRARY_RATE_LIMIT = float(os.getenv('OPEN_LIBRARY_RATE_LIMIT', 20))
+
+# Lookups in flight at once for one search_batch call, and the largest batch accepted
+BATCH_WORKERS = 8
+MAX_BATCH_ITEMS = 1000
 
 class MetadataService:
     """Service for fetching book metadata from Open Library"""
     
     def __init__(self):
         self.open_library_base = "https://openlibrary.org"
-        self.cache = {}
+        self.http = get_http_client()
+        self.http.set_rate_limit('openlibrary.org', OPEN_LIBRARY_RATE_LIMIT)
+        # Search, ISBN and work responses; persisted so restarts start warm
+        self.cache = ResponseCache(
+            os.getenv('METADATA_CACHE_PATH', 'data/metadata_cache.db'),
+            negative_ttl=NOT_FOUND_TTL,
+            stale_ttl=STALE_TTL
+        )
+        # Offline index built from Open Library dumps; consulted before the network
+        self.index = MetadataIndex.open_if_exists(os.getenv('METADATA_INDEX_PATH', DEFAULT_INDEX_PATH))
+        self.counts = {'index_hits': 0, 'prefix_hits': 0}
+        self._counts_lock = threading.Lock()  # search_batch searches from several threads
     
     def search_books(self, query, author=None, limit=10):
         """Search for books by title and optionally author"""
         try:
+            if self.index:
+                results = self._search_index(query, author, limit)
+                if results:
+                    self._count('index_hits')
+                    return results
+            
             search_query = query
             if author:
                 search_query = f"{query} {author}"
             
-            url = f"{self.open_library_base}/search.json"
-            params = {
-                "q": search_query,
-                "limit": limit
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data.get("docs"):
-                return []
-            
-            results = []
-            for book in data["docs"]:
-                results.append(self._format_book(book))
-            
-            return results
+            # Open Library search ignores case and extra whitespace, so the cache does too
+            normalized = ' '.join(search_query.lower().split())
+            key = f"search:{limit}:{normalized}"
+            if self.cache.peek(key) is MISSING:
+                refined = self._refine_cached_prefix(normalized, limit)
+                if refined is not None:
+                    self._count('prefix_hits')
+                    return refined
+            results = self.cache.get(key, lambda: self._search(search_query, limit), SEARCH_TTL)
+            return list(results) if results else []
         except Exception as e:
             print(f"Error searching books: {e}")
             return []
     
+    def _count(self, name):
+        with self._counts_lock:
+            self.counts[name] += 1
+    
+    def _search_index(self, query, author, limit):
+        try:
+            return self.index.search(query, author, limit)
+        except Exception as e:
+            print(f"Error searching metadata index: {e}")
+            return []
+    
+    def _refine_cached_prefix(self, normalized, limit):
+        """Results for a query typed past one already cached, filtered locally.
+        
+        While typing "dune mess" the cache usually holds "dune". If that
+        search returned everything it found (fewer than limit results), the
+        longer query can only narrow it, so results are kept when every
+        extra word starts a word of their title or author. Returns None when
+        no complete prefix result is cached.
+        """
+        words = normalized.split()
+        for end in range(len(words) - 1, 0, -1):
+            cached = self.cache.peek(f"search:{limit}:{' '.join(words[:end])}")
+            if cached is MISSING or (cached is not None and len(cached) >= limit):
+                continue
+            extra = [normalize(word) for word in words[end:]]
+            refined = []
+            for book in cached or []:
+                book_words = normalize(f"{book['title']} {book['author']}").split()
+                if all(any(word.startswith(prefix) for word in book_words) for prefix in extra):
+                    refined.append(book)
+            return refined
+        return None
+    
+    def stats(self):
+        """Response cache counters, coalesced lookups and locally answered searches"""
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {
+            **counts,
+            'index': self.index.path if self.index else None,
+            'cache': self.cache.stats()
+        }
+    
+    def _search(self, search_query, limit):
+        """Formatted search results from Open Library, or None if nothing matched"""
+        data = self._fetch_json("/search.json", {"q": search_query, "limit": limit})
+        
+        if not data or not data.get("docs"):
+            return None
+        
+        return [self._format_book(book) for book in data["docs"]]
+    
+    def search_batch(self, items, limit=5):
+        """Resolve many {'title', 'author', 'isbn'} items concurrently.
+        
+        Yields {'index', 'matches'} (or {'index', 'error'}) per item as lookups
+        complete, not in input order. Items with an ISBN are looked up by ISBN,
+        falling back to a title search; identical items share one lookup. All
+        Open Library traffic goes through the shared rate limit.
+        """
+        groups = {}
+        for index, item in enumerate(items):
+            key = self._batch_key(item)
+            if key is None:
+                yield {'index': index, 'error': 'title or isbn required'}
+                continue
+            groups.setdefault(key, []).append(index)
+        
+        if not groups:
+            return
+        
+        pool = ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(groups)))
+        try:
+            futures = {
+                pool.submit(self._resolve_batch_item, items[indices[0]], limit): indices
+                for indices in groups.values()
+            }
+            for future in as_completed(futures):
+                matches = future.result()
+                for index in futures[future]:
+                    yield {'index': index, 'matches': matches}
+        finally:
+            # A closed stream (client went away) drops the lookups not yet started
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _batch_key(self, item):
+        """Identity of a batch item for coalescing, or None if it cannot be looked up"""
+        if not isinstance(item, dict):
+            return None
+        isbn = self._normalize_isbn(item.get('isbn') or '')
+        if isbn:
+            return ('isbn', isbn)
+        title = ' '.join(str(item.get('title') or '').lower().split())
+        if not title:
+            return None
+        return ('title', title, ' '.join(str(item.get('author') or '').lower().split()))
+    
+    def _resolve_batch_item(self, item, limit):
+        isbn = self._normalize_isbn(item.get('isbn') or '')
+        if isbn:
+            book = self.get_book_by_isbn(isbn)
+            if book:
+                return [book]
+        if not item.get('title'):
+            return []
+        return self.search_books(item['title'], item.get('author') or None, limit)
+    
+    def _normalize_isbn(self, isbn):
+        return str(isbn).replace("-", "").replace(" ", "").upper()
+    
     def get_book_by_isbn(self, isbn):
         """Get book details by ISBN"""
         try:
-            url = f"{self.open_library_base}/isbn/{isbn}.json"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            isbn = self._normalize_isbn(isbn)
+            if self.index:
+                book = self._find_isbn_in_index(isbn)
+                if book:
+                    return book
+            
+            data = self.cache.get(f"isbn:{isbn}", lambda: self._fetch_json(f"/isbn/{isbn}.json"), RECORD_TTL)
+            if data is None:
+                return None
+            data = dict(data)  # Cached responses are shared - never mutate them
             
             # Get additional details from work
             work_key = data.get("works", [{}])[0].get("key")
@@ -57,15 +203,28 @@ class MetadataService:
             print(f"Error getting book by ISBN: {e}")
             return None
     
+    def _find_isbn_in_index(self, isbn):
+        try:
+            return self.index.find_by_isbn(isbn)
+        except Exception as e:
+            print(f"Error reading metadata index: {e}")
+            return None
+    
     def _get_work(self, work_key):
         """Get work details from Open Library"""
         try:
-            url = f"{self.open_library_base}{work_key}.json"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except:
+            return self.cache.get(f"work:{work_key}", lambda: self._fetch_json(f"{work_key}.json"), RECORD_TTL)
+        except Exception as e:
+            print(f"Error getting work {work_key}: {e}")
+            return None
+    
+    def _fetch_json(self, path, params=None):
+        """GET an Open Library JSON document; None for a 404, raises on other failures"""
+        response = self.http.get(f"{self.open_library_base}{path}", params=params, timeout=10)
+        if response.status_code == 404:
             return None
+        response.raise_for_status()
+        return response.json()
     
     def _format_book(self, book):
         """Format Open Library book data to our schema"""
@@ -0,0 +1,151 @@
+import bisect
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+
+# Histogram bucket upper bounds in seconds (Prometheus-style, cumulative on export)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Recent samples kept per route for percentile estimates
+RECENT_SAMPLES = 1024
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _escape_label(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RouteLatency:
+    """Latency histogram plus a bounded window of recent samples for one route"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def percentiles(self):
+        values = sorted(self.recent)
+        return {p: _percentile(values, p) for p in PERCENTILES}
+
+
+class MetricsService:
+    """Per-route request latency histograms and status counts.
+
+    Opt-in via METRICS_SAMPLE_RATE (0 disables, 0.01 samples 1% of requests).
+    Status counts cover every request; latency is only recorded for sampled ones.
+    """
+
+    def __init__(self):
+        self.sample_rate = float(os.getenv('METRICS_SAMPLE_RATE', 0))
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        # (method, route) -> RouteLatency
+        self.latency = {}
+        # (method, route, status) -> count
+        self.status_counts = {}
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0
+
+    def should_sample(self):
+        """Decide whether to time the current request"""
+        return self.enabled and random.random() < self.sample_rate
+
+    def record_status(self, method, route, status):
+        key = (method, route, status)
+        with self._lock:
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def observe_latency(self, method, route, seconds):
+        key = (method, route)
+        with self._lock:
+            stats = self.latency.get(key)
+            if stats is None:
+                stats = RouteLatency()
+                self.latency[key] = stats
+            stats.observe(seconds)
+
+    def get_summary(self):
+        """Per-route counts and p50/p95/p99 latency in milliseconds"""
+        with self._lock:
+            routes = []
+            for (method, route), stats in sorted(self.latency.items(), key=lambda item: item[0][1]):
+                percentiles = stats.percentiles()
+                routes.append({
+                    'method': method,
+                    'route': route,
+                    'sampled_requests': stats.count,
+                    'p50_ms': round(percentiles[0.5] * 1000, 2),
+                    'p95_ms': round(percentiles[0.95] * 1000, 2),
+                    'p99_ms': round(percentiles[0.99] * 1000, 2)
+                })
+            return {
+                'sample_rate': self.sample_rate,
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'routes': routes
+            }
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            lines.append('# HELP bookshelf_requests_total HTTP requests by route and status.')
+            lines.append('# TYPE bookshelf_requests_total counter')
+            for (method, route, status), count in sorted(self.status_counts.items()):
+                lines.append(
+                    f'bookshelf_requests_total{{method="{method}",route="{_escape_label(route)}",status="{status}"}} {count}'
+                )
+
+            lines.append('# HELP bookshelf_request_duration_seconds Latency of sampled requests.')
+            lines.append('# TYPE bookshelf_request_duration_seconds histogram')
+            for (method, route), stats in sorted(self.latency.items()):
+                labels = f'method="{method}",route="{_escape_label(route)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f'bookshelf_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'bookshelf_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f'bookshelf_request_duration_seconds_sum{{{labels}}} {stats.total:.6f}')
+                lines.append(f'bookshelf_request_duration_seconds_count{{{labels}}} {stats.count}')
+
+            lines.append('# HELP bookshelf_request_latency_seconds Recent latency percentiles of sampled requests.')
+            lines.append('# TYPE bookshelf_request_latency_seconds gauge')
+            for (method, route), stats in sorted(self.latency.items()):
+                labels = f'method="{method}",route="{_escape_label(route)}"'
+                for fraction, value in stats.percentiles().items():
+                    lines.append(f'bookshelf_request_latency_seconds{{{labels},quantile="{fraction}"}} {value:.6f}')
+
+        lines.append('# HELP bookshelf_metrics_sample_rate Fraction of requests whose latency is recorded.')
+        lines.append('# TYPE bookshelf_metrics_sample_rate gauge')
+        lines.append(f'bookshelf_metrics_sample_rate {self.sample_rate}')
+        return '\n'.join(lines) + '\n'
+
+# Singleton
+_metrics_service = None
+
+def get_metrics_service():
+    global _metrics_service
+    if _metrics_service is None:
+        _metrics_service = MetricsService()
+    return _metrics_service
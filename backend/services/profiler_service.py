@@ -0,0 +1,175 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Maximum number of requests a single arm() call may capture
+MAX_CAPTURE_REQUESTS = 50
+
+# How many finished captures to keep for the debug endpoint
+CAPTURE_HISTORY = 20
+
+# Stack sampling interval in seconds
+SAMPLE_INTERVAL = 0.005
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread.
+
+    Produces collapsed stacks ("outer;inner;leaf count"), ready for flamegraph tools.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+
+    def report(self, limit=50):
+        return {
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'stacks': [
+                {'stack': stack, 'count': count}
+                for stack, count in self.stacks.most_common(limit)
+            ]
+        }
+
+
+class ProfileCapture:
+    """Profiling session for a single request"""
+
+    def __init__(self, label, mode):
+        self.label = label
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.profiler = None
+        self.sampler = None
+
+    def start(self):
+        if self.mode == 'sample':
+            self.sampler = StackSampler(threading.get_ident())
+            self.sampler.start()
+        else:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self, status=None):
+        duration_ms = (time.perf_counter() - self.started) * 1000
+        result = {
+            'request': self.label,
+            'mode': self.mode,
+            'status': status,
+            'duration_ms': round(duration_ms, 2),
+            'captured_at': time.time()
+        }
+        if self.sampler is not None:
+            self.sampler.stop()
+            result.update(self.sampler.report())
+        if self.profiler is not None:
+            self.profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(self.profiler, stream=output).sort_stats('cumulative').print_stats(40)
+            result['profile'] = output.getvalue()
+        return result
+
+
+class ProfilerService:
+    """Captures cProfile output or sampled stacks for the next N requests to a route.
+
+    Nothing is profiled until arm() is called, so the per-request cost is one
+    attribute check. Only one request is profiled at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._capture_slot = threading.Lock()
+        self.route = None
+        self.mode = 'cprofile'
+        self.remaining = 0
+        self.captures = deque(maxlen=CAPTURE_HISTORY)
+
+    def arm(self, route, count=1, mode='cprofile'):
+        """Profile the next `count` requests whose route, path or label matches `route`"""
+        if mode not in ('cprofile', 'sample'):
+            raise ValueError("mode must be 'cprofile' or 'sample'")
+        count = max(1, min(int(count), MAX_CAPTURE_REQUESTS))
+        with self._lock:
+            self.route = route
+            self.mode = mode
+            self.remaining = count
+        return self.get_status()
+
+    def disarm(self):
+        with self._lock:
+            self.route = None
+            self.remaining = 0
+
+    def begin(self, method, rule, path):
+        """Start a capture if this request matches the armed route, else return None"""
+        if not self.remaining:
+            return None
+        label = f"{method} {rule}"
+        with self._lock:
+            if not self.remaining or self.route not in (rule, path, label):
+                return None
+            # cProfile cannot run twice at once - skip overlapping requests
+            if not self._capture_slot.acquire(blocking=False):
+                return None
+            self.remaining -= 1
+            mode = self.mode
+        capture = ProfileCapture(label, mode)
+        capture.start()
+        return capture
+
+    def end(self, capture, status=None):
+        try:
+            result = capture.stop(status)
+        finally:
+            self._capture_slot.release()
+        with self._lock:
+            self.captures.append(result)
+        return result
+
+    def get_status(self):
+        with self._lock:
+            return {
+                'armed_route': self.route if self.remaining else None,
+                'mode': self.mode,
+                'remaining': self.remaining,
+                'captures': list(reversed(self.captures))
+            }
+
+# Singleton
+_profiler_service = None
+
+def get_profiler_service():
+    global _profiler_service
+    if _profiler_service is None:
+        _profiler_service = ProfilerService()
+    return _profiler_service
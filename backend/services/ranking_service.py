@@ -1,4 +1,5 @@
 from database.db import get_db
+from services.book_service import get_book_service
 from datetime import datetime
 
 class RankingService:
@@ -326,7 +327,18 @@ class RankingService:
             INSERT INTO rankings (book_id, rank_position, initial_stars)
             VALUES (?, ?, ?)
         """
-        return self.db.execute_update(query, (book_id, position, initial_stars))
+        with self.db.transaction():
+            ranking_id = self.db.execute_update(query, (book_id, position, initial_stars))
+            
+            # A new star rating changes the owner's rated count and average
+            owner = self.db.execute_query("SELECT user_id FROM books WHERE id = ?", (book_id,))
+            if owner:
+                get_book_service().apply_library_stats_delta(
+                    owner[0]['user_id'],
+                    {'state': None, 'initial_stars': None},
+                    {'state': None, 'initial_stars': initial_stars}
+                )
+        return ranking_id
     
     def _reorder_rankings(self, from_position, user_id=None):
         """Shift rankings after inserting a new book"""
@@ -0,0 +1,212 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from services.single_flight import SingleFlight
+
+# Entries kept in memory and on disk before the least recently used are evicted
+MAX_MEMORY_ENTRIES = 2048
+MAX_DISK_ENTRIES = 100000
+
+# Disk eviction runs once per this many writes rather than on every write
+EVICT_EVERY = 256
+
+# Returned by peek() when nothing fresh is cached (None is a cacheable value)
+MISSING = object()
+
+
+class ResponseCache:
+    """Two-tier cache for slow upstream responses: an in-process LRU in front
+    of a SQLite file that survives restarts.
+
+    get(key, loader, ttl) returns the cached value while it is fresh (ttl
+    seconds, or negative_ttl when the loader returned None, i.e. "not
+    found"). For stale_ttl seconds after that the stale value is returned
+    immediately and refreshed once in a background thread. Older entries are
+    reloaded inline, and concurrent misses for one key share a single loader
+    call. If the loader raises, any stale value is served instead and nothing
+    is cached. Values must be JSON-serializable.
+    """
+
+    def __init__(self, path, negative_ttl, stale_ttl,
+                 max_memory_entries=MAX_MEMORY_ENTRIES, max_disk_entries=MAX_DISK_ENTRIES):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._lock = threading.Lock()
+        # key -> (value, expires_at); ordered oldest access first
+        self._memory = OrderedDict()
+        self._refreshing = set()
+        self._flight = SingleFlight()
+        self._writes = 0
+        self.counts = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'errors': 0}
+        self._disk_enabled = self._init_disk()
+
+    def _init_disk(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+            return True
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: response cache at {self.path} unavailable, using memory only: {e}")
+            return False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, key, loader, ttl):
+        """Cached value for key, calling loader() to fill or refresh it"""
+        now = time.time()
+        entry = self._lookup(key)
+
+        if entry is not None:
+            value, expires_at = entry
+            if now < expires_at:
+                self.counts['hits'] += 1
+                return value
+            if now < expires_at + self.stale_ttl:
+                self.counts['stale_hits'] += 1
+                self._refresh_in_background(key, loader, ttl)
+                return value
+
+        self.counts['misses'] += 1
+        try:
+            value = self._flight.do(key, lambda: self._load(key, loader, ttl))
+        except Exception:
+            self.counts['errors'] += 1
+            if entry is not None:
+                return entry[0]  # Serve stale rather than fail
+            raise
+        return value
+
+    def peek(self, key):
+        """Fresh cached value for key without loading anything, or MISSING"""
+        entry = self._lookup(key)
+        if entry is None or time.time() >= entry[1]:
+            return MISSING
+        return entry[0]
+
+    def _load(self, key, loader, ttl):
+        # A call that finished just before this one started may have filled it
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None and time.time() < entry[1]:
+            return entry[0]
+        value = loader()
+        self.set(key, value, ttl)
+        return value
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + (self.negative_ttl if value is None else ttl)
+        self._remember(key, (value, expires_at))
+        if not self._disk_enabled:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires_at, time.time())
+                )
+                self._writes += 1
+                if self._writes % EVICT_EVERY == 0:
+                    self._evict_disk(conn)
+        except sqlite3.Error as e:
+            print(f"Warning: response cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._disk_enabled:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        return {
+            **self.counts,
+            'coalesced': self._flight.counts['shared'],
+            'memory_entries': len(self._memory)
+        }
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+        if not self._disk_enabled:
+            return None
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"Warning: response cache read failed: {e}")
+            return None
+
+        entry = (json.loads(row[0]), row[1])
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self, conn):
+        """Drop entries past their stale window, then the least recently used over the cap"""
+        conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time() - self.stale_ttl,))
+        excess = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            conn.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at LIMIT ?
+                )
+            """, (excess,))
+
+    def _refresh_in_background(self, key, loader, ttl):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.set(key, loader(), ttl)
+            except Exception as e:
+                self.counts['errors'] += 1
+                print(f"Background refresh of {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
@@ -0,0 +1,109 @@
+import importlib.util
+import os
+import random
+
+# The layout engine lives next to the Python rasterizer, which is deployed as
+# a lambda on its own. Load that file instead of keeping a second copy in step.
+_ENGINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'bookshelf', 'aws_lambdas', 'python', 'shelfLayout.py'
+)
+_spec = importlib.util.spec_from_file_location('shelfLayout', _ENGINE_PATH)
+engine = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(engine)
+
+# Books laid out per request
+MAX_LAYOUT_BOOKS = 5000
+
+# The site's BookshelfRenderer defaults: rows 10.5" tall and 30" wide between 1" borders, 60px per inch
+RENDERER_DEFAULTS = {
+    'shelf_width_inches': 30,
+    'shelf_height_inches': 10.5,
+    'border_width_inches': 1,
+    'inch_pixel_ratio': 60
+}
+
+
+def parse_background(spec=None):
+    """ShelfBackground from a JSON definition; ValueError if it is not one.
+
+    - Nothing, or BookshelfRenderer settings (any of RENDERER_DEFAULTS):
+      rows added as needed, as the site draws them.
+    - A background image as stored in shelf_bgs: width_inches, width_pixels,
+      shelf_bottoms and shelf_left.
+    - Raw geometry: inch_pixel_ratio, shelf_left, shelf_right,
+      shelf_bottoms and optionally row_pitch.
+    """
+    spec = spec or {}
+    if not isinstance(spec, dict):
+        raise ValueError("background must be an object")
+    try:
+        if 'width_pixels' in spec:
+            return engine.ShelfBackground.fromImage(
+                _positive(spec, 'width_inches'), int(_positive(spec, 'width_pixels')),
+                [int(bottom) for bottom in spec['shelf_bottoms']], int(spec['shelf_left'])
+            )
+        if 'shelf_bottoms' in spec:
+            row_pitch = spec.get('row_pitch')
+            return engine.ShelfBackground(
+                _positive(spec, 'inch_pixel_ratio'), int(spec['shelf_left']), int(spec['shelf_right']),
+                [int(bottom) for bottom in spec['shelf_bottoms']],
+                int(row_pitch) if row_pitch is not None else None
+            )
+        settings = {**RENDERER_DEFAULTS, **{key: spec[key] for key in RENDERER_DEFAULTS if key in spec}}
+        return engine.ShelfBackground.growing(*(_positive(settings, key) for key in RENDERER_DEFAULTS))
+    except KeyError as e:
+        raise ValueError(f"background is missing {e.args[0]}")
+    except (TypeError, OverflowError):
+        raise ValueError("background values must be finite numbers (shelf_bottoms a list of them)")
+
+
+def _positive(spec, key):
+    """spec[key] as a float; ValueError unless it is a positive, finite number"""
+    value = float(spec[key])
+    if not 0 < value < float('inf'):
+        raise ValueError(f"background {key} must be a positive number")
+    return value
+
+
+def _book_size(book, background):
+    """(h, w) in pixels: explicit w/h, else from dimensions in inches, else made up from title and author"""
+    if book.get('w') is not None and book.get('h') is not None:
+        return int(book['h']), int(book['w'])
+    if book.get('dimensions'):
+        return engine.bookPixelSize(book, background)
+    # Seeded per book, so a book without dimensions keeps its size across re-layouts
+    seed = f"{book.get('title') or ''}||{book.get('author') or ''}"
+    return engine.bookPixelSize(book, background, random.Random(seed))
+
+
+def layout_shelf(books, background=None):
+    """Placements for books on a background, in book order.
+
+    books are dicts with pixel w and h, or dimensions in inches
+    ("6 x 1 x 9"), or neither. background is a definition for
+    parse_background. Returns dicts of index (into books), book_id,
+    shelf_index, row, x, y, w and h, where x/y is the spine's top left
+    corner on background number shelf_index.
+    """
+    background = parse_background(background)
+    sizes = []
+    for index, book in enumerate(books):
+        if not isinstance(book, dict):
+            raise ValueError(f"book {index} must be an object")
+        try:
+            h, w = _book_size(book, background)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"book {index} has unreadable dimensions or size")
+        if w <= 0 or h <= 0:
+            raise ValueError(f"book {index} must have a positive size")
+        sizes.append((h, w))
+
+    placements = engine.layoutBooks(books, background, sizes)
+    return [
+        {
+            'index': index,
+            'book_id': placement['book'].get('id'),
+            **{key: placement[key] for key in ('shelf_index', 'row', 'x', 'y', 'w', 'h')}
+        }
+        for index, placement in enumerate(placements)
+    ]
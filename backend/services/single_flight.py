@@ -0,0 +1,54 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls that share a key into one.
+
+    The first caller for a key runs fn(); callers arriving while it is in
+    flight wait and get the same result (or the same exception). Nothing is
+    remembered once the call finishes - caching is the caller's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.counts = {'calls': 0, 'shared': 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.counts['shared'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.counts['calls'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
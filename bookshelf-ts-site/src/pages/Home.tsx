@@ -1539,8 +1539,8 @@ export const Home: React.FC<HomeProps> = ({ isPublicView = false, publicUsername
             <button className="modal-close" onClick={() => setSelectedBook(null)}>×</button>
             <h2>{selectedBook.title}</h2>
             <h3 style={{ textAlign: 'center' }}>by {selectedBook.author}</h3>
-            {selectedBook.cover_image_url && (
-              <img src={selectedBook.cover_image_url} alt={selectedBook.title} className="modal-book-cover" />
+            {apiService.coverUrl(selectedBook) && (
+              <img src={apiService.coverUrl(selectedBook, 400)} alt={selectedBook.title} className="modal-book-cover" />
             )}
             <div className="modal-book-details">
               {selectedBook.pub_date && <p><strong>Published:</strong> {selectedBook.pub_date}</p>}
@@ -151,9 +151,9 @@ export const Library: React.FC = () => {
           <div className="books-grid">
             {visibleBooks.map(book => (
               <div key={book.id} className="book-card">
-                {book.cover_image_url && (
+                {apiService.coverUrl(book) && (
                   <img 
-                    src={book.cover_image_url} 
+                    src={apiService.coverUrl(book, 400)} 
                     alt={book.title} 
                     className="book-cover"
                     loading="lazy"
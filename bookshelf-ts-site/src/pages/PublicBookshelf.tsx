@@ -98,9 +98,9 @@ export const PublicBookshelf: React.FC = () => {
                 e.currentTarget.style.boxShadow = 'none';
               }}
             >
-              {book.cover_image_url && (
+              {apiService.coverUrl(book) && (
                 <img
-                  src={book.cover_image_url}
+                  src={apiService.coverUrl(book, 400)}
                   alt={book.title}
                   style={{
                     width: '100%',
@@ -205,9 +205,9 @@ export const PublicBookshelf: React.FC = () => {
             <h2 style={{ marginBottom: '8px' }}>{selectedBook.title}</h2>
             <h3 style={{ color: '#666', marginBottom: '24px', textAlign: 'center' }}>by {selectedBook.author}</h3>
             
-            {selectedBook.cover_image_url && (
+            {apiService.coverUrl(selectedBook) && (
               <img 
-                src={selectedBook.cover_image_url} 
+                src={apiService.coverUrl(selectedBook, 400)} 
                 alt={selectedBook.title} 
                 style={{
                   maxWidth: '300px',
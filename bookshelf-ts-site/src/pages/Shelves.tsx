@@ -131,9 +131,9 @@ export const Shelves: React.FC = () => {
       <div className="shelf-books">
         {books.map(book => (
           <div key={book.id} className="shelf-book-item">
-            {book.cover_image_url && (
+            {apiService.coverUrl(book) && (
               <img 
-                src={book.cover_image_url} 
+                src={apiService.coverUrl(book, 160)} 
                 alt={book.title}
                 loading="lazy"
                 decoding="async"
@@ -69,13 +69,30 @@ export const VisualizeShelf: React.FC = () => {
         author: book.author
       } as any));
 
+      const shelfSettings = { shelfWidthInches: 30, shelfHeightInches: 10.5, borderWidthInches: 1 };
+
       const renderer = new BookshelfRenderer({
         books: rendererBooks,
-        shelfWidthInches: 30,
-        shelfHeightInches: 10.5,
-        borderWidthInches: 1
+        ...shelfSettings
       });
 
+      // Geometry comes from the backend's layout engine; if that fails the renderer lays books out itself.
+      // Each book is sent at the size the renderer draws its spine, so both layouts place the same spines.
+      try {
+        const sizes = renderer.getSpineSizes();
+        const layout = await apiService.getShelfLayout(
+          books.map((book, index) => ({ id: book.id, ...sizes[index] })),
+          {
+            shelf_width_inches: shelfSettings.shelfWidthInches,
+            shelf_height_inches: shelfSettings.shelfHeightInches,
+            border_width_inches: shelfSettings.borderWidthInches
+          }
+        );
+        renderer.setPlacements(layout.placements);
+      } catch (error) {
+        console.error('Shelf layout failed, laying out in the browser', error);
+      }
+
       // Don't use progressive rendering - generate all at once
       // renderer.inProgressRenderCallback = null;
 
@@ -296,8 +313,8 @@ export const VisualizeShelf: React.FC = () => {
             <button className="close-btn" onClick={() => setSelectedBook(null)}>×</button>
             <h2>{selectedBook.title}</h2>
             <h3 style={{ textAlign: 'center' }}>by {selectedBook.author}</h3>
-            {selectedBook.cover_image_url && (
-              <img src={selectedBook.cover_image_url} alt={selectedBook.title} className="book-cover" />
+            {apiService.coverUrl(selectedBook) && (
+              <img src={apiService.coverUrl(selectedBook, 400)} alt={selectedBook.title} className="book-cover" />
             )}
             <div className="book-details">
               {selectedBook.pub_date && <p><strong>Published:</strong> {selectedBook.pub_date}</p>}
@@ -1,8 +1,17 @@
+import { ShelfPlacement } from '../types/bookshelfTypes';
+
 // Use relative path when deployed together, absolute for local development
 const API_BASE_URL = process.env.REACT_APP_API_URL || (
   process.env.NODE_ENV === 'production' ? '/api' : 'http://localhost:5001/api'
 );
 
+// Cover hosts the backend's image cache fetches from (DEFAULT_ALLOWED_HOSTS in
+// backend/services/image_proxy.py, or REACT_APP_PROXIED_COVER_HOSTS to match IMAGE_PROXY_HOSTS)
+const PROXIED_COVER_HOSTS = (
+  process.env.REACT_APP_PROXIED_COVER_HOSTS ||
+  'covers.openlibrary.org,books.google.com,i.gr-assets.com,images.gr-assets.com,m.media-amazon.com,images-na.ssl-images-amazon.com'
+).split(',').map(host => host.trim());
+
 class ApiService {
   private baseUrl: string;
 
@@ -362,6 +371,34 @@ class ApiService {
   async getMyStats() {
     return this.request('/me/stats');
   }
+
+  // Where each book goes on a shelf, without drawing anything. background defaults to
+  // BookshelfRenderer's settings; books need dimensions (inches) or w/h (pixels), or get a size from their title.
+  async getShelfLayout(
+    books: { id?: number; dimensions?: string; w?: number; h?: number; title?: string; author?: string }[],
+    background?: { shelf_width_inches?: number; shelf_height_inches?: number; border_width_inches?: number; inch_pixel_ratio?: number }
+  ): Promise<{ placements: ShelfPlacement[]; shelves: number; rows: number }> {
+    return this.request('/shelf/layout', {
+      method: 'POST',
+      body: JSON.stringify({ books, background }),
+    });
+  }
+
+  // Locally stored cover when the backend has one, otherwise the original URL - through the
+  // backend's image cache if it fetches from that host. width asks for a thumbnail at least that
+  // many pixels wide (pass ~2x the CSS width).
+  coverUrl(book: { cover_image_url?: string; cover_hash?: string }, width?: number) {
+    if (!book.cover_hash) {
+      const url = book.cover_image_url;
+      const host = url && /^https?:\/\/([^/:?#]+)/i.exec(url);
+      if (!url || !host || PROXIED_COVER_HOSTS.indexOf(host[1].toLowerCase()) === -1) {
+        return url;
+      }
+      return `${this.baseUrl}/covers/proxy?url=${encodeURIComponent(url)}`;
+    }
+    const url = `${this.baseUrl}/covers/${book.cover_hash}`;
+    return width ? `${url}?w=${width}` : url;
+  }
 }
 
 export default new ApiService();
@@ -13,3 +13,16 @@ export interface InteractiveBookshelfData {
   bookPositions: BookPosition[];
 }
 
+
+// One book's spot from the backend's /shelf/layout (backend/services/shelf_layout.py), in pixels.
+// x/y is the top left corner of the spine; row counts down from the top shelf.
+export interface ShelfPlacement {
+  index: number;
+  book_id: number | null;
+  shelf_index: number;
+  row: number;
+  x: number;
+  y: number;
+  w: number;
+  h: number;
+}
@@ -8,6 +8,7 @@ export interface Book {
   num_pages?: number;
   genre?: string;
   cover_image_url?: string;
+  cover_hash?: string;
   dimensions?: string;
   dom_color?: string;
   series?: string;
@@ -104,12 +105,17 @@ export interface ContinuationGraph {
     id: number;
     title: string;
     author: string;
+    x?: number;
+    y?: number;
   }[];
   edges: {
     from: number;
     to: number;
     created_at: string;
   }[];
+  bounds?: { min_x: number; min_y: number; max_x: number; max_y: number } | null;
+  total_components?: number;
+  component_sizes?: number[];
 }
 
 export interface RankingWizard {
@@ -1,5 +1,6 @@
 import { IMG_URL_PREFIX } from "../types/constants";
 import { book, foundBook } from "../types/interfaces";
+import { ShelfPlacement } from "../types/bookshelfTypes";
 
 interface Dimensions {
   width: number;
@@ -23,6 +24,7 @@ export interface BookshelfRendererParams {
   shelfLabels?: string[],
   cascadeDelayMs?: number, // Delay between rendering each book (default: 0)
   spineFont?: string, // Font family for book spine text
+  placements?: ShelfPlacement[], // From apiService.getShelfLayout (books sized by getSpineSizes), one per book: draw books there instead of laying them out here
 }
 
 interface BookPosition {
@@ -79,6 +81,7 @@ export class BookshelfRenderer {
   private spineFont = "serif"; // Font family for book spine text
   private shelfLabels: string[] = []; // Labels for each shelf
   private cascadeDelayMs = 0; // Delay between rendering each book
+  private placements: ShelfPlacement[] | null = null;
   private canvas: HTMLCanvasElement;
   private ctx: CanvasRenderingContext2D;
 
@@ -210,24 +213,25 @@ export class BookshelfRenderer {
   }
 
   private loadSpines = async (): Promise<void> => {
-    for (const book of this.books) {
+    for (let index = 0; index < this.books.length; index++) {
+      const book = this.books[index];
       const spine = new Image();
       spine.crossOrigin = "anonymous";
-      let dimensions;
-      
-      // Check if this is a bookend marker
-      if (book.title === '__BOOKEND__' && book.author === '__BOOKEND__') {
-        const bookendData = this.generateBookend();
-        spine.src = bookendData.dataURL;
-        dimensions = { height: bookendData.heightInPx, width: bookendData.widthInPx };
-      } else { // we're generating a fake spine
-        const fakeSpineData = this.generateFakeSpine(book);
-        spine.src = fakeSpineData.dataURL;
-        dimensions = { height: fakeSpineData.heightInPx, width: fakeSpineData.widthInPx }
-      }
+      const spineData = this.getSpineData(book);
+      spine.src = spineData.dataURL;
+      let dimensions = { height: spineData.heightInPx, width: spineData.widthInPx };
       // wait for image to load
       await spine.decode();
-      if (this.leftCurrent + dimensions.width > this.shelfWidth - this.borderWidth) {
+      const placement = this.placements?.[index];
+      if (placement) {
+        // laid out by the backend (from getSpineSizes): just add rows until the one it's on exists
+        dimensions = { height: placement.h, width: placement.w };
+        while (this.currentShelfIndex <= placement.row) {
+          this.bottomCurrent += this.shelfHeight + this.borderWidth;
+          await this.addNewShelfRow();
+        }
+        this.leftCurrent = placement.x;
+      } else if (this.leftCurrent + dimensions.width > this.shelfWidth - this.borderWidth) {
         this.leftCurrent = this.borderWidth;
         this.bottomCurrent += this.shelfHeight + this.borderWidth;
         await this.addNewShelfRow();
@@ -235,7 +239,7 @@ export class BookshelfRenderer {
   
       // Store book position for interactivity
       const bookX = this.leftCurrent;
-      const bookY = this.bottomCurrent - dimensions.height;
+      const bookY = placement ? placement.y : this.bottomCurrent - dimensions.height;
       
       this.bookPositions.push({
         book: book,
@@ -261,6 +265,27 @@ export class BookshelfRenderer {
     }
   }
   
+  // Pixel size each book's spine is drawn at, in book order - send these as the books' w/h to
+  // apiService.getShelfLayout so its placements match this renderer. The spines are cached for render().
+  public getSpineSizes(): { w: number; h: number }[] {
+    return this.books.map(book => {
+      const spineData = this.getSpineData(book);
+      return { w: spineData.widthInPx, h: spineData.heightInPx };
+    });
+  }
+
+  public setPlacements(placements?: ShelfPlacement[]): void {
+    this.placements = placements || null;
+  }
+
+  private getSpineData(book: foundBook | book): FakeSpineData {
+    // Check if this is a bookend marker, otherwise we're generating a fake spine
+    if (book.title === '__BOOKEND__' && book.author === '__BOOKEND__') {
+      return this.generateBookend();
+    }
+    return this.generateFakeSpine(book);
+  }
+
   public getBookPositions(): BookPosition[] {
     return this.bookPositions;
   }
@@ -2,5 +2,8 @@ from s3_dao import openS3Image
 from PIL import Image
 
 class S3ImageOpener:
+  #resized spines are also cached here (see SpineCache) - /tmp survives between invocations of a warm lambda
+  cacheDir = "/tmp/spines"
+
   def open(filename) -> Image:
     return openS3Image(filename)
\ No newline at end of file
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import threading
+from PIL import Image
+
+#resized spines kept in memory. a spine on the default shelf is about 50x450 pixels, so this is ~60MB
+MAX_MEMORY_SPINES = 1024
+
+#spines fetched at once while prefetching. botocore keeps 10 connections per client by default
+PREFETCH_WORKERS = 10
+
+#the disk tier stops growing past this (lambda's /tmp is 512MB by default)
+MAX_DISK_BYTES = 256 * 1024 * 1024
+
+class SpineCache:
+  """Spines opened through an ImageOpener and resized, cached by (fileName, w, h).
+
+  Resized spines are kept in an in-memory LRU, and also written as png to
+  cacheDir when one is given. In a warm lambda container both outlive the
+  invocation, so a spine already shelved by someone else costs neither an
+  S3 GET nor a resize. prefetch() fills the cache for a whole render at once.
+  """
+  def __init__(self, imageOpener, cacheDir=None, maxSpines=MAX_MEMORY_SPINES):
+    self.imageOpener = imageOpener
+    self.cacheDir = cacheDir
+    self.maxSpines = maxSpines
+    self.spines = OrderedDict() #(fileName, w, h) -> resized spine, least recently used first
+    self.lock = threading.Lock()
+    self.diskBytes = 0
+    if(cacheDir):
+      os.makedirs(cacheDir, exist_ok=True)
+      self.diskBytes = sum(entry.stat().st_size for entry in os.scandir(cacheDir) if entry.is_file())
+
+  def get(self, fileName, w, h):
+    key = (fileName, w, h)
+    with self.lock:
+      if(key in self.spines):
+        self.spines.move_to_end(key)
+        return self.spines[key]
+
+    spine = self.openFromDisk(key)
+    if(spine is None):
+      spine = self.imageOpener.open(fileName).resize((w, h))
+      self.saveToDisk(key, spine)
+
+    with self.lock:
+      self.spines[key] = spine
+      while(len(self.spines) > self.maxSpines):
+        self.spines.popitem(last=False)
+    return spine
+
+  def prefetch(self, keys):
+    #fetch every uncached (fileName, w, h) concurrently; no more than the LRU holds, or they'd evict each other
+    keys = list(dict.fromkeys(keys))[:self.maxSpines]
+    with self.lock:
+      missing = [key for key in keys if key not in self.spines]
+    if(len(missing) == 0):
+      return
+    with ThreadPoolExecutor(max_workers=min(PREFETCH_WORKERS, len(missing))) as pool:
+      for _ in pool.map(lambda key : self.get(*key), missing):
+        pass
+
+  def diskPath(self, key):
+    fileName, w, h = key
+    return os.path.join(self.cacheDir, hashlib.sha1(fileName.encode("utf-8")).hexdigest() + "_" + str(w) + "x" + str(h) + ".png")
+
+  def openFromDisk(self, key):
+    if(not self.cacheDir):
+      return None
+    try:
+      spine = Image.open(self.diskPath(key))
+      spine.load()
+      return spine
+    except (OSError, ValueError):
+      return None #not cached (or a damaged file, which saveToDisk will replace)
+
+  def saveToDisk(self, key, spine):
+    if(not self.cacheDir or self.diskBytes > MAX_DISK_BYTES):
+      return
+    path = self.diskPath(key)
+    tempPath = path + "." + str(threading.get_ident()) + ".tmp"
+    try:
+      spine.save(tempPath, "PNG")
+      os.replace(tempPath, path) #renamed into place, so readers never see a partial file
+      with self.lock:
+        self.diskBytes += os.path.getsize(path)
+    except OSError as ex:
+      print("could not cache spine " + key[0] + ": " + repr(ex))
+
+#one cache per opener, shared by every Bookshelf (and every invocation of a warm lambda)
+spineCaches = {}
+
+def getSpineCache(imageOpener):
+  if(imageOpener not in spineCaches):
+    spineCaches[imageOpener] = SpineCache(imageOpener, getattr(imageOpener, "cacheDir", None))
+  return spineCaches[imageOpener]
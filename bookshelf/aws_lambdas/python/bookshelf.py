@@ -1,149 +1,200 @@
 from PIL import Image, ImageDraw, ImageFont
 from ImageOpener.PILImageOpener import PILImageOpener
 from ImageOpener.S3ImageOpener import S3ImageOpener
+from ImageOpener.SpineCache import getSpineCache
 from randCol import getRandColor
-from random import random, choice
+from random import choice
 import feedparser
 import copy
 from dynamodb_dao import getBookBatch, getBook
+from shelfLayout import ShelfBackground, ShelfLayout, bookPixelSize, getBookHeightWidthLength, genBookHeightWidthLength
 import math
 import colorsys
+import struct
+import zlib
+from functools import lru_cache
+
+#decoded background images by file name, shared by every Bookshelf (and every invocation of a warm lambda).
+#never drawn on - a shelf gets its own copy the first time something is pasted onto it
+backgrounds = {}
+
+def getBackground(imageOpener, fileName):
+  if(fileName not in backgrounds):
+    background = imageOpener.open(fileName)
+    background.load()
+    backgrounds[fileName] = background
+  return backgrounds[fileName]
+
+#fonts for generated spines, picked at random per book
+FONTS = [
+  "example/LeagueGothic.ttf",
+]
+
+@lru_cache(maxsize=256)
+def getFont(fontPath, fontSize):
+  #truetype() reads and parses the font file, so do it once per size rather than on every fitting step
+  return ImageFont.truetype(fontPath, fontSize)
+
+def getTextDimensions(text_string, font):
+  ascent, descent = font.getmetrics()
+  bbox = font.getmask(text_string).getbbox() #rasterizes the text - once, not once per coordinate
+  return (bbox[2], bbox[3] + descent)
+
+@lru_cache(maxsize=4096)
+def fitFontSize(fontPath, title, w, h):
+  #smallest size at which the title is no longer smaller than the spine (less 30px of padding) either way.
+  #text only grows with the font size, so double until it fits and then binary search the last step
+  def tooSmall(fontSize):
+    textWidth, textHeight = getTextDimensions(title, getFont(fontPath, fontSize))
+    return textWidth + 30 < w or textHeight + 30 < h
+  low, high = 1, 1
+  while(tooSmall(high)):
+    low, high = high + 1, high * 2
+  while(low < high):
+    mid = (low + high) // 2
+    if(tooSmall(mid)):
+      low = mid + 1
+    else:
+      high = mid
+  return high
 
 class Bookshelf:
   def __init__(self, imageOpener, bookshelfFileName, shelfWidthInches, shelfWidthPixels, shelfBottoms, shelfLeft):
     self.imageOpener = imageOpener
+    self.spineCache = getSpineCache(imageOpener)
     self.shelves = []
-    self.bookshelfImage = imageOpener.open(bookshelfFileName) 
-    self.curShelf = copy.deepcopy(self.bookshelfImage)
-    self.inchPixelRatio = shelfWidthPixels / shelfWidthInches
-    self.shelfLength = shelfWidthPixels
-    self.shelfBottoms = shelfBottoms #because shelves can have variable height, the array shelfBottoms tells us the number of shelves and their respective height in pixels
-    self.shelfBottomIndex = 0
-    self.shelfLeft = shelfLeft #constant, representing left edge of shelf
-    self.bookLeft = shelfLeft #represents the left edge of the next book to be placed
+    self.bookshelfImage = getBackground(imageOpener, bookshelfFileName)
+    self.curShelf = self.bookshelfImage
+    #because shelves can have variable height, shelfBottoms tells us the number of shelves and their respective height in pixels.
+    #shelfLeft is the left edge of every shelf
+    self.background = ShelfBackground.fromImage(shelfWidthInches, shelfWidthPixels, shelfBottoms, shelfLeft)
+    self.inchPixelRatio = self.background.inchPixelRatio
+    self.layout = ShelfLayout(self.background) #where the next book goes
     self.bookList = []
 
   #dimension must be delimited with x.
   def getBookHeightWidthLength(self, dimension):
-    ds = [(float(s)) for s in (dimension.replace(" ", "").split('x'))]
-    #longest dimension is book height
-    h = max(ds)
-    #shortest is book width
-    w = min(ds)
-    #middle is book length
-    l = None
-    for d in ds:
-      if d == h: continue
-      elif d == w: continue
-      else: l = d
-          
-    #maybe it's a square book, so its height and width are the same. Either way, we don't really use l. so just set it so it isn't null
-    if(l is None): l=h
-
-    #there could be a case where this is incorrect, but that's a wacky book.
-    return float(h), float(w), float(l)
+    return getBookHeightWidthLength(dimension)
 
   def genBookHeightWidthLength(self):
-    #h 6-9
-    h = random() * (9 - 6) + 6
-    #w .5-2
-    w = random() * (2 - .5) + .5
-    #l 5-6
-    l = random() * (6 - 5) + 5
-    return h,w,l
+    return genBookHeightWidthLength()
 
   def getRandomFont(self, fontSize):
-    fontList = [
-      "example/LeagueGothic.ttf",
-    ]
-    return ImageFont.truetype(choice(fontList), fontSize)
+    return getFont(choice(FONTS), fontSize)
 
   def getTextDimensions(self, text_string, font):
-    ascent, descent = font.getmetrics()
-
-    text_width = font.getmask(text_string).getbbox()[2]
-    text_height = font.getmask(text_string).getbbox()[3] + descent
-
-    return (text_width, text_height)
+    return getTextDimensions(text_string, font)
 
   def convertInchesToPixels(self, inches):
-    return int(inches * self.inchPixelRatio) #at some point, i'll make this a class, and each class can be instantiated with different bookshelf types. These types will have different pixel to inch ratios. but for now this is fine. my only image is a 1/20 ratio
+    return int(inches * self.inchPixelRatio)
+
+  def getBookPixelSize(self, book):
+    return bookPixelSize(book, self.background)
 
   def fillShelf(self, bookList):
     self.bookList = self.bookList + bookList
-    for f in bookList:
-      h,w,l = 0,0,0
-      if(f["dimensions"]):
-        h,w,l = self.getBookHeightWidthLength(f["dimensions"])
-      else:
-        h,w,l = self.genBookHeightWidthLength()
-      h = self.convertInchesToPixels(h)
-      w = self.convertInchesToPixels(w)
-      bookRight = self.bookLeft + w
-
-      if(bookRight > self.shelfLength): #move to next row
-        self.bookLeft = self.shelfLeft
-        bookRight = self.bookLeft + w
-        if(self.shelfBottomIndex + 1 < len(self.shelfBottoms)):
-          self.shelfBottomIndex += 1
-        else: #move to next bookshelf
-          self.shelfBottomIndex = 0
-          self.shelves.append(self.curShelf)
-          self.curShelf = copy.deepcopy(self.bookshelfImage)
-
-      bookTop = self.shelfBottoms[self.shelfBottomIndex] - h
+    self.renderPlacements(self.layout.place(bookList))
+
+  def renderPlacements(self, placements):
+    #draws placements from a ShelfLayout of this background, which must continue from what's already drawn
+    #every spine this render needs, downloaded and resized concurrently up front
+    self.spineCache.prefetch([(p["book"]["fileName"], p["w"], p["h"]) for p in placements if p["book"]["fileName"]])
+    for p in placements:
+      f, x, y, w, h = p["book"], p["x"], p["y"], p["w"], p["h"]
+      while(len(self.shelves) < p["shelf_index"]): #move to next bookshelf
+        self.shelves.append(self.curShelf)
+        self.curShelf = self.bookshelfImage
 
       if(f["fileName"]): #use provided file
-        spine = self.imageOpener.open(f["fileName"])
-        spine = spine.resize((w, h))
-        self.curShelf.paste(spine, (self.bookLeft, bookTop))
+        spine = self.spineCache.get(f["fileName"], w, h)
+        self.drawableShelf().paste(spine, (x, y))
 
       else: #draw our own cover rectangle
         newBook = Image.new("RGB", (h, w), getRandColor(.7))
         imDraw = ImageDraw.Draw(newBook)
         
         #okay so this only sometimes works. I don't know the proper solution at the moment.
-        fontSize = 1 #purposefully small so we can upscale to appropriate fontsize
-        randFont = self.getRandomFont(fontSize)
-        while(self.getTextDimensions(f["title"], randFont)[0]+30 < w or self.getTextDimensions(f["title"], randFont)[1]+30 < h):
-          randFont = self.getRandomFont(int(fontSize))
-          fontSize += 1
+        fontPath = choice(FONTS)
+        randFont = getFont(fontPath, fitFontSize(fontPath, f["title"], w, h))
         
         imDraw.text((15, 0), f["title"], (255,255,255), font=randFont)
         newBook = newBook.rotate(270, expand=True)
-        self.curShelf.paste(newBook, (self.bookLeft, bookTop))
-
-      self.bookLeft = bookRight
+        self.drawableShelf().paste(newBook, (x, y))
     
   def reorderShelf(self, sortMethod):
     orderedList = sortMethod(self.bookList)
     self.bookList = []
     self.shelves = []
-    self.curShelf = copy.deepcopy(self.bookshelfImage)
-    self.shelfBottomIndex = 0
-    self.bookLeft = self.shelfLeft
+    self.curShelf = self.bookshelfImage
+    self.layout.reset()
     self.fillShelf(orderedList)
 
-  def getFullShelf(self):
-    if(len(self.shelves) > 0):
-      self.shelves.append(self.curShelf)
-      prevShelf = self.shelves[0]
-      for i in range(1, len(self.shelves)):
-        nextShelf = self.shelves[i]
-        tempImage = Image.new('RGB', (prevShelf.width + nextShelf.width, prevShelf.height))
-        tempImage.paste(prevShelf, (0,0))
-        tempImage.paste(nextShelf, (prevShelf.width, 0))
-        prevShelf = tempImage
-      return prevShelf
+  def drawableShelf(self):
+    #copy-on-write: the current shelf is the shared background until something is drawn on it
+    if(self.curShelf is self.bookshelfImage):
+      self.curShelf = self.bookshelfImage.copy()
+    return self.curShelf
 
-    else:
-      return self.curShelf
+  def allShelves(self):
+    return self.shelves + [self.curShelf]
+
+  def getFullShelf(self):
+    #one canvas sized for every shelf up front, each shelf pasted into it exactly once
+    shelves = self.allShelves()
+    if(len(shelves) == 1):
+      return self.drawableShelf() #callers may draw on the result, so never hand out the shared background
+    fullShelf = Image.new('RGB', (sum(s.width for s in shelves), max(s.height for s in shelves)))
+    left = 0
+    for shelf in shelves:
+      fullShelf.paste(shelf, (left, 0))
+      left += shelf.width
+    return fullShelf
     
   def showShelf(self):
     self.getFullShelf().show()
 
-  def saveShelf(self, saveLocation):
-    self.getFullShelf().save(saveLocation)
+  def saveShelf(self, saveLocation, streaming=False):
+    #streaming writes a png strip by strip straight from the shelves, so the full image never exists in memory
+    if(streaming):
+      if(not saveLocation.lower().endswith(".png")):
+        raise ValueError("streamed shelves can only be saved as png, not " + saveLocation)
+      with open(saveLocation, "wb") as f:
+        self.streamShelfPNG(f)
+    else:
+      self.getFullShelf().save(saveLocation)
+
+  def saveShelfTiles(self, saveLocationFormat):
+    #tiled output: each shelf as its own image, e.g. saveShelfTiles("shelf_{}.jpg"). returns the file names in order
+    saveLocations = []
+    for i, shelf in enumerate(self.allShelves()):
+      saveLocations.append(saveLocationFormat.format(i))
+      shelf.save(saveLocations[-1])
+    return saveLocations
+
+  def streamShelfPNG(self, f, stripHeight=64):
+    shelves = [s if s.mode == "RGB" else s.convert("RGB") for s in self.allShelves()]
+    width = sum(s.width for s in shelves)
+    height = max(s.height for s in shelves)
+
+    def writeChunk(chunkType, data):
+      f.write(struct.pack(">I", len(data)) + chunkType + data + struct.pack(">I", zlib.crc32(chunkType + data)))
+
+    f.write(b"\x89PNG\r\n\x1a\n")
+    writeChunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) #8 bit rgb
+    compressor = zlib.compressobj(6)
+    for top in range(0, height, stripHeight):
+      bottom = min(top + stripHeight, height)
+      #shorter shelves are padded with black, as pasting onto the full canvas would leave them
+      strips = [(s.crop((0, top, s.width, bottom)).tobytes(), s.width * 3) for s in shelves]
+      rows = []
+      for y in range(bottom - top):
+        rows.append(b"\x00") #filter type none for every scanline
+        for strip, rowBytes in strips:
+          rows.append(strip[y * rowBytes:(y + 1) * rowBytes])
+      data = compressor.compress(b"".join(rows))
+      if(data): writeChunk(b"IDAT", data)
+    writeChunk(b"IDAT", compressor.flush())
+    writeChunk(b"IEND", b"")
 
 def check_digit_13(isbn):
   assert len(isbn) == 12
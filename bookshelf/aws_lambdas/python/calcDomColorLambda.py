@@ -1,7 +1,6 @@
 from cockroachdb_dao import CockroachDAO
-from colorthief import ColorThief
+from dominantColor import calcDomRGB, SPINE_URL
 import os
-from PIL import Image # type: ignore
 import urllib.request
 db = CockroachDAO(os.getenv('DATABASE_URL'))
 
@@ -10,14 +9,6 @@ error_message = "Something went wrong."
 def build_return(code, msg):
   return {"statusCode" : code, "body" : msg}
 
-def rgb_to_hex(rgb : tuple):
-  return "#%02x%02x%02x" % rgb
-
-def calcDomRGB(source):
-  cf = ColorThief(source)
-  dominant = cf.get_color(quality=1)
-  return rgb_to_hex(dominant)
-
 def verify_required_values(event):
   required_items = [
     # "title",
@@ -37,11 +28,9 @@ def lambda_handler(event, context):
     return build_return(403, error_message)
   book = db.get_book_by("upload_id", event["upload_id"])
   title = book["title"]
-  os.chdir("/tmp")
-  urllib.request.urlretrieve(
-    "https://bookshelf-spines.s3.amazonaws.com/" + book["fileName"],
-    "temp.png")
-  book["domColor"] = calcDomRGB("temp.png")
+  #decoded from memory - nothing is written to /tmp
+  with urllib.request.urlopen(SPINE_URL + book["fileName"], timeout=10) as response:
+    book["domColor"] = calcDomRGB(response.read())
   if(db.update_book_col(book["upload_id"], "domColor", book["domColor"])):
     return build_return(200, "updated color of " + title + " to " + book["domColor"])
   return build_return(400, "something went wrong setting the updated domColor")
@@ -1,4 +1,5 @@
 import psycopg2
+from psycopg2.extras import execute_values
 import time
 import uuid
 
@@ -382,6 +383,37 @@ class CockroachDAO:
     sql = "UPDATE bookshelf set " + col + " = %s WHERE upload_id = %s"
     return self.exec_statement(sql, (value, upload_id))
 
+  def update_book_col_batch(self, col, values):
+    #values is a list of (upload_id, value) - one statement for the whole batch instead of one per book
+    values = [(u_id, value) for u_id, value in values if self.validate_uuid(u_id)]
+    if(len(values) == 0): return False
+    sql = "UPDATE bookshelf SET " + col + " = data.value FROM (VALUES %s) AS data (upload_id, value) WHERE bookshelf.upload_id = data.upload_id::UUID"
+    try:
+      with self.conn.cursor() as cur:
+        execute_values(cur, sql, values, page_size=len(values))
+        self.conn.commit()
+        return True
+    except Exception as ex:
+      template = "An exception of type {0} occurred. Arguments:\n{1!r}"
+      message = template.format(type(ex).__name__, ex.args)
+      print(message)
+      self.conn.rollback()
+      return False
+
+  def get_book_file_names(self, after=None, upload_ids=None):
+    #(upload_id, fileName) for every book, in upload_id order, optionally resuming after an upload_id
+    #or only for the given upload_ids
+    if(upload_ids != None):
+      upload_ids = [upload_id for upload_id in upload_ids if self.validate_uuid(upload_id)]
+      if(len(upload_ids) == 0): return []
+      res = self.exec_statement_fetch("SELECT upload_id, fileName FROM bookshelf WHERE upload_id IN (" + ", ".join(["%s"] * len(upload_ids)) + ") ORDER BY upload_id", tuple(upload_ids))
+    elif(after != None):
+      res = self.exec_statement_fetch("SELECT upload_id, fileName FROM bookshelf WHERE upload_id > %s ORDER BY upload_id", (after,))
+    else:
+      res = self.exec_statement_fetch("SELECT upload_id, fileName FROM bookshelf ORDER BY upload_id")
+    if(not res): return []
+    return [(str(r[0]), r[1]) for r in res]
+
   def add_shelf_image_and_owner(self, filename, owner, bookshelf_name):
     sql = "INSERT INTO shelf_images (filename, timestamp, owner, bookshelf_name) VALUES (%s, %s, %s, %s)"
     self.exec_statement(sql, (filename, str(int(time.time())), owner, bookshelf_name))
@@ -12,6 +12,7 @@ __version__ = '0.2.1'
 
 import math
 
+import numpy as np
 from PIL import Image
 
 
@@ -32,11 +33,12 @@ class ColorThief(object):
     def __init__(self, file):
         """Create one color thief for one image.
 
-        :param file: A filename (string) or a file object. The file object
-                     must implement `read()`, `seek()`, and `tell()` methods,
-                     and be opened in binary mode.
+        :param file: A filename (string), a file object or an already
+                     opened PIL image. The file object must implement
+                     `read()`, `seek()`, and `tell()` methods, and be opened
+                     in binary mode.
         """
-        self.image = Image.open(file)
+        self.image = file if isinstance(file, Image.Image) else Image.open(file)
 
     def get_color(self, quality=10):
         """Get the dominant color.
@@ -60,27 +62,27 @@ class ColorThief(object):
                         greater the likelihood that colors will be missed.
         :return list: a list of tuple in the form (r, g, b)
         """
-        image = self.image.convert('RGBA')
-        width, height = image.size
-        pixels = image.getdata()
-        pixel_count = width * height
-        valid_pixels = []
-        for i in range(0, pixel_count, quality):
-            r, g, b, a = pixels[i]
-            # If pixel is mostly opaque and not white
-            if a >= 125:
-                if not (r > 250 and g > 250 and b > 250):
-                    valid_pixels.append((r, g, b))
-
-        # Send array to quantize function which clusters values
+        image = np.asarray(self.image.convert('RGBA'))
+        # Every quality-th pixel in row-major order, one contiguous array per channel
+        r, g, b, a = (image[..., channel].ravel()[::quality] for channel in range(4))
+        # If pixel is mostly opaque and not white
+        valid = (a >= 125) & ~((r > 250) & (g > 250) & (b > 250))
+        histo = MMCQ.histo_from_channels(r, g, b, valid)
+
+        # Send histogram to quantize function which clusters values
         # using median cut algorithm
-        cmap = MMCQ.quantize(valid_pixels, color_count)
+        cmap = MMCQ.quantize_histo(histo, color_count)
         return cmap.palette
 
 
 class MMCQ(object):
     """Basic Python port of the MMCQ (modified median cut quantization)
     algorithm from the Leptonica library (http://www.leptonica.com/).
+
+    The histogram is a NumPy array and box counts, averages and partial
+    sums are array reductions, so the cost no longer grows with the number
+    of pixels in Python. Palettes are identical to the original
+    pixel-by-pixel port (see colorthief_benchmark.py).
     """
 
     SIGBITS = 5
@@ -94,37 +96,34 @@ class MMCQ(object):
 
     @staticmethod
     def get_histo(pixels):
-        """histo (1-d array, giving the number of pixels in each quantized
-        region of color space)
+        """histo (3-d array indexed [r, g, b], giving the number of pixels
+        in each quantized region of color space)
         """
-        histo = dict()
-        for pixel in pixels:
-            rval = pixel[0] >> MMCQ.RSHIFT
-            gval = pixel[1] >> MMCQ.RSHIFT
-            bval = pixel[2] >> MMCQ.RSHIFT
-            index = MMCQ.get_color_index(rval, gval, bval)
-            histo[index] = histo.setdefault(index, 0) + 1
-        return histo
+        pixels = np.asarray(pixels, dtype=np.uint8).reshape(-1, 3)
+        return MMCQ.histo_from_channels(pixels[:, 0], pixels[:, 1], pixels[:, 2])
+
+    @staticmethod
+    def histo_from_channels(r, g, b, mask=None):
+        """histo from uint8 channel arrays, counting only pixels where mask is true"""
+        index = MMCQ.get_color_index(
+            (r >> MMCQ.RSHIFT).astype(np.uint16),
+            (g >> MMCQ.RSHIFT).astype(np.uint16),
+            b >> MMCQ.RSHIFT
+        )
+        if mask is not None:
+            index = index[mask]
+        side = 1 << MMCQ.SIGBITS
+        return np.bincount(index, minlength=side ** 3).reshape(side, side, side)
 
     @staticmethod
     def vbox_from_pixels(pixels, histo):
-        rmin = 1000000
-        rmax = 0
-        gmin = 1000000
-        gmax = 0
-        bmin = 1000000
-        bmax = 0
-        for pixel in pixels:
-            rval = pixel[0] >> MMCQ.RSHIFT
-            gval = pixel[1] >> MMCQ.RSHIFT
-            bval = pixel[2] >> MMCQ.RSHIFT
-            rmin = min(rval, rmin)
-            rmax = max(rval, rmax)
-            gmin = min(gval, gmin)
-            gmax = max(gval, gmax)
-            bmin = min(bval, bmin)
-            bmax = max(bval, bmax)
-        return VBox(rmin, rmax, gmin, gmax, bmin, bmax, histo)
+        # The occupied bins span exactly the pixels' quantized min..max on each
+        # axis, so only the histo is needed
+        bounds = []
+        for axes in ((1, 2), (0, 2), (0, 1)):
+            occupied = np.flatnonzero(histo.any(axis=axes))
+            bounds += [int(occupied[0]), int(occupied[-1])]
+        return VBox(*bounds, histo)
 
     @staticmethod
     def median_cut_apply(histo, vbox):
@@ -139,43 +138,20 @@ class MMCQ(object):
         if vbox.count == 1:
             return (vbox.copy, None)
         # Find the partial sum arrays along the selected axis.
-        total = 0
-        sum_ = 0
-        partialsum = {}
-        lookaheadsum = {}
-        do_cut_color = None
+        box = vbox.box
         if maxw == rw:
             do_cut_color = 'r'
-            for i in range(vbox.r1, vbox.r2+1):
-                sum_ = 0
-                for j in range(vbox.g1, vbox.g2+1):
-                    for k in range(vbox.b1, vbox.b2+1):
-                        index = MMCQ.get_color_index(i, j, k)
-                        sum_ += histo.get(index, 0)
-                total += sum_
-                partialsum[i] = total
+            sums = box.sum(axis=(1, 2))
         elif maxw == gw:
             do_cut_color = 'g'
-            for i in range(vbox.g1, vbox.g2+1):
-                sum_ = 0
-                for j in range(vbox.r1, vbox.r2+1):
-                    for k in range(vbox.b1, vbox.b2+1):
-                        index = MMCQ.get_color_index(j, i, k)
-                        sum_ += histo.get(index, 0)
-                total += sum_
-                partialsum[i] = total
+            sums = box.sum(axis=(0, 2))
         else:  # maxw == bw
             do_cut_color = 'b'
-            for i in range(vbox.b1, vbox.b2+1):
-                sum_ = 0
-                for j in range(vbox.r1, vbox.r2+1):
-                    for k in range(vbox.g1, vbox.g2+1):
-                        index = MMCQ.get_color_index(j, k, i)
-                        sum_ += histo.get(index, 0)
-                total += sum_
-                partialsum[i] = total
-        for i, d in partialsum.items():
-            lookaheadsum[i] = total - d
+            sums = box.sum(axis=(0, 1))
+        first = getattr(vbox, do_cut_color + '1')
+        partialsum = {first + i: d for i, d in enumerate(np.cumsum(sums).tolist())}
+        total = partialsum[getattr(vbox, do_cut_color + '2')]
+        lookaheadsum = {i: total - d for i, d in partialsum.items()}
 
         # determine the cut planes
         dim1 = do_cut_color + '1'
@@ -209,23 +185,29 @@ class MMCQ(object):
     def quantize(pixels, max_color):
         """Quantize.
 
-        :param pixels: a list of pixel in the form (r, g, b)
+        :param pixels: a list of pixel in the form (r, g, b), or an (n, 3)
+                       uint8 array
         :param max_color: max number of colors
         """
-        if not pixels:
+        if len(pixels) == 0:
+            raise Exception('Empty pixels when quantize.')
+        return MMCQ.quantize_histo(MMCQ.get_histo(pixels), max_color)
+
+    @staticmethod
+    def quantize_histo(histo, max_color):
+        """Quantize pixels already counted into a histo (see get_histo)."""
+        if not histo.any():
             raise Exception('Empty pixels when quantize.')
         if max_color < 2 or max_color > 256:
             raise Exception('Wrong number of max colors when quantize.')
 
-        histo = MMCQ.get_histo(pixels)
-
         # check that we aren't below maxcolors already
         if len(histo) <= max_color:
             # generate the new colors from the histo and return
             pass
 
         # get the beginning vbox from the colors
-        vbox = MMCQ.vbox_from_pixels(pixels, histo)
+        vbox = MMCQ.vbox_from_pixels(None, histo)
         pq = PQueue(lambda x: x.count)
         pq.push(vbox)
 
@@ -295,22 +277,21 @@ class VBox(object):
         return VBox(self.r1, self.r2, self.g1, self.g2,
                     self.b1, self.b2, self.histo)
 
+    @property
+    def box(self):
+        """View of the histogram inside this box"""
+        return self.histo[self.r1:self.r2 + 1, self.g1:self.g2 + 1, self.b1:self.b2 + 1]
+
     @cached_property
     def avg(self):
-        ntot = 0
+        box = self.box
+        ntot = int(box.sum())
         mult = 1 << (8 - MMCQ.SIGBITS)
-        r_sum = 0
-        g_sum = 0
-        b_sum = 0
-        for i in range(self.r1, self.r2 + 1):
-            for j in range(self.g1, self.g2 + 1):
-                for k in range(self.b1, self.b2 + 1):
-                    histoindex = MMCQ.get_color_index(i, j, k)
-                    hval = self.histo.get(histoindex, 0)
-                    ntot += hval
-                    r_sum += hval * (i + 0.5) * mult
-                    g_sum += hval * (j + 0.5) * mult
-                    b_sum += hval * (k + 0.5) * mult
+        # Every term is an exact multiple of mult / 2, so these float sums
+        # equal the original bin-by-bin accumulation exactly
+        r_sum = float(np.dot(box.sum(axis=(1, 2)), (np.arange(self.r1, self.r2 + 1) + 0.5) * mult))
+        g_sum = float(np.dot(box.sum(axis=(0, 2)), (np.arange(self.g1, self.g2 + 1) + 0.5) * mult))
+        b_sum = float(np.dot(box.sum(axis=(0, 1)), (np.arange(self.b1, self.b2 + 1) + 0.5) * mult))
 
         if ntot:
             r_avg = int(r_sum / ntot)
@@ -338,13 +319,7 @@ class VBox(object):
 
     @cached_property
     def count(self):
-        npix = 0
-        for i in range(self.r1, self.r2 + 1):
-            for j in range(self.g1, self.g2 + 1):
-                for k in range(self.b1, self.b2 + 1):
-                    index = MMCQ.get_color_index(i, j, k)
-                    npix += self.histo.get(index, 0)
-        return npix
+        return int(self.box.sum())
 
 
 class CMap(object):
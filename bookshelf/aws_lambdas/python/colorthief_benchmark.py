@@ -0,0 +1,128 @@
+"""
+Check colorthief palettes against the original implementation and time both.
+
+colorthief_reference.py is the original pure-Python MMCQ. colorthief.py must
+produce exactly its palettes, both live and as recorded in
+../../example/colorthief_palettes.json. Then both are timed on the same images
+and the speedup is printed. Run from this directory:
+
+    python colorthief_benchmark.py            # verify palettes, then time them
+    python colorthief_benchmark.py --record   # rewrite the fixtures (only after an intended change)
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from colorthief import ColorThief
+from colorthief_reference import ColorThief as ReferenceColorThief
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'example')
+FIXTURES = os.path.join(EXAMPLE_DIR, 'colorthief_palettes.json')
+
+# (color_count, quality) pairs checked for every image; get_color is (5, q)
+SETTINGS = [(5, 1), (10, 10), (2, 3), (16, 1)]
+
+
+def synthetic_images():
+    """Deterministic images covering noise, smooth gradients, few colors and transparency"""
+    rng = np.random.RandomState(7)
+    noise = rng.randint(0, 256, (300, 200, 3)).astype('uint8')
+
+    gradient = np.zeros((400, 120, 3), 'uint8')
+    gradient[..., 0] = np.linspace(0, 255, 400)[:, None]
+    gradient[..., 1] = np.linspace(255, 0, 120)[None, :]
+    gradient[..., 2] = 90
+
+    blocks = np.zeros((240, 80, 4), 'uint8')
+    for index, color in enumerate([(200, 30, 30, 255), (20, 20, 160, 255), (255, 255, 255, 255), (10, 200, 10, 60)]):
+        blocks[index * 60:(index + 1) * 60] = color
+
+    return {
+        'synthetic_noise': Image.fromarray(noise),
+        'synthetic_gradient': Image.fromarray(gradient),
+        'synthetic_blocks_rgba': Image.fromarray(blocks, 'RGBA')
+    }
+
+
+def fixture_images():
+    images = {os.path.basename(path): path for path in sorted(glob.glob(os.path.join(EXAMPLE_DIR, '*.jpg')))}
+    images.update(synthetic_images())
+    return images
+
+
+def palette(source, color_count, quality, thief=ColorThief):
+    return [list(color) for color in thief(source).get_palette(color_count, quality)]
+
+
+def best_time(repeat, function, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def report_mismatches(label, expected, results):
+    """Print palettes in results that differ from expected; True if there were any"""
+    mismatches = [
+        (name, setting) for name in expected for setting in expected[name]
+        if results.get(name, {}).get(setting) != expected[name][setting]
+    ]
+    for name, setting in mismatches:
+        print(f"✗ {name} {setting}: {label} {expected[name][setting]}, got {results[name][setting]}")
+    return bool(mismatches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify and time colorthief palettes')
+    parser.add_argument('--record', action='store_true', help='rewrite the fixture file from this implementation')
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per image (best is reported)')
+    args = parser.parse_args()
+
+    images = fixture_images()
+    results = {
+        name: {f'{count}x{quality}': palette(source, count, quality) for count, quality in SETTINGS}
+        for name, source in images.items()
+    }
+
+    if args.record:
+        with open(FIXTURES, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"Recorded {len(results)} images x {len(SETTINGS)} settings to {FIXTURES}")
+        return 0
+
+    reference = {
+        name: {f'{count}x{quality}': palette(source, count, quality, ReferenceColorThief) for count, quality in SETTINGS}
+        for name, source in images.items()
+    }
+    with open(FIXTURES) as f:
+        recorded = json.load(f)
+    if report_mismatches('reference', reference, results) | report_mismatches('recorded', recorded, results):
+        return 1
+    print(f"✓ {len(results)} images x {len(SETTINGS)} settings match the reference implementation and the recorded palettes\n")
+
+    # get_color(quality=1): every pixel, the dominant color's usual (and slowest) setting
+    print(f"{'image':<40} {'size':>11} {'reference':>12} {'colorthief':>12} {'speedup':>8}")
+    reference_total = total = 0
+    for name, source in images.items():
+        image = source if isinstance(source, Image.Image) else Image.open(source)
+        reference_best = best_time(args.repeat, palette, source, 5, 1, ReferenceColorThief)
+        best = best_time(args.repeat, palette, source, 5, 1)
+        reference_total += reference_best
+        total += best
+        print(f"{name:<40} {image.width:>5}x{image.height:<5} {reference_best * 1000:>9.1f} ms "
+              f"{best * 1000:>9.1f} ms {reference_best / best:>7.1f}x")
+    print(f"{'total':<52} {reference_total * 1000:>9.1f} ms {total * 1000:>9.1f} ms {reference_total / total:>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+from colorthief import ColorThief
+from io import BytesIO
+import math
+from PIL import Image # type: ignore
+
+SPINE_URL = "https://bookshelf-spines.s3.amazonaws.com/"
+
+#images are shrunk to about this many pixels before quantizing. the dominant color
+#of a spine is the same at 200x200 as at full scan resolution, and MMCQ's cost
+#grows with every pixel it has to histogram
+MAX_PIXELS = 40000
+
+def rgb_to_hex(rgb : tuple):
+  return "#%02x%02x%02x" % rgb
+
+def openDownsampled(data, max_pixels=MAX_PIXELS):
+  """Decode image bytes at (roughly) max_pixels, never at full size if it can be avoided"""
+  image = Image.open(BytesIO(data))
+  scale = math.sqrt(image.width * image.height / max_pixels)
+  if(scale <= 1):
+    return image
+
+  #jpegs decode straight at 1/2, 1/4 or 1/8 scale, skipping most of the IDCT work
+  image.draft("RGB", (int(image.width / scale), int(image.height / scale)))
+  factor = int(math.sqrt(image.width * image.height / max_pixels))
+  if(factor >= 2):
+    #reduce() is a box filter over factor x factor blocks - cheap, and it only averages neighbours
+    if(image.mode not in ("RGB", "RGBA")):
+      image = image.convert("RGBA")
+    image = image.reduce(factor)
+  return image
+
+def calcDomRGB(data):
+  """Dominant color of image bytes as a hex string"""
+  return rgb_to_hex(ColorThief(openDownsampled(data)).get_color(quality=1))
@@ -5,6 +5,20 @@ Supports multiple APIs: Open Library, Google Books
 import requests
 import json
 import os
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# One keep-alive session per Lambda container, reused by warm invocations.
+# The backend's services/http_client.py is not packaged with the Lambdas, so
+# transient failures are retried here by urllib3 with exponential backoff.
+session = requests.Session()
+session.mount("https://", HTTPAdapter(max_retries=Retry(
+    total=2,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=("GET",),
+    raise_on_status=False
+)))
 
 def fetch_from_open_library(title, author=None):
     """
@@ -23,7 +37,7 @@ def fetch_from_open_library(title, author=None):
             "limit": 5  # Get top 5 results
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = session.get(url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -94,7 +108,7 @@ def fetch_from_google_books(title, author=None, api_key=None):
         if api_key:
             params["key"] = api_key
         
-        response = requests.get(url, params=params, timeout=10)
+        response = session.get(url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -2,7 +2,8 @@ from bookshelf import Bookshelf
 from cockroachdb_dao import CockroachDAO
 import os
 import random
-from s3_dao import upload_file, openS3Image
+from ImageOpener.S3ImageOpener import S3ImageOpener
+from s3_dao import upload_file
 import string
 db = CockroachDAO(os.getenv('DATABASE_URL'))
 
@@ -13,10 +14,6 @@ def rand_str(n = 5):
   letters = string.ascii_lowercase
   return ''.join(random.choice(letters) for i in range(n))
   
-class S3ImageOpener:
-  def open(filename):
-    return openS3Image(filename)
-
 def lambda_handler(event, context):
   sortedBooks = event["bookList"]
   bookshelf = Bookshelf(S3ImageOpener, "bookshelf1.jpg", 35.5, 1688, [676, 1328, 2008, 2708, 3542], 75)
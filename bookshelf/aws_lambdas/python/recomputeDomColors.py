@@ -0,0 +1,151 @@
+"""
+Recompute dominant colors for every book, in parallel and resumably.
+
+    python recomputeDomColors.py bookshelf   # bookshelf.domColor from the spine images (DATABASE_URL is CockroachDB)
+    python recomputeDomColors.py books       # backend books.dom_color from the stored covers (backend database settings)
+
+Images are decoded in memory and downsampled before quantizing (see
+dominantColor.py), spread over a process pool. Colors are written back
+BATCH_SIZE at a time, and after each batch the last finished key and the keys
+that failed so far are saved to the checkpoint file. An interrupted run picks
+up where it stopped, and every run retries the books that failed before
+(a network error, say) first. Pass --restart to ignore the checkpoint.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dominantColor import calcDomRGB, SPINE_URL
+import argparse
+import json
+import os
+import sys
+import urllib.request
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "backend")
+
+#rows written per UPDATE batch (and checkpoint)
+BATCH_SIZE = 100
+
+def colorFor(job):
+  #runs in a worker process: job is (key, spine URL or cover path)
+  key, source = job
+  try:
+    if(source.startswith("http")):
+      with urllib.request.urlopen(source, timeout=30) as response:
+        data = response.read()
+    else:
+      with open(source, "rb") as f:
+        data = f.read()
+    return key, calcDomRGB(data)
+  except Exception as ex:
+    print("could not get a color for " + str(key) + " from " + source + ": " + repr(ex))
+    return key, None
+
+class SpineTarget:
+  """bookshelf.domColor in CockroachDB, from the spine images in S3"""
+  def __init__(self):
+    from cockroachdb_dao import CockroachDAO
+    self.db = CockroachDAO(os.getenv('DATABASE_URL'))
+
+  def jobs(self, after, keys=None):
+    #every book after the key, or only the books with the given keys
+    return [(upload_id, SPINE_URL + fileName) for upload_id, fileName in self.db.get_book_file_names(after, keys)]
+
+  def write(self, colors):
+    if(not self.db.update_book_col_batch("domColor", colors)):
+      raise RuntimeError("writing a batch of domColors failed")
+
+class CoverTarget:
+  """backend books.dom_color, from each book's cover in the local cover store"""
+  def __init__(self):
+    sys.path.insert(0, BACKEND_DIR)
+    from database.db import get_db
+    from services.cover_store import get_cover_store
+    self.db = get_db()
+    self.store = get_cover_store()
+
+  def jobs(self, after, keys=None):
+    #every book after the key, or only the books with the given keys
+    if(keys != None):
+      if(len(keys) == 0): return []
+      rows = self.db.execute_query(
+        "SELECT id, cover_hash FROM books WHERE cover_hash IS NOT NULL AND id IN (" + ", ".join(["?"] * len(keys)) + ") ORDER BY id",
+        tuple(keys))
+    else:
+      rows = self.db.execute_query(
+        "SELECT id, cover_hash FROM books WHERE cover_hash IS NOT NULL AND id > ? ORDER BY id",
+        (after if after != None else 0,))
+    jobs = []
+    for row in rows:
+      found = self.store.find(row["cover_hash"])
+      if(found): jobs.append((row["id"], found[0]))
+    return jobs
+
+  def write(self, colors):
+    query, _ = self.db._convert_query("UPDATE books SET dom_color = ? WHERE id = ?", None)
+    with self.db.get_connection() as conn:
+      conn.cursor().executemany(query, [(color, book_id) for book_id, color in colors])
+
+TARGETS = {"bookshelf" : SpineTarget, "books" : CoverTarget}
+
+def loadCheckpoint(path):
+  #(last finished key, keys that failed) - (None, []) without a checkpoint
+  if(not os.path.exists(path)): return None, []
+  with open(path) as f:
+    checkpoint = json.load(f)
+  return checkpoint["after"], checkpoint.get("failed", [])
+
+def saveCheckpoint(path, after, failed):
+  #write then rename, so a crash mid-write never leaves a corrupt checkpoint
+  with open(path + ".tmp", "w") as f:
+    json.dump({"after" : after, "failed" : failed}, f)
+  os.replace(path + ".tmp", path)
+
+def recompute(target, checkpoint, workers=None, batch_size=BATCH_SIZE):
+  after, retry = loadCheckpoint(checkpoint)
+  retryJobs = target.jobs(None, retry) if retry else []
+  jobs = retryJobs + target.jobs(after)
+  print(str(len(jobs)) + " books to recompute" + ("" if after == None else " (resuming after " + str(after) + ")")
+        + ("" if not retryJobs else ", retrying " + str(len(retryJobs)) + " that failed before"))
+
+  updated = 0
+  failed = []
+  pending = set(key for key, _ in retryJobs) #earlier failures not retried yet, kept in the checkpoint until they are
+  batch = []
+  with ProcessPoolExecutor(max_workers=workers) as pool:
+    #map() yields in job order: retries first, then everything after the checkpoint up to the current key
+    for i, (key, color) in enumerate(pool.map(colorFor, jobs, chunksize=8), 1):
+      if(key in pending):
+        pending.discard(key)
+      else:
+        after = key
+      if(color):
+        batch.append((key, color))
+      else:
+        failed.append(key)
+      if(i % batch_size == 0 or i == len(jobs)):
+        if(batch):
+          target.write(batch)
+          updated += len(batch)
+          batch = []
+        saveCheckpoint(checkpoint, after, failed + sorted(pending))
+        print("[" + str(i) + "/" + str(len(jobs)) + "] " + str(updated) + " updated, " + str(len(failed)) + " failed")
+  return updated, len(failed)
+
+def main():
+  parser = argparse.ArgumentParser(description="Recompute dominant colors for every book")
+  parser.add_argument("target", choices=sorted(TARGETS), help="bookshelf (spines, CockroachDB) or books (covers, backend)")
+  parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+  parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per UPDATE and checkpoint")
+  parser.add_argument("--checkpoint", default=None, help="progress file (default: domColors.<target>.checkpoint)")
+  parser.add_argument("--restart", action="store_true", help="ignore any saved progress")
+  args = parser.parse_args()
+
+  checkpoint = args.checkpoint or "domColors." + args.target + ".checkpoint"
+  if(args.restart and os.path.exists(checkpoint)):
+    os.remove(checkpoint)
+  updated, failed = recompute(TARGETS[args.target](), checkpoint, args.workers, args.batch_size)
+  print("done: " + str(updated) + " updated, " + str(failed) + " failed")
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -1,6 +1,7 @@
 import logging
 import boto3
 from botocore.exceptions import ClientError
+from io import BytesIO
 import os
 from PIL import Image
 
@@ -53,11 +54,9 @@ def upload_fileobj(fileobj, object_name, bucket="bookshelf-spines", ):
 
 
 def openS3Image(file_name, bucket="bookshelf-spines"):
-  bucket = s3.Bucket(bucket)
-  obj = bucket.Object(file_name)
-  response = obj.get()
-  file_stream = response['Body']
-  return Image.open(file_stream)
+  #uses the client rather than the resource: clients are thread safe, so spines can be fetched concurrently
+  response = s3_client.get_object(Bucket=bucket, Key=file_name)
+  return Image.open(BytesIO(response['Body'].read()))
 
 
 def delS3File(file_name, bucket="bookshelf-spines"):
@@ -0,0 +1,121 @@
+"""
+Where books go on a bookshelf, without drawing anything.
+
+A ShelfBackground describes the geometry of a background: pixels per inch,
+the left and right edge books are placed between, and the bottom of each
+row. layoutBooks (or a ShelfLayout, to add books in several calls) turns a
+list of books into placements:
+
+    {"book" : book, "shelf_index" : 0, "row" : 1, "x" : 75, "y" : 888, "w" : 28, "h" : 440}
+
+x/y is the top left corner of the spine in pixels on background number
+shelf_index. Bookshelf rasterizes these, and the backend serves them as JSON
+for the site's BookshelfRenderer, so this module must stay free of PIL and
+anything else that isn't in the standard library.
+"""
+
+import random
+
+class ShelfBackground:
+  def __init__(self, inchPixelRatio, shelfLeft, shelfRight, shelfBottoms, rowPitch=None):
+    #shelfBottoms are the pixel bottoms of the background's rows. with a rowPitch, rows continue below the
+    #last one every rowPitch pixels (a background that grows, like the site's). without one, a full
+    #background is followed by another copy of it
+    if(len(shelfBottoms) == 0):
+      raise ValueError("a background needs at least one shelf")
+    if(shelfRight <= shelfLeft):
+      raise ValueError("shelfRight must be to the right of shelfLeft")
+    if(rowPitch is not None and rowPitch <= 0):
+      raise ValueError("rowPitch must be positive")
+    self.inchPixelRatio = inchPixelRatio
+    self.shelfLeft = shelfLeft
+    self.shelfRight = shelfRight
+    self.shelfBottoms = list(shelfBottoms)
+    self.rowPitch = rowPitch
+
+  @staticmethod
+  def fromImage(shelfWidthInches, shelfWidthPixels, shelfBottoms, shelfLeft):
+    #the arguments Bookshelf (and the shelf_bgs table) describe a background image with
+    return ShelfBackground(shelfWidthPixels / shelfWidthInches, shelfLeft, shelfWidthPixels, shelfBottoms)
+
+  @staticmethod
+  def growing(shelfWidthInches, shelfHeightInches, borderWidthInches, inchPixelRatio):
+    #rows of shelfHeightInches between borders, added as needed - the site's BookshelfRenderer
+    border = round(borderWidthInches * inchPixelRatio)
+    rowPitch = round((shelfHeightInches + borderWidthInches) * inchPixelRatio)
+    return ShelfBackground(inchPixelRatio, border, round(shelfWidthInches * inchPixelRatio) - border, [rowPitch], rowPitch)
+
+  def rowsPerShelf(self):
+    return None if self.rowPitch is not None else len(self.shelfBottoms)
+
+  def rowBottom(self, row):
+    if(row < len(self.shelfBottoms)):
+      return self.shelfBottoms[row]
+    return self.shelfBottoms[-1] + (row - len(self.shelfBottoms) + 1) * self.rowPitch
+
+#dimension must be delimited with x.
+def getBookHeightWidthLength(dimension):
+  ds = sorted(float(s) for s in dimension.replace(" ", "").split('x'))
+  #longest dimension is book height, shortest is book width, the middle (if any) is its length
+  return ds[-1], ds[0], ds[len(ds) // 2]
+
+def genBookHeightWidthLength(rand=random):
+  #h 6-9
+  h = rand.random() * (9 - 6) + 6
+  #w .5-2
+  w = rand.random() * (2 - .5) + .5
+  #l 5-6
+  l = rand.random() * (6 - 5) + 5
+  return h,w,l
+
+def bookPixelSize(book, background, rand=random):
+  #(h, w) in pixels: from the book's dimensions, or made up for books that don't have any
+  if(book.get("dimensions")):
+    h,w,l = getBookHeightWidthLength(book["dimensions"])
+  else:
+    h,w,l = genBookHeightWidthLength(rand)
+  return int(h * background.inchPixelRatio), int(w * background.inchPixelRatio)
+
+class ShelfLayout:
+  """Places books left to right, wrapping to the next row and then the next background. Keeps its
+  position between calls to place(), so books can be added in batches."""
+  def __init__(self, background):
+    self.background = background
+    self.reset()
+
+  def reset(self):
+    self.shelfIndex = 0
+    self.row = 0 #row on the current background
+    self.left = self.background.shelfLeft
+    self.placements = []
+
+  def place(self, books, sizes=None):
+    #sizes is a list of (h, w) per book, if they are already known. returns the new placements
+    background = self.background
+    rowsPerShelf = background.rowsPerShelf()
+    if(sizes is None):
+      sizes = [bookPixelSize(book, background) for book in books]
+    placed = []
+    for book, (h, w) in zip(books, sizes):
+      if(self.left + w > background.shelfRight): #move to next row
+        self.left = background.shelfLeft
+        if(rowsPerShelf is None or self.row + 1 < rowsPerShelf):
+          self.row += 1
+        else: #move to next bookshelf
+          self.row = 0
+          self.shelfIndex += 1
+      placed.append({
+        "book" : book,
+        "shelf_index" : self.shelfIndex,
+        "row" : self.row,
+        "x" : self.left,
+        "y" : background.rowBottom(self.row) - h,
+        "w" : w,
+        "h" : h
+      })
+      self.left += w
+    self.placements += placed
+    return placed
+
+def layoutBooks(books, background, sizes=None):
+  return ShelfLayout(background).place(books, sizes)
@@ -8,69 +8,41 @@ import json
 import sys
 import os
 import time
-import requests
 from datetime import datetime
 from dateutil import parser as date_parser
 
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# backend/ itself, for the service modules' own imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
 from backend.database.db import get_db
+from services.metadata_service import get_metadata_service
 
-def fetch_book_metadata(title, author=None):
-    """Fetch book metadata from Open Library"""
-    try:
-        search_query = f"{title} {author}" if author else title
-        url = "https://openlibrary.org/search.json"
-        params = {"q": search_query, "limit": 5}
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if not data.get("docs"):
-            return []
-        
-        results = []
-        for book in data["docs"]:
-            # Extract ISBNs
-            isbn_list = book.get("isbn", [])
-            isbn = isbn_list[0] if isbn_list else None
-            isbn13 = None
-            
-            for isbn_val in isbn_list:
-                if len(isbn_val) == 13:
-                    isbn13 = isbn_val
-                    break
-            
-            # Extract author
-            authors = book.get("author_name", [])
-            book_author = authors[0] if authors else ""
-            
-            # Extract publication date
-            publish_year = book.get("first_publish_year")
-            
-            # Get cover image
-            cover_id = book.get("cover_i")
-            cover_url = f"https://covers.openlibrary.org/b/id/{cover_id}-L.jpg" if cover_id else None
-            
-            results.append({
-                "title": book.get("title", ""),
-                "author": book_author,
-                "isbn": isbn,
-                "isbn13": isbn13,
-                "published_date": str(publish_year) if publish_year else None,
-                "publisher": book.get("publisher", [None])[0] if book.get("publisher") else None,
-                "page_count": book.get("number_of_pages_median"),
-                "description": None,
-                "cover_url": cover_url,
-                "ol_work_id": book.get("key", "")
-            })
-        
-        return results
-    except Exception as e:
-        print(f"    Error fetching metadata: {e}")
-        return []
+def prefetch_metadata(books, db):
+    """
+    Search Open Library for every book not yet in the database in one
+    concurrent, rate-limited batch. Returns {book index: search results}.
+    """
+    items = {}
+    for i, book_data in enumerate(books):
+        title = book_data.get('title', '')
+        author = book_data.get('author', '')
+        existing = db.execute_query(
+            "SELECT id FROM books WHERE title = ? AND author = ?",
+            (title, author)
+        )
+        if not existing:
+            items[i] = {'title': clean_title(title), 'author': author}
+    
+    print(f"🔍 Searching Open Library for {len(items)} books...")
+    started = time.time()
+    indexes = list(items)
+    results = {}
+    for result in get_metadata_service().search_batch([items[i] for i in indexes]):
+        results[indexes[result['index']]] = result.get('matches', [])
+    print(f"  ✓ Metadata lookups finished in {time.time() - started:.1f}s\n")
+    return results
 
 def parse_date(date_str):
     """Parse various date formats from Goodreads export"""
@@ -125,6 +97,8 @@ def import_books(json_path):
     from backend.database.db import Database
     db = Database(db_path)
     
+    metadata_by_index = prefetch_metadata(books, db)
+    
     success_count = 0
     skip_count = 0
     error_count = 0
@@ -139,9 +113,6 @@ def import_books(json_path):
         
         print(f"\n[{i}/{len(books)}] Processing: {title} by {author} ({star_rating} stars)")
         
-        # Clean title (remove series info)
-        clean_title_str = clean_title(title)
-        
         try:
             # Check if book already exists
             existing = db.execute_query(
@@ -154,9 +125,8 @@ def import_books(json_path):
                 skip_count += 1
                 continue
             
-            # Fetch metadata from Open Library
-            print(f"  🔍 Searching Open Library for metadata...")
-            metadata_results = fetch_book_metadata(clean_title_str, author)
+            # Metadata was fetched up front by prefetch_metadata
+            metadata_results = metadata_by_index.get(i - 1)
             
             if not metadata_results or len(metadata_results) == 0:
                 print(f"  ⚠️  No metadata found, adding with basic info")
@@ -184,9 +154,9 @@ def import_books(json_path):
                         author,
                         metadata.get('isbn'),
                         metadata.get('isbn13'),
-                        metadata.get('published_date'),
-                        metadata.get('page_count'),
-                        metadata.get('cover_url'),
+                        metadata.get('pub_date'),
+                        metadata.get('num_pages'),
+                        metadata.get('cover_image_url'),
                         datetime.now().isoformat()
                     )
                 )
@@ -227,9 +197,6 @@ def import_books(json_path):
             print(f"  ✓ Added to '{state}' shelf" + (f" (finished: {date_finished})" if date_finished else "") + f" [Rank: {i}, Stars: {star_rating}]")
             success_count += 1
             
-            # Rate limit to be nice to Open Library API
-            time.sleep(0.5)
-            
         except Exception as e:
             print(f"  ❌ Error: {str(e)}")
             error_count += 1